@@ -0,0 +1,11 @@
+from django.contrib import admin
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    """Admin configuration for Job model"""
+    list_display = ('name', 'status', 'attempts', 'run_at', 'locked_by', 'created_at')
+    list_filter = ('status', 'name')
+    search_fields = ('name', 'last_error')
+    readonly_fields = ('created_at',)
@@ -0,0 +1,91 @@
+import multiprocessing
+import signal
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from jobs import worker
+from jobs.queue import claim_jobs, requeue_stale_jobs, run_job, worker_name
+
+
+class Command(BaseCommand):
+    help = (
+        'Run queued background jobs (see jobs.queue) on a pool of --processes '
+        'processes, until interrupted. SIGTERM or Ctrl-C lets running jobs finish.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=settings.JOBS_WORKER_PROCESSES,
+            help='Jobs run in parallel, each in its own process; 0 runs them in this process',
+        )
+        parser.add_argument('--burst', action='store_true', help='Exit once no job is due')
+        parser.add_argument(
+            '--poll-interval', type=float, default=settings.JOBS_POLL_INTERVAL,
+            help='Seconds between looks at the queue while it is empty',
+        )
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        self.succeeded = self.failed = 0
+        previous_handlers = {
+            signum: signal.signal(signum, self.stop) for signum in (signal.SIGINT, signal.SIGTERM)
+        }
+        try:
+            if options['processes'] > 0:
+                self.run_pool(options)
+            else:
+                self.run_inline(options)
+        finally:
+            for signum, handler in previous_handlers.items():
+                signal.signal(signum, handler)
+        self.stdout.write(self.style.SUCCESS(f'{self.succeeded} job(s) done, {self.failed} failed'))
+
+    def stop(self, signum, frame):
+        self.stopping = True
+
+    def count(self, succeeded):
+        if succeeded:
+            self.succeeded += 1
+        else:
+            self.failed += 1
+
+    def claim(self, name, limit):
+        requeue_stale_jobs()
+        jobs = claim_jobs(name, limit)
+        close_old_connections()
+        return jobs
+
+    def run_inline(self, options):
+        name = worker_name()
+        while not self.stopping:
+            jobs = self.claim(name, 1)
+            for job in jobs:
+                self.count(run_job(job))
+            if not jobs:
+                if options['burst']:
+                    return
+                time.sleep(options['poll_interval'])
+
+    def run_pool(self, options):
+        name = worker_name()
+        processes = options['processes']
+        # Spawned processes set Django up afresh instead of sharing this one's connections
+        with ProcessPoolExecutor(
+            processes, mp_context=multiprocessing.get_context('spawn'), initializer=worker.setup_process
+        ) as pool:
+            running = set()
+            while running or not self.stopping:
+                jobs = [] if self.stopping else self.claim(name, processes - len(running))
+                running.update(pool.submit(worker.run, job) for job in jobs)
+                if not running:
+                    if options['burst']:
+                        return
+                    time.sleep(options['poll_interval'])
+                    continue
+                # With free slots and nothing due, wake up for the next poll anyway
+                timeout = None if len(running) == processes else options['poll_interval']
+                done, running = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    self.count(future.result())
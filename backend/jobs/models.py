@@ -0,0 +1,43 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """
+    A deferred call of a function, run by ``manage.py runworker`` (see
+    jobs.queue). Finished jobs are deleted; failed ones are kept for inspection.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (FAILED, 'Failed'),
+    ]
+
+    # Dotted path of the function to call
+    name = models.CharField(max_length=200)
+    args = models.JSONField(default=list, encoder=DjangoJSONEncoder)
+    kwargs = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    # Queued jobs run once this time has passed (retries are pushed back)
+    run_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField()
+    # The worker running the job and since when; stale claims are requeued
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'jobs'
+        ordering = ['run_at', 'id']
+        indexes = [
+            models.Index(fields=['status', 'run_at', 'id'], name='jobs_status_run_at_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.name} ({self.status})'
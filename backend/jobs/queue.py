@@ -0,0 +1,122 @@
+"""
+Background jobs stored in the database and run by ``manage.py runworker``.
+
+``enqueue(func, args, kwargs)`` inserts a ``Job`` in the current transaction,
+so a job exists exactly when the work that asked for it is committed, and
+needs no broker. Workers claim due jobs in ``(run_at, id)`` order:
+
+- where the database has ``SELECT ... FOR UPDATE SKIP LOCKED`` (PostgreSQL),
+  a batch is locked and marked running in one transaction; concurrent workers
+  skip each other's rows instead of waiting on them;
+- elsewhere (SQLite) each candidate is claimed with an UPDATE conditional on
+  it still being queued, and a worker that loses the race moves on.
+
+A job that raises is retried with exponential backoff (``JOBS_RETRY_BACKOFF``
+seconds, doubled after each attempt) until ``max_attempts``, then kept as
+failed with its traceback. A job still running after ``JOBS_TIMEOUT`` seconds
+is assumed lost with its worker and requeued, so jobs must be safe to run
+more than once. Jobs are not wrapped in a transaction; long jobs commit
+their own batches.
+"""
+import os
+import random
+import socket
+import traceback
+from datetime import timedelta
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from .models import Job
+
+# Longest wait between two attempts, in seconds
+MAX_BACKOFF = 3600
+
+
+def job_name(func):
+    """The dotted path a worker imports ``func`` from"""
+    name = f'{func.__module__}.{func.__qualname__}'
+    try:
+        importable = import_string(name) is func
+    except ImportError:
+        importable = False
+    if not importable:
+        raise ValueError(f'{name} is not a module-level function; only those can be enqueued')
+    return name
+
+
+def enqueue(func, args=(), kwargs=None, delay=0, max_attempts=None):
+    """
+    Queue ``func(*args, **kwargs)`` to run in a worker after ``delay`` seconds;
+    the arguments are stored as JSON
+    """
+    return Job.objects.create(
+        name=job_name(func),
+        args=list(args),
+        kwargs=kwargs or {},
+        run_at=timezone.now() + timedelta(seconds=delay),
+        max_attempts=max_attempts or settings.JOBS_MAX_ATTEMPTS,
+    )
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def requeue_stale_jobs():
+    """Requeue (or fail, when out of attempts) jobs whose worker stopped reporting; returns how many"""
+    stale = Job.objects.filter(
+        status=Job.RUNNING, locked_at__lt=timezone.now() - timedelta(seconds=settings.JOBS_TIMEOUT)
+    )
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Job.FAILED, locked_by='', locked_at=None, last_error='Timed out'
+    )
+    return failed + stale.update(status=Job.QUEUED, locked_by='', locked_at=None)
+
+
+def claim_jobs(worker, limit):
+    """Mark up to ``limit`` due jobs as running for ``worker`` and return them"""
+    now = timezone.now()
+    due = Job.objects.filter(status=Job.QUEUED, run_at__lte=now).order_by('run_at', 'id')
+    claim = {'status': Job.RUNNING, 'locked_by': worker, 'locked_at': now, 'attempts': F('attempts') + 1}
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            ids = list(due.select_for_update(skip_locked=True).values_list('id', flat=True)[:limit])
+            Job.objects.filter(id__in=ids).update(**claim)
+    else:
+        # No row locks: whoever flips the status first owns the job
+        ids = [
+            job_id for job_id in due.values_list('id', flat=True)[:limit]
+            if Job.objects.filter(pk=job_id, status=Job.QUEUED).update(**claim)
+        ]
+    return list(Job.objects.filter(id__in=ids).order_by('run_at', 'id'))
+
+
+def retry_delay(attempts):
+    """Seconds before the next attempt, after ``attempts`` failed ones (with jitter)"""
+    delay = min(settings.JOBS_RETRY_BACKOFF * 2 ** (attempts - 1), MAX_BACKOFF)
+    return random.uniform(delay / 2, delay)
+
+
+def run_job(job):
+    """
+    Call a claimed job's function: delete the job when it returns, retry or
+    fail it when it raises. Returns whether it succeeded.
+    """
+    # Only touch the row if it is still this claim (not requeued as stale meanwhile)
+    claimed = Job.objects.filter(pk=job.pk, status=Job.RUNNING, locked_at=job.locked_at)
+    try:
+        import_string(job.name)(*job.args, **job.kwargs)
+    except Exception:
+        error = traceback.format_exc()
+        if job.attempts >= job.max_attempts:
+            claimed.update(status=Job.FAILED, locked_by='', locked_at=None, last_error=error)
+        else:
+            claimed.update(
+                status=Job.QUEUED, locked_by='', locked_at=None, last_error=error,
+                run_at=timezone.now() + timedelta(seconds=retry_delay(job.attempts)),
+            )
+        return False
+    claimed.delete()
+    return True
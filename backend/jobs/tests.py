@@ -0,0 +1,85 @@
+from datetime import timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from .models import Job
+from .queue import claim_jobs, enqueue, requeue_stale_jobs, run_job
+
+calls = []
+
+
+def record(value, suffix=''):
+    calls.append(f'{value}{suffix}')
+
+
+def explode():
+    raise RuntimeError('boom')
+
+
+class JobQueueTest(TestCase):
+    """Test cases for the database job queue"""
+
+    def setUp(self):
+        calls.clear()
+
+    def test_enqueue_and_run(self):
+        """Test queued jobs are claimed once, in order, and deleted when done"""
+        enqueue(record, args=['first'], kwargs={'suffix': '!'})
+        enqueue(record, args=['later'], delay=60)
+        enqueue(record, args=['second'])
+        with self.assertRaises(ValueError):
+            enqueue(lambda: None)
+
+        jobs = claim_jobs('worker-1', 10)
+        self.assertEqual([job.args for job in jobs], [['first'], ['second']])
+        self.assertEqual({(job.status, job.attempts, job.locked_by) for job in jobs}, {('running', 1, 'worker-1')})
+        self.assertEqual(claim_jobs('worker-2', 10), [])
+
+        for job in jobs:
+            self.assertTrue(run_job(job))
+        self.assertEqual(calls, ['first!', 'second'])
+        self.assertEqual(list(Job.objects.values_list('args', flat=True)), [['later']])
+
+    @override_settings(JOBS_RETRY_BACKOFF=10)
+    def test_retries_with_backoff_then_fails(self):
+        """Test a failing job is retried later, then kept as failed after its last attempt"""
+        job = enqueue(explode, max_attempts=2)
+        started = timezone.now()
+        self.assertFalse(run_job(claim_jobs('worker', 1)[0]))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('queued', 1))
+        self.assertIn('RuntimeError: boom', job.last_error)
+        self.assertTrue(started + timedelta(seconds=5) <= job.run_at <= started + timedelta(seconds=11))
+        self.assertEqual(claim_jobs('worker', 1), [])
+
+        Job.objects.update(run_at=timezone.now())
+        self.assertFalse(run_job(claim_jobs('worker', 1)[0]))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('failed', 2))
+
+    @override_settings(JOBS_TIMEOUT=60)
+    def test_stale_jobs_are_requeued(self):
+        """Test jobs of a worker that died are run again, and its late result is ignored"""
+        enqueue(record, args=['again'])
+        lost = claim_jobs('dead-worker', 1)[0]
+        Job.objects.update(locked_at=timezone.now() - timedelta(minutes=5))
+        self.assertEqual(requeue_stale_jobs(), 1)
+        retried = claim_jobs('worker', 1)[0]
+        self.assertEqual(retried.attempts, 2)
+
+        run_job(lost)
+        self.assertTrue(Job.objects.filter(pk=retried.pk, status='running').exists())
+        self.assertTrue(run_job(retried))
+        self.assertFalse(Job.objects.exists())
+
+    def test_runworker_burst(self):
+        """Test runworker runs the due jobs and exits once the queue is empty"""
+        enqueue(record, args=['one'])
+        enqueue(record, args=['two'])
+        enqueue(explode, max_attempts=1)
+        output = StringIO()
+        call_command('runworker', processes=0, burst=True, stdout=output)
+        self.assertEqual(calls, ['one', 'two'])
+        self.assertIn('2 job(s) done, 1 failed', output.getvalue())
+        self.assertEqual(list(Job.objects.values_list('status', flat=True)), ['failed'])
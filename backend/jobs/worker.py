@@ -0,0 +1,23 @@
+"""
+Entry points of runworker's pool processes. Kept free of model imports so
+that freshly spawned processes can import it before Django is set up.
+"""
+
+
+def setup_process():
+    import signal
+    import django
+
+    # Ctrl-C reaches the whole process group; runworker lets running jobs finish
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    django.setup()
+
+
+def run(job):
+    from django.db import close_old_connections
+    from .queue import run_job
+
+    try:
+        return run_job(job)
+    finally:
+        close_old_connections()
@@ -9,4 +9,4 @@ class ProjectAdmin(admin.ModelAdmin):
     list_filter = ('created_at', 'updated_at')
     search_fields = ('title', 'description', 'owner__email', 'owner__username')
     filter_horizontal = ('members',)
-    readonly_fields = ('created_at', 'updated_at')
+    readonly_fields = ('task_count', 'created_at', 'updated_at')
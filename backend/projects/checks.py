@@ -0,0 +1,34 @@
+"""
+System checks for the cache that project visibility relies on (see projects.membership).
+"""
+from django.conf import settings
+from django.core.checks import Error, Tags, Warning, register
+
+LOCMEM_CACHE = 'django.core.cache.backends.locmem.LocMemCache'
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """Membership version bumps only reach the processes that share the cache"""
+    if settings.CACHES['default']['BACKEND'] != LOCMEM_CACHE:
+        return []
+    if settings.WEB_CONCURRENCY > 1:
+        return [Error(
+            'The default cache is local to each process, but WEB_CONCURRENCY runs '
+            f'{settings.WEB_CONCURRENCY} web workers.',
+            hint='Set CACHE_BACKEND (and CACHE_LOCATION) to a shared cache such as Redis, '
+                 'or members removed in one worker keep listing the project in the others.',
+            id='projects.E001',
+        )]
+    return []
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache_deploy(app_configs, **kwargs):
+    if settings.CACHES['default']['BACKEND'] != LOCMEM_CACHE:
+        return []
+    return [Warning(
+        'The default cache is local to each process, and is not shared with runworker.',
+        hint='Set CACHE_BACKEND (and CACHE_LOCATION) to a shared cache such as Redis.',
+        id='projects.W001',
+    )]
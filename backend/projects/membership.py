@@ -0,0 +1,99 @@
+"""
+Project visibility: which projects a user owns or is a member of.
+
+``visible_project_ids()`` is what querysets use to scope access. The id set
+is cached per user under a membership version; every change that can alter
+it (a project created or deleted, members added or removed, a new user)
+bumps the affected users' versions (see ``projects.signals``), so the cache
+never has to be invalidated by scanning. The cache must be shared by all
+processes for a bump to reach them (see ``projects.checks``); the set also
+expires after ``VISIBLE_PROJECTS_CACHE_TIMEOUT`` seconds. Views read the set
+once per request through ``VisibleProjectsMixin``; async views await it with
+``avisible_project_ids()``.
+
+Permission checks on a single project (``can_see_project()``) do not use the
+cached set: they are one ``EXISTS`` query, always current.
+"""
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from .models import Project
+
+MEMBERSHIP_VERSION_KEY = 'project_membership_version:{}'
+VISIBLE_PROJECTS_KEY = 'visible_projects:{}:{}'
+
+
+def visible_projects(user):
+    """Return a queryset of the projects the user owns or is a member of, usable as a subquery"""
+    return Project.objects.filter(Q(owner=user) | Q(members=user), deleted_at__isnull=True).order_by().values('id')
+
+
+def bump_membership_version(*user_ids):
+    """Invalidate the cached visible project ids of the given users"""
+    for user_id in user_ids:
+        key = MEMBERSHIP_VERSION_KEY.format(user_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Unknown or evicted: start from a value no earlier version can have had
+            cache.set(key, time.time_ns(), None)
+
+
+def get_membership_version(user_id):
+    key = MEMBERSHIP_VERSION_KEY.format(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = time.time_ns()
+        cache.set(key, version, None)
+    return version
+
+
+async def aget_membership_version(user_id):
+    key = MEMBERSHIP_VERSION_KEY.format(user_id)
+    version = await cache.aget(key)
+    if version is None:
+        version = time.time_ns()
+        await cache.aset(key, version, None)
+    return version
+
+
+def visible_project_ids(user):
+    """Return the (cached) set of ids of the projects the user owns or is a member of"""
+    key = VISIBLE_PROJECTS_KEY.format(user.pk, get_membership_version(user.pk))
+    project_ids = cache.get(key)
+    if project_ids is None:
+        project_ids = set(visible_projects(user).values_list('id', flat=True).distinct())
+        cache.set(key, project_ids, settings.VISIBLE_PROJECTS_CACHE_TIMEOUT)
+    return project_ids
+
+
+async def avisible_project_ids(user):
+    """``visible_project_ids()`` for async views"""
+    key = VISIBLE_PROJECTS_KEY.format(user.pk, await aget_membership_version(user.pk))
+    project_ids = await cache.aget(key)
+    if project_ids is None:
+        project_ids = {
+            project_id async for project_id in visible_projects(user).values_list('id', flat=True).distinct()
+        }
+        await cache.aset(key, project_ids, settings.VISIBLE_PROJECTS_CACHE_TIMEOUT)
+    return project_ids
+
+
+def can_see_project(user, project_id):
+    """Whether the user owns or is a member of the project"""
+    return user.is_authenticated and visible_projects(user).filter(id=project_id).exists()
+
+
+class VisibleProjectsMixin:
+    """View mixin reading the user's visible project ids once per request"""
+
+    def get_visible_project_ids(self):
+        if getattr(self, '_visible_project_ids', None) is None:
+            self._visible_project_ids = visible_project_ids(self.request.user)
+        return self._visible_project_ids
+
+    async def aprepare(self, request):
+        """Load the ids before an async view builds its querysets (see task_manager.asyncviews)"""
+        await super().aprepare(request)
+        self._visible_project_ids = await avisible_project_ids(request.user)
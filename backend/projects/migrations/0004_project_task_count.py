@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0003_cursor_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="project",
+            name="task_count",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+    ]
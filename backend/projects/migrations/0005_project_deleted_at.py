@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0004_project_task_count"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="project",
+            name="deleted_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -16,12 +16,27 @@ class Project(models.Model):
         related_name='projects',
         blank=True
     )
+    # Denormalized counter, maintained by tasks.signals (repair with `recount`)
+    task_count = models.IntegerField(default=0, editable=False)
+    # Set when the project is deleted; its tasks are then purged in the background (see tasks.purge)
+    deleted_at = models.DateTimeField(blank=True, null=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = 'projects'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', 'id'], name='projects_created_id_idx'),
+        ]
 
     def __str__(self):
         return self.title
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the loaded title, which cached task statistics show (see tasks.signals)
+        if 'title' in field_names:
+            instance._loaded_title = instance.title
+        return instance
@@ -1,4 +1,5 @@
 from rest_framework import permissions
+from .membership import can_see_project
 
 
 class IsProjectOwnerOrMember(permissions.BasePermission):
@@ -9,10 +10,10 @@ class IsProjectOwnerOrMember(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         # Read permissions are allowed to owner and members
         if request.method in permissions.SAFE_METHODS:
-            return obj.owner == request.user or request.user in obj.members.all()
+            return obj.owner_id == request.user.pk or can_see_project(request.user, obj.pk)
         
         # Write permissions are only allowed to the owner
-        return obj.owner == request.user
+        return obj.owner_id == request.user.pk
 
 
 class IsProjectMember(permissions.BasePermission):
@@ -21,4 +22,4 @@ class IsProjectMember(permissions.BasePermission):
     """
 
     def has_object_permission(self, request, view, obj):
-        return obj.owner == request.user or request.user in obj.members.all()
+        return can_see_project(request.user, obj.pk)
@@ -1,13 +1,13 @@
 from rest_framework import serializers
 from .models import Project
-from users.serializers import UserSerializer
+from users.models import User
+from users.serializers import UserSerializer, UserRowSerializer
+from task_manager.fieldsets import DynamicFieldsMixin
+from task_manager.fastserializers import RowSerializer, related_ordering
 
 
-class ProjectSerializer(serializers.ModelSerializer):
+class ProjectSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for Project model"""
-    owner_detail = UserSerializer(source='owner', read_only=True)
-    members_detail = UserSerializer(source='members', many=True, read_only=True)
-    task_count = serializers.IntegerField(source='tasks.count', read_only=True)
 
     class Meta:
         model = Project
@@ -15,15 +15,40 @@ class ProjectSerializer(serializers.ModelSerializer):
             'id', 'title', 'description', 'owner', 'owner_detail',
             'members', 'members_detail', 'task_count', 'created_at', 'updated_at'
         )
-        read_only_fields = ('id', 'owner', 'created_at', 'updated_at')
+        read_only_fields = ('id', 'owner', 'task_count', 'created_at', 'updated_at')
+        expandable_fields = {
+            'owner_detail': (UserSerializer, {'source': 'owner', 'read_only': True}),
+            'members_detail': (UserSerializer, {'source': 'members', 'many': True, 'read_only': True}),
+        }
 
 
-class ProjectListSerializer(serializers.ModelSerializer):
+class ProjectListSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Lightweight serializer for project lists"""
-    owner_detail = UserSerializer(source='owner', read_only=True)
-    task_count = serializers.IntegerField(source='tasks.count', read_only=True)
 
     class Meta:
         model = Project
         fields = ('id', 'title', 'description', 'owner_detail', 'task_count', 'created_at', 'updated_at')
-        read_only_fields = ('id', 'created_at', 'updated_at')
+        read_only_fields = ('id', 'task_count', 'created_at', 'updated_at')
+        # members_detail is only rendered on ?expand=
+        expandable_fields = ProjectSerializer.Meta.expandable_fields
+
+
+class ProjectListRowSerializer(RowSerializer):
+    """Read-only fast path for ProjectListSerializer (see task_manager.fastserializers)"""
+    serializer_class = ProjectListSerializer
+    value_fields = {'id': 'id', 'title': 'title', 'description': 'description', 'task_count': 'task_count'}
+    datetime_fields = {'created_at': 'created_at', 'updated_at': 'updated_at'}
+    nested_fields = {'owner_detail': (UserRowSerializer, 'owner')}
+    many_fields = ('members_detail',)
+
+    def get_many_querysets(self, ids):
+        querysets = {}
+        if 'members_detail' in self.field_names:
+            users = UserRowSerializer(prefix='user__', context=self.context)
+            rows = (
+                Project.members.through.objects.filter(project_id__in=ids)
+                .order_by(*related_ordering(User, 'user'))
+                .values('project_id', *users.columns)
+            )
+            querysets['members_detail'] = (rows, 'project_id', users)
+        return querysets
@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.db.models.signals import m2m_changed, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from .membership import bump_membership_version
+from .models import Project
+
+
+@receiver(m2m_changed, sender=Project.members.through)
+def touch_project_on_members_change(sender, instance, action, reverse, model, pk_set, **kwargs):
+    """Members are part of a project's representation; keep its updated_at (ETag validator) current"""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        Project.objects.filter(pk=instance.pk).update(updated_at=timezone.now())
+    elif pk_set:
+        Project.objects.filter(pk__in=pk_set).update(updated_at=timezone.now())
+
+
+@receiver(m2m_changed, sender=Project.members.through)
+def invalidate_membership_on_members_change(sender, instance, action, reverse, model, pk_set, **kwargs):
+    if action == 'pre_clear' and not reverse:
+        # The removed members are unknown after the clear
+        bump_membership_version(*instance.members.values_list('id', flat=True))
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        if reverse:
+            bump_membership_version(instance.pk)
+        elif pk_set:
+            bump_membership_version(*pk_set)
+
+
+@receiver(post_save, sender=Project)
+def invalidate_membership_on_project_create(sender, instance, created, **kwargs):
+    if created:
+        bump_membership_version(instance.owner_id)
+
+
+@receiver(pre_delete, sender=Project)
+def invalidate_membership_on_project_delete(sender, instance, **kwargs):
+    # Before the delete, while the member rows still exist
+    bump_membership_version(instance.owner_id, *instance.members.values_list('id', flat=True))
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_membership_on_user_create(sender, instance, created, **kwargs):
+    # Guards against a reused primary key picking up a deleted user's cached projects
+    if created:
+        bump_membership_version(instance.pk)
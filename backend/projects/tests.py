@@ -1,7 +1,12 @@
-from django.test import TestCase
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
 from rest_framework.test import APIClient
 from rest_framework import status
+from .checks import check_shared_cache
+from .membership import can_see_project
 from .models import Project
 
 User = get_user_model()
@@ -76,6 +81,24 @@ class ProjectAPITest(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data['results']), 2)
 
+    def test_project_list_cursor_pagination(self):
+        """Test listing projects with opt-in cursor pagination"""
+        for i in range(3):
+            Project.objects.create(title=f'Project {i}', owner=self.user)
+        response = self.client.get('/api/projects/?pagination=cursor')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('count', response.data)
+        self.assertEqual(
+            [project['title'] for project in response.data['results']],
+            ['Project 2', 'Project 1', 'Project 0']
+        )
+
+    def test_project_sparse_fields_and_expand(self):
+        """Test ?fields= and ?expand= on the project list"""
+        Project.objects.create(title='Project', owner=self.user)
+        response = self.client.get('/api/projects/?fields=id,title&expand=members_detail')
+        self.assertEqual(set(response.data['results'][0]), {'id', 'title', 'members_detail'})
+
     def test_project_retrieve(self):
         """Test retrieving a project"""
         project = Project.objects.create(
@@ -86,6 +109,23 @@ class ProjectAPITest(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['title'], 'Test Project')
 
+    def test_project_conditional_get(self):
+        """Test project ETags change with task counts and members"""
+        project = Project.objects.create(title='Test Project', owner=self.user)
+        url = f'/api/projects/{project.id}/'
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        list_etag = self.client.get('/api/projects/')['ETag']
+        Project.objects.filter(pk=project.pk).update(task_count=1)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+        self.assertNotEqual(self.client.get('/api/projects/')['ETag'], list_etag)
+
+        etag = self.client.get(url)['ETag']
+        project.members.add(User.objects.create_user(email='m@example.com', username='m', password='testpass123'))
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
     def test_project_update(self):
         """Test updating a project"""
         project = Project.objects.create(
@@ -104,8 +144,12 @@ class ProjectAPITest(TestCase):
             title='Test Project',
             owner=self.user
         )
-        response = self.client.delete(f'/api/projects/{project.id}/')
-        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(f'/api/projects/{project.id}/')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(self.client.get(f'/api/projects/{project.id}/').status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get('/api/projects/').data['count'], 0)
+        call_command('runworker', processes=0, burst=True, stdout=StringIO())
         self.assertEqual(Project.objects.count(), 0)
 
     def test_project_access_denied_for_non_member(self):
@@ -121,3 +165,51 @@ class ProjectAPITest(TestCase):
         )
         response = self.client.get(f'/api/projects/{project.id}/')
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_membership_changes_apply_immediately(self):
+        """Test cached project visibility follows add_member/remove_member"""
+        other_user = User.objects.create_user(
+            email='other@example.com',
+            username='otheruser',
+            password='testpass123'
+        )
+        project = Project.objects.create(title='Shared Project', owner=other_user)
+        url = f'/api/projects/{project.id}/'
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+
+        owner_client = APIClient()
+        owner_client.force_authenticate(user=other_user)
+        owner_client.post(f'{url}add_member/', {'user_id': self.user.id})
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+        with self.assertNumQueries(4):
+            # Validator, project, members and the permission check; the validator's visible ids are cached
+            self.client.get(url)
+
+        owner_client.post(f'{url}remove_member/', {'user_id': self.user.id})
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+
+
+class MembershipCacheTest(TestCase):
+    """Test cases for the cache project visibility relies on"""
+
+    def test_local_cache_with_several_workers_fails_the_check(self):
+        """Test a per-process cache is an error once there is more than one web worker"""
+        self.assertEqual(check_shared_cache(None), [])
+        with override_settings(WEB_CONCURRENCY=3):
+            self.assertEqual([error.id for error in check_shared_cache(None)], ['projects.E001'])
+        redis = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://'}}
+        with override_settings(WEB_CONCURRENCY=3, CACHES=redis):
+            self.assertEqual(check_shared_cache(None), [])
+
+    def test_permission_check_ignores_stale_cache(self):
+        """Test a member removed behind another process's cache loses access at once"""
+        owner = User.objects.create_user(email='owner@example.com', username='owner', password='testpass123')
+        member = User.objects.create_user(email='member@example.com', username='member', password='testpass123')
+        project = Project.objects.create(title='Test Project', owner=owner)
+        project.members.add(member)
+        self.assertTrue(can_see_project(member, project.id))
+        # What another process does: its membership version bump never reaches this cache
+        with mock.patch('projects.signals.bump_membership_version'):
+            project.members.remove(member)
+        with self.assertNumQueries(1):
+            self.assertFalse(can_see_project(member, project.id))
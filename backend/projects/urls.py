@@ -1,5 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from task_manager.asyncviews import async_read_view
 from .views import ProjectViewSet
 
 app_name = 'projects'
@@ -10,3 +11,10 @@ router.register(r'', ProjectViewSet, basename='project')
 urlpatterns = [
     path('', include(router.urls)),
 ]
+
+# The router's list route as an async view (ASYNC_READ_VIEWS)
+async_urlpatterns = [
+    path('', async_read_view(
+        ProjectViewSet, {'get': 'list', 'post': 'create'}, basename='project', detail=False
+    )),
+]
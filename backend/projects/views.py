@@ -2,13 +2,26 @@ from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db import models
+from django.db.models import Sum
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+from .membership import can_see_project, VisibleProjectsMixin
 from .models import Project
-from .serializers import ProjectSerializer, ProjectListSerializer
+from .serializers import ProjectSerializer, ProjectListSerializer, ProjectListRowSerializer
 from .permissions import IsProjectOwnerOrMember
+from task_manager.asyncviews import AsyncReadMixin
+from task_manager.conditional import ConditionalGetMixin
+from task_manager.fieldsets import SparseFieldsetsMixin
+from task_manager.fastserializers import FastListMixin
+from task_manager.negotiation import IgnoreClientContentNegotiation
+from task_manager.pagination import KeysetPagination
+from task_manager.streaming import streaming_response
 
 
-class ProjectViewSet(viewsets.ModelViewSet):
+class ProjectViewSet(
+    VisibleProjectsMixin, AsyncReadMixin, ConditionalGetMixin, FastListMixin, SparseFieldsetsMixin,
+    viewsets.ModelViewSet
+):
     """
     ViewSet for managing projects.
     
@@ -17,30 +30,48 @@ class ProjectViewSet(viewsets.ModelViewSet):
     create: Create a new project
     update: Update project (owner only)
     partial_update: Partially update project (owner only)
-    destroy: Delete project (owner only)
+    destroy: Delete project (owner only); its tasks are purged in the background
+    deletion: Progress of the purge of a deleted project (owner only)
     add_member: Add a member to the project (owner only)
     remove_member: Remove a member from the project (owner only)
+    board: Get the project's tasks grouped into status columns
+    export: Stream all of the project's tasks as CSV or NDJSON
+    import_tasks: Import tasks from a CSV or NDJSON file
+    activity: Paginated activity log of the project, newest first
     """
     queryset = Project.objects.all()
     permission_classes = [IsAuthenticated, IsProjectOwnerOrMember]
+    pagination_class = KeysetPagination
+    row_serializer_class = ProjectListRowSerializer
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['title', 'description']
     ordering_fields = ['created_at', 'updated_at', 'title']
-    ordering = ['-created_at']
+    ordering = ['-created_at', 'id']
+    async_actions = ('list',)
+    detail_validator_fields = ('updated_at', 'task_count')
+    list_validator_aggregates = {
+        **ConditionalGetMixin.list_validator_aggregates,
+        'task_count': Sum('task_count'),
+    }
 
     def get_serializer_class(self):
         if self.action == 'list':
             return ProjectListSerializer
+        if self.action == 'activity':
+            from tasks.serializers import ActivitySerializer
+            return ActivitySerializer
         return ProjectSerializer
 
     def get_queryset(self):
         """
         Return projects where user is owner or member
         """
-        user = self.request.user
-        return Project.objects.filter(
-            models.Q(owner=user) | models.Q(members=user)
-        ).distinct()
+        queryset = Project.objects.filter(id__in=self.get_visible_project_ids())
+        if self.wants_field('owner_detail'):
+            queryset = queryset.select_related('owner')
+        if self.wants_field('members_detail'):
+            queryset = queryset.prefetch_related('members')
+        return queryset
 
     def perform_create(self, serializer):
         """
@@ -48,6 +79,123 @@ class ProjectViewSet(viewsets.ModelViewSet):
         """
         serializer.save(owner=self.request.user)
 
+    def destroy(self, request, *args, **kwargs):
+        """
+        Mark the project deleted and purge its tasks in background batches
+        (see tasks.purge); answers 202 with the purge progress
+        """
+        from tasks.purge import delete_project, purge_progress
+
+        project = self.get_object()
+        delete_project(project)
+        return Response(purge_progress(project), status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=True, methods=['get'])
+    def deletion(self, request, pk=None):
+        """
+        Progress of the background purge of a project the user deleted; 404 once it is done
+        """
+        from tasks.purge import purge_progress
+
+        if not pk.isdigit():
+            raise Http404
+        project = get_object_or_404(Project, pk=pk, owner=request.user, deleted_at__isnull=False)
+        return Response(purge_progress(project))
+
+    @action(detail=True, methods=['get'])
+    def board(self, request, pk=None):
+        """
+        Kanban board: every status column with its task count and first ?limit= tasks,
+        loaded in a single query (tasks accept ?fields= and ?expand= like the task list)
+        """
+        from tasks.board import load_board, DEFAULT_COLUMN_LIMIT, MAX_COLUMN_LIMIT
+
+        # One EXISTS query, then the board query is the only one for the project
+        if not pk.isdigit() or not can_see_project(request.user, int(pk)):
+            raise Http404
+        try:
+            limit = int(request.query_params.get('limit', DEFAULT_COLUMN_LIMIT))
+        except ValueError:
+            return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        limit = min(max(limit, 1), MAX_COLUMN_LIMIT)
+        columns = load_board(
+            int(pk), limit, context=self.get_serializer_context(), **self.get_fieldset_kwargs()
+        )
+        return Response({'project': int(pk), 'limit': limit, 'columns': columns})
+
+    @action(detail=True, methods=['get'], content_negotiation_class=IgnoreClientContentNegotiation)
+    def export(self, request, pk=None):
+        """
+        Every task of the project in one streamed response, ?format=csv (default)
+        or ?format=ndjson, read in chunks with constant memory (see tasks.export)
+        """
+        from tasks.export import EXPORT_FORMATS, stream_export
+
+        if not pk.isdigit() or not can_see_project(request.user, int(pk)):
+            raise Http404
+        export_format = request.query_params.get('format', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            return Response(
+                {'error': f"format must be one of {', '.join(EXPORT_FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        response = streaming_response(
+            request._request, stream_export(int(pk), export_format), content_type=EXPORT_FORMATS[export_format]
+        )
+        response['Content-Disposition'] = f'attachment; filename="project-{pk}-tasks.{export_format}"'
+        return response
+
+    @action(
+        detail=True, methods=['post'], url_path='import',
+        content_negotiation_class=IgnoreClientContentNegotiation
+    )
+    def import_tasks(self, request, pk=None):
+        """
+        Import tasks from the CSV or NDJSON request body (?format=, or from the
+        Content-Type), read and written in chunks; invalid rows are skipped and
+        reported by line (see tasks.imports)
+        """
+        from tasks import imports
+
+        if not pk.isdigit() or not can_see_project(request.user, int(pk)):
+            raise Http404
+        import_format = request.query_params.get('format') or next(
+            (name for name, content_type in imports.IMPORT_FORMATS.items()
+             if request.content_type.startswith(content_type)),
+            'csv'
+        )
+        if request.stream is None:
+            return Response({'error': 'The request body is empty'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            result = imports.import_tasks(request.user, int(pk), request.stream, import_format)
+        except imports.ImportFormatError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result.as_dict())
+
+    # No OrderingFilter: cursor pages must always seek on the fixed ordering
+    @action(detail=True, methods=['get'], filter_backends=[], ordering=('-created_at', 'id'))
+    def activity(self, request, pk=None):
+        """
+        Who changed what in the project, newest first and paginated like the
+        lists (?pagination=cursor for deep pages); ?task= narrows it to one task.
+        ?ordering is ignored.
+        """
+        from tasks.models import Activity
+
+        if not pk.isdigit() or not can_see_project(request.user, int(pk)):
+            raise Http404
+        queryset = Activity.objects.filter(project_id=int(pk))
+        task = request.query_params.get('task')
+        if task:
+            if not task.isdigit():
+                return Response({'error': 'task must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+            queryset = queryset.filter(task_id=int(task))
+        if self.wants_field('actor_detail'):
+            queryset = queryset.select_related('actor')
+        page = self.paginate_queryset(queryset.order_by(*self.ordering))
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
     @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
     def add_member(self, request, pk=None):
         """
@@ -0,0 +1,227 @@
+"""
+Native async read endpoints for ASGI deployments (``ASYNC_READ_VIEWS``).
+
+Under sync workers every request holds a whole worker until it is done. With
+``ASYNC_READ_VIEWS`` on, the URLs of the hot reads (task list and detail,
+comment list, project list) are served by ``async_read_view()`` instead: the
+JWT user, the visible project ids, the ETag validator, the page ``COUNT`` and
+the rows with their prefetches are awaited (``aget``, ``aaggregate``,
+``acount``, ``aiterator``), so a request waiting on the database only holds
+its coroutine.
+
+The async handlers (``alist``/``aretrieve`` of ``AsyncReadMixin``) build their
+querysets with the viewset's own ``get_queryset()``, filters, fetch plan and
+serializers, so their responses are identical to the sync ones. Everything
+else on those URLs (writes, cursor pages, error paths) is handed to the
+regular viewset, which Django runs in a thread like any sync view.
+"""
+from datetime import datetime
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.core.handlers.asgi import ASGIRequest
+from django.core.paginator import InvalidPage
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import AuthenticationFailed, NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+class AsyncJWTAuthentication(JWTAuthentication):
+    """``JWTAuthentication`` with the user lookup awaited"""
+
+    async def aauthenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        """``get_user()``, awaiting the query"""
+        try:
+            user_id = validated_token[jwt_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken('Token contained no recognizable user identification') from e
+
+        try:
+            user = await self.user_model.objects.aget(**{jwt_settings.USER_ID_FIELD: user_id})
+        except self.user_model.DoesNotExist as e:
+            raise AuthenticationFailed('User not found', code='user_not_found') from e
+
+        if jwt_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+        if jwt_settings.CHECK_REVOKE_TOKEN and (
+            validated_token.get(jwt_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password)
+        ):
+            raise AuthenticationFailed("The user's password has been changed.", code='password_changed')
+        return user
+
+
+class AsyncReadMixin:
+    """
+    Viewset mixin adding async handlers for the ``async_actions`` (``list`` and
+    ``retrieve``).
+
+    Needs ``ConditionalGetMixin``, and ``FastListMixin`` for the row fast
+    path. ``aretrieve`` relies on ``get_conditional_queryset()`` only holding
+    objects the user may read, which is then all its object permissions check.
+    """
+    async_actions = ('list', 'retrieve')
+
+    def supports_async(self):
+        """Whether the request can be served without falling back to the sync handler"""
+        authenticators = self.get_authenticators()
+        return (
+            self.action in self.async_actions
+            and self.request.method == 'GET'
+            and all(isinstance(authenticator, JWTAuthentication) for authenticator in authenticators)
+        )
+
+    async def adispatch(self, request, *args, **kwargs):
+        """``dispatch()`` with async authentication and handlers"""
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+        try:
+            await self.aauthenticate(request)
+            # The user is set, so this only negotiates and checks permissions
+            self.initial(request, *args, **kwargs)
+            await self.aprepare(request)
+            response = await getattr(self, f'a{self.action}')(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def aauthenticate(self, request):
+        try:
+            result = await AsyncJWTAuthentication().aauthenticate(request)
+        except AuthenticationFailed:
+            request.user, request.auth = AnonymousUser(), None
+            raise
+        request.user, request.auth = result or (AnonymousUser(), None)
+
+    async def aprepare(self, request):
+        """Await whatever ``get_queryset()`` would otherwise load synchronously"""
+
+    def uses_async_page(self, request):
+        """Cursor pages (and unpaginated lists) are left to the sync handler"""
+        paginator = self.paginator
+        return (
+            isinstance(paginator, PageNumberPagination)
+            and paginator.get_page_size(request)
+            and not getattr(paginator, 'use_cursor', lambda request: False)(request)
+        )
+
+    async def apaginate_queryset(self, queryset):
+        """``PageNumberPagination.paginate_queryset()`` with the COUNT and the page awaited"""
+        paginator = self.paginator
+        request = self.request
+        page_size = paginator.get_page_size(request)
+        django_paginator = paginator.django_paginator_class(queryset, page_size)
+        django_paginator.count = await queryset.acount()
+        page_number = paginator.get_page_number(request, django_paginator)
+        try:
+            page = django_paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(paginator.invalid_page_message.format(page_number=page_number, message=str(exc)))
+        # aiterator() runs the prefetches of each chunk with aprefetch_related_objects()
+        page.object_list = [item async for item in page.object_list.aiterator()]
+        if page.paginator.num_pages > 1 and paginator.template is not None:
+            paginator.display_page_controls = True
+        paginator.page = page
+        paginator.request = request
+        return list(page)
+
+    async def aconditional_response(self, request, validator, last_modified, respond):
+        etag, last_modified, not_modified = self.evaluate_preconditions(request, validator, last_modified)
+        if not_modified is not None:
+            return not_modified
+        return self.set_validators(await respond(), etag, last_modified)
+
+    async def alist(self, request, *args, **kwargs):
+        if not self.uses_async_page(request):
+            return await sync_to_async(self.list)(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        validator = await queryset.prefetch_related(None).order_by().aaggregate(**self.list_validator_aggregates)
+        return await self.aconditional_response(
+            request, sorted(validator.items()), None, lambda: self.alist_response(queryset)
+        )
+
+    async def alist_response(self, queryset):
+        row_serializer = self.get_row_serializer() if hasattr(self, 'get_row_serializer') else None
+        if row_serializer is None:
+            page = await self.apaginate_queryset(queryset)
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
+        page = await self.apaginate_queryset(self.get_row_queryset(queryset, row_serializer))
+        return self.get_paginated_response(await row_serializer.aserialize(page))
+
+    async def aretrieve(self, request, *args, **kwargs):
+        lookup = {self.lookup_field: kwargs[self.lookup_url_kwarg or self.lookup_field]}
+        row = await (
+            self.get_conditional_queryset()
+            .prefetch_related(None)
+            .filter(**lookup)
+            .values_list(*self.detail_validator_fields)
+            .afirst()
+        )
+        if row is None:
+            # Let the regular path raise the right 404 or 403
+            return await sync_to_async(self.retrieve)(request, *args, **kwargs)
+        last_modified = max((value for value in row if isinstance(value, datetime)), default=None)
+        return await self.aconditional_response(
+            request, row, last_modified, lambda: self.aretrieve_response(request, lookup, *args, **kwargs)
+        )
+
+    async def aretrieve_response(self, request, lookup, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset()).filter(**lookup)
+        instances = [instance async for instance in queryset.aiterator()]
+        if not instances:
+            return await sync_to_async(self.retrieve)(request, *args, **kwargs)
+        return Response(self.get_serializer(instances[0]).data)
+
+
+def async_read_view(viewset_class, actions, **initkwargs):
+    """
+    Async view for one route of ``viewset_class`` (like ``as_view(actions)``):
+    GETs of its ``async_actions`` are served natively under ASGI, all other
+    requests by the viewset's regular view
+    """
+    sync_view = viewset_class.as_view(actions, **initkwargs)
+    sync_handler = sync_to_async(sync_view)
+
+    @csrf_exempt
+    async def view(request, *args, **kwargs):
+        if not isinstance(request, ASGIRequest):
+            return await sync_handler(request, *args, **kwargs)
+        viewset = viewset_class(**initkwargs)
+        viewset.action_map = actions
+        viewset.action = actions.get(request.method.lower())
+        viewset.request = request
+        if not viewset.supports_async():
+            return await sync_handler(request, *args, **kwargs)
+        return await viewset.adispatch(request, *args, **kwargs)
+
+    return view
+
+
+def read_urlconf(use_async):
+    """
+    The project URLconf with the hot reads served by the async views or by the
+    viewsets, whatever ``ASYNC_READ_VIEWS`` says; for comparing the two
+    """
+    from . import urls
+
+    urlpatterns = [pattern for pattern in urls.urlpatterns if pattern not in urls.async_read_urlpatterns]
+    if use_async:
+        urlpatterns = urls.async_read_urlpatterns + urlpatterns
+    return type('ReadURLConf', (), {'urlpatterns': urlpatterns})
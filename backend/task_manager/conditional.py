@@ -0,0 +1,93 @@
+"""
+Conditional GET (ETag / Last-Modified) for viewsets.
+
+Before doing any real work, ``retrieve()`` and ``list()`` compute a validator
+with one cheap query: the ``detail_validator_fields`` of the object (e.g. its
+``updated_at``), or the ``list_validator_aggregates`` of the filtered
+collection (count, newest ``updated_at``, id sum; skipped for cursor pages,
+which must not scan the whole collection). The strong ETag is a hash of
+that validator, the user and the query string. A matching ``If-None-Match``
+(or, for objects, ``If-Modified-Since``) gets a ``304`` without loading or
+serializing anything.
+
+Related data embedded in a representation must touch the parent's
+``updated_at`` when it changes (see ``tasks.signals``), or be part of the
+validator, for the ETag to change with it.
+"""
+import hashlib
+from datetime import datetime
+from django.db.models import Count, Max, Sum
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+class ConditionalGetMixin:
+    """View mixin answering conditional GETs from a cheap validator query"""
+    detail_validator_fields = ('updated_at',)
+    list_validator_aggregates = {
+        'count': Count('id'),
+        'updated_at': Max('updated_at'),
+        'ids': Sum('id'),
+    }
+
+    def get_conditional_queryset(self):
+        """Queryset the detail validator is read from; must only contain visible objects"""
+        return self.get_queryset()
+
+    def make_etag(self, validator):
+        source = repr((self.request.user.pk, self.request.get_full_path(), validator))
+        return quote_etag(hashlib.sha1(source.encode()).hexdigest())
+
+    def evaluate_preconditions(self, request, validator, last_modified):
+        """Return the ETag, the Last-Modified timestamp and the 304 response, if any"""
+        etag = self.make_etag(validator)
+        last_modified = int(last_modified.timestamp()) if last_modified else None
+        not_modified = get_conditional_response(request._request, etag=etag, last_modified=last_modified)
+        return etag, last_modified, not_modified
+
+    def set_validators(self, response, etag, last_modified):
+        if response.status_code == 200:
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def conditional_response(self, request, validator, last_modified, respond):
+        etag, last_modified, not_modified = self.evaluate_preconditions(request, validator, last_modified)
+        if not_modified is not None:
+            return not_modified
+        return self.set_validators(respond(), etag, last_modified)
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        row = (
+            self.get_conditional_queryset()
+            .prefetch_related(None)
+            .filter(**{self.lookup_field: kwargs[lookup_url_kwarg]})
+            .values_list(*self.detail_validator_fields)
+            .first()
+        )
+        if row is None:
+            # Let the regular path raise the right 404 or 403
+            return super().retrieve(request, *args, **kwargs)
+        last_modified = max((value for value in row if isinstance(value, datetime)), default=None)
+        return self.conditional_response(
+            request, row, last_modified, lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs)
+        )
+
+    def list(self, request, *args, **kwargs):
+        paginator = self.paginator
+        if paginator is not None and getattr(paginator, 'use_cursor', lambda request: False)(request):
+            # The validator scans the whole collection, which cursor pages avoid
+            return super().list(request, *args, **kwargs)
+        validator = (
+            self.filter_queryset(self.get_queryset())
+            .prefetch_related(None)
+            .order_by()
+            .aggregate(**self.list_validator_aggregates)
+        )
+        # Deletions do not move the newest updated_at, so lists only get an ETag
+        return self.conditional_response(
+            request, sorted(validator.items()), None,
+            lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs)
+        )
@@ -0,0 +1,203 @@
+"""
+Read-only fast path for list endpoints.
+
+A ``RowSerializer`` mirrors a DRF serializer (``serializer_class``) but renders
+plain ``.values()`` rows: the columns it needs are fetched in one query, to-many
+relations are loaded for the whole page with one query each and grouped by
+parent id, and every output dict is built by a precomputed list of readers.
+The output is identical to the DRF serializer's, without field binding,
+per-field ``get_attribute`` dispatch or nested serializer instances.
+
+``FastListMixin`` serves a view's ``list()`` through ``row_serializer_class``
+whenever it supports the requested ``?fields=``/``?expand=`` selection and
+``FAST_LIST_SERIALIZATION`` is on; otherwise the regular serializer is used.
+"""
+from django.conf import settings
+from rest_framework import serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+# Shared field used to render datetimes exactly like the DRF serializers do
+datetime_field = serializers.DateTimeField(read_only=True)
+
+
+def render_datetime(value):
+    return None if value is None else datetime_field.to_representation(value)
+
+
+class RowSerializer:
+    """
+    Base class for row serializers.
+
+    Subclasses set ``serializer_class`` and describe its fields:
+
+    - ``value_fields``: field name -> column, copied as is
+    - ``datetime_fields``: field name -> column, rendered like ``DateTimeField``
+    - ``file_fields``: field name -> (column, storage), rendered like ``FileField``
+    - ``computed_fields``: field name -> (column, method name), rendered by the
+      method from the column's value, like a ``SerializerMethodField``
+    - ``nested_fields``: field name -> (row serializer class, relation), a
+      to-one relation read from the same row
+    - ``many_fields``: field names loaded for the whole page, one query each
+      from ``get_many_querysets()``
+    """
+    serializer_class = None
+    value_fields = {}
+    datetime_fields = {}
+    file_fields = {}
+    computed_fields = {}
+    nested_fields = {}
+    many_fields = ()
+
+    def __init__(self, fields=None, expand=None, prefix='', context=None):
+        self.field_names = self.serializer_class.get_selected_field_names(fields, expand)
+        self.prefix = prefix
+        self.context = context or {}
+        self.nested = {
+            name: row_class(prefix=f'{prefix}{relation}__', context=self.context)
+            for name, (row_class, relation) in self.nested_fields.items()
+            if name in self.field_names
+        }
+        self.readers = [(name, self.get_reader(name)) for name in self.field_names]
+
+    @classmethod
+    def supports(cls, fields=None, expand=None):
+        """Whether every field of the selection can be rendered from rows"""
+        known = (
+            set(cls.value_fields) | set(cls.datetime_fields) | set(cls.file_fields)
+            | set(cls.computed_fields) | set(cls.nested_fields) | set(cls.many_fields)
+        )
+        return set(cls.serializer_class.get_selected_field_names(fields, expand)) <= known
+
+    @property
+    def columns(self):
+        """The ``.values()`` lookups needed to render the selected fields"""
+        columns = [f'{self.prefix}id']
+        for name in self.field_names:
+            if name in self.value_fields:
+                columns.append(self.prefix + self.value_fields[name])
+            elif name in self.datetime_fields:
+                columns.append(self.prefix + self.datetime_fields[name])
+            elif name in self.file_fields:
+                columns.append(self.prefix + self.file_fields[name][0])
+            elif name in self.computed_fields:
+                columns.append(self.prefix + self.computed_fields[name][0])
+            elif name in self.nested:
+                columns.extend(self.nested[name].columns)
+        return list(dict.fromkeys(columns))
+
+    def get_reader(self, name):
+        prefix = self.prefix
+        if name in self.value_fields:
+            column = prefix + self.value_fields[name]
+            return lambda row, related: row[column]
+        if name in self.datetime_fields:
+            column = prefix + self.datetime_fields[name]
+            return lambda row, related: render_datetime(row[column])
+        if name in self.file_fields:
+            column, storage = self.file_fields[name]
+            return lambda row, related: self.render_file(row[prefix + column], storage)
+        if name in self.computed_fields:
+            column, method_name = self.computed_fields[name]
+            method = getattr(self, method_name)
+            return lambda row, related: method(row[prefix + column])
+        if name in self.nested:
+            nested = self.nested[name]
+            nested_id = nested.prefix + 'id'
+            return lambda row, related: None if row[nested_id] is None else nested.to_representation(row, {})
+        id_column = prefix + 'id'
+        return lambda row, related: related[name].get(row[id_column], [])
+
+    def render_file(self, name, storage):
+        if not name:
+            return None
+        if not api_settings.UPLOADED_FILES_USE_URL:
+            return name
+        url = storage.url(name)
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request is not None else url
+
+    def get_many_querysets(self, ids):
+        """
+        Return {field name: (queryset, parent id column, row serializer)} for
+        the selected many fields of the parents ``ids``
+        """
+        return {}
+
+    def load_many(self, ids):
+        """Return {field name: {parent id: [rendered items]}} for the selected many fields"""
+        return {
+            name: group_rows(rows, key, row_serializer)
+            for name, (rows, key, row_serializer) in self.get_many_querysets(ids).items()
+        }
+
+    async def aload_many(self, ids):
+        """``load_many()`` for async views"""
+        return {
+            name: group_rows([row async for row in rows.aiterator()], key, row_serializer)
+            for name, (rows, key, row_serializer) in self.get_many_querysets(ids).items()
+        }
+
+    def to_representation(self, row, related):
+        return {name: reader(row, related) for name, reader in self.readers}
+
+    def serialize(self, rows):
+        ids = [row[self.prefix + 'id'] for row in rows]
+        related = self.load_many(ids) if ids else {name: {} for name in self.many_fields}
+        return [self.to_representation(row, related) for row in rows]
+
+    async def aserialize(self, rows):
+        """``serialize()`` for async views"""
+        ids = [row[self.prefix + 'id'] for row in rows]
+        related = await self.aload_many(ids) if ids else {name: {} for name in self.many_fields}
+        return [self.to_representation(row, related) for row in rows]
+
+
+def related_ordering(model, relation):
+    """``model``'s default ordering seen through ``relation``, matching prefetch order"""
+    return [
+        f'-{relation}__{name[1:]}' if name.startswith('-') else f'{relation}__{name}'
+        for name in model._meta.ordering
+    ]
+
+
+def group_rows(rows, key, row_serializer):
+    """Group ``rows`` by ``key`` and render each with ``row_serializer``"""
+    grouped = {}
+    for row in rows:
+        grouped.setdefault(row[key], []).append(row_serializer.to_representation(row, {}))
+    return grouped
+
+
+class FastListMixin:
+    """View mixin serving ``list()`` through ``row_serializer_class`` when possible"""
+    row_serializer_class = None
+
+    def get_row_serializer(self):
+        if not settings.FAST_LIST_SERIALIZATION or self.row_serializer_class is None:
+            return None
+        fieldset_kwargs = self.get_fieldset_kwargs()
+        if not self.row_serializer_class.supports(**fieldset_kwargs):
+            return None
+        return self.row_serializer_class(context=self.get_serializer_context(), **fieldset_kwargs)
+
+    def get_row_queryset(self, queryset, row_serializer):
+        """``queryset`` as the ``.values()`` rows ``row_serializer`` renders"""
+        # Cursor pagination reads the ordering column from each row
+        ordering_columns = [
+            name.lstrip('-') for name in list(getattr(self, 'ordering_fields', None) or [])
+            + list(getattr(self, 'ordering', None) or [])
+        ]
+        columns = list(dict.fromkeys(row_serializer.columns + ordering_columns))
+        return queryset.prefetch_related(None).values(*columns)
+
+    def list(self, request, *args, **kwargs):
+        row_serializer = self.get_row_serializer()
+        if row_serializer is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.get_row_queryset(self.filter_queryset(self.get_queryset()), row_serializer)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(row_serializer.serialize(page))
+        return Response(row_serializer.serialize(list(queryset)))
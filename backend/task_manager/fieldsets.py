@@ -0,0 +1,87 @@
+"""
+Sparse fieldsets (``?fields=``) and opt-in expansion (``?expand=``).
+
+Serializers using ``DynamicFieldsMixin`` list their nested serializers in
+``Meta.expandable_fields`` instead of declaring them, as
+``name: (serializer_class, kwargs)``. A nested serializer is only instantiated
+when its name is part of the response: either it is in ``Meta.fields`` (the
+default output) and not filtered out by ``?fields=``, or it is requested with
+``?expand=``. Views using ``SparseFieldsetsMixin`` pass the query parameters to
+the serializer and can ask ``wants_field()`` before adding a prefetch.
+"""
+
+
+def parse_field_list(value):
+    return [name.strip() for name in value.split(',') if name.strip()] if value else []
+
+
+class DynamicFieldsMixin:
+    """ModelSerializer mixin that renders only the selected fields"""
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        self.selected_fields = fields
+        self.expanded_fields = expand
+        super().__init__(*args, **kwargs)
+
+    @classmethod
+    def get_selected_field_names(cls, fields=None, expand=None):
+        """Names of the fields rendered for the given ``fields``/``expand`` selection"""
+        expandable = getattr(cls.Meta, 'expandable_fields', {})
+        names = [name for name in cls.Meta.fields if not fields or name in fields]
+        names += [
+            name for name in expandable
+            if name not in names and (name in (expand or ()) or name in (fields or ()))
+        ]
+        return names
+
+    def get_field_names(self, declared_fields, info):
+        expandable = getattr(self.Meta, 'expandable_fields', {})
+        return [
+            name for name in self.get_selected_field_names(self.selected_fields, self.expanded_fields)
+            if name not in expandable
+        ]
+
+    def get_fields(self):
+        expandable = getattr(self.Meta, 'expandable_fields', {})
+        fields = super().get_fields()
+        selected = {}
+        for name in self.get_selected_field_names(self.selected_fields, self.expanded_fields):
+            if name in expandable:
+                serializer_class, kwargs = expandable[name]
+                selected[name] = serializer_class(**kwargs)
+            else:
+                selected[name] = fields[name]
+        return selected
+
+
+class SparseFieldsetsMixin:
+    """View mixin passing ``?fields=`` and ``?expand=`` to the serializer on reads"""
+    fields_query_param = 'fields'
+    expand_query_param = 'expand'
+
+    def get_fieldset_kwargs(self):
+        request = getattr(self, 'request', None)
+        if request is None or request.method not in ('GET', 'HEAD'):
+            return {}
+        kwargs = {}
+        fields = parse_field_list(request.query_params.get(self.fields_query_param))
+        expand = parse_field_list(request.query_params.get(self.expand_query_param))
+        if fields:
+            kwargs['fields'] = fields
+        if expand:
+            kwargs['expand'] = expand
+        return kwargs
+
+    def wants_field(self, name):
+        """Whether the response will render the named serializer field"""
+        serializer_class = self.get_serializer_class()
+        if not hasattr(serializer_class, 'get_selected_field_names'):
+            return name in getattr(serializer_class.Meta, 'fields', ())
+        return name in serializer_class.get_selected_field_names(**self.get_fieldset_kwargs())
+
+    def get_serializer(self, *args, **kwargs):
+        serializer_class = self.get_serializer_class()
+        if hasattr(serializer_class, 'get_selected_field_names'):
+            kwargs = {**self.get_fieldset_kwargs(), **kwargs}
+        kwargs.setdefault('context', self.get_serializer_context())
+        return serializer_class(*args, **kwargs)
@@ -0,0 +1,14 @@
+from rest_framework.negotiation import BaseContentNegotiation
+
+
+class IgnoreClientContentNegotiation(BaseContentNegotiation):
+    """
+    For actions that return files or streams rather than rendered data: any
+    ``Accept`` header (and ``?format=``) is fine, errors use the first renderer
+    """
+
+    def select_parser(self, request, parsers):
+        return parsers[0]
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
@@ -0,0 +1,54 @@
+from rest_framework.pagination import PageNumberPagination, CursorPagination
+
+
+class KeysetPagination(PageNumberPagination):
+    """
+    Page-number pagination by default, with opt-in keyset (cursor) pagination.
+
+    Clients request cursor mode with ``?pagination=cursor`` and then follow the
+    ``next``/``previous`` links, which carry a ``cursor`` parameter. Cursor pages
+    seek on the view's ordering (e.g. ``-created_at, id``) instead of running
+    ``OFFSET n`` and ``COUNT(*)``, so deep pages cost about the same as page 1.
+    Cursor responses therefore have no ``count`` key.
+    """
+    mode_query_param = 'pagination'
+    cursor_query_param = 'cursor'
+
+    def __init__(self):
+        self.cursor_paginator = None
+
+    def use_cursor(self, request):
+        return (
+            request.query_params.get(self.mode_query_param) == 'cursor'
+            or self.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_cursor(request):
+            self.cursor_paginator = CursorPagination()
+            self.cursor_paginator.ordering = getattr(view, 'ordering', None) or '-created_at'
+            return self.cursor_paginator.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_schema_operation_parameters(self, view):
+        return super().get_schema_operation_parameters(view) + [
+            {
+                'name': self.mode_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Set to "cursor" to use keyset pagination.',
+                'schema': {'type': 'string', 'enum': ['page', 'cursor']},
+            },
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'The pagination cursor value.',
+                'schema': {'type': 'string'},
+            },
+        ]
@@ -0,0 +1,120 @@
+"""
+Fixed-size thumbnails ("renditions") of uploaded images.
+
+A rendition is stored next to the other media under a name derived from the
+source file name, its size and the format (``rendition_name()``), so its URL
+is known without a query or a storage lookup and serializers can render it
+from a single column. Sources are never modified in place (a new upload gets
+a new name), so an existing rendition never goes stale.
+
+Renditions are generated with Pillow by ``submit_renditions()`` on a small
+thread pool, off the request thread, once the upload is committed; until
+then their URLs return 404 and clients fall back to the original.
+``generate_renditions()`` does the same work synchronously (backfills).
+"""
+import hashlib
+import io
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# Part of every rendition name; bump it when the output of generate_renditions() changes
+RENDITION_VERSION = 1
+
+FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 85, 'optimize': True, 'progressive': True}),
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def rendition_name(source_name, size, image_format=None):
+    """The storage name of the ``size`` x ``size`` rendition of ``source_name``"""
+    image_format = image_format or settings.IMAGE_RENDITION_FORMAT
+    digest = hashlib.sha1(f'{RENDITION_VERSION}:{source_name}:{size}:{image_format}'.encode()).hexdigest()
+    return f'renditions/{digest[:2]}/{digest}.{image_format}'
+
+
+def rendition_urls(source_name, sizes, storage, request=None):
+    """{label: URL} of the renditions of ``source_name`` in ``sizes`` ({label: size}), None without a source"""
+    if not source_name:
+        return None
+    urls = {}
+    for label, size in sizes.items():
+        url = storage.url(rendition_name(source_name, size))
+        urls[label] = request.build_absolute_uri(url) if request is not None else url
+    return urls
+
+
+def render(image, size, image_format):
+    """Encode a centered ``size`` x ``size`` crop of ``image``"""
+    pillow_format, options = FORMATS[image_format]
+    thumbnail = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+    if pillow_format == 'JPEG' and thumbnail.mode != 'RGB':
+        # JPEG has no alpha channel; flatten transparent areas onto white
+        background = Image.new('RGB', thumbnail.size, 'white')
+        background.paste(thumbnail, mask=thumbnail.getchannel('A') if 'A' in thumbnail.getbands() else None)
+        thumbnail = background
+    output = io.BytesIO()
+    thumbnail.save(output, pillow_format, **options)
+    return output.getvalue()
+
+
+def generate_renditions(source_name, sizes, storage, force=False):
+    """
+    Store the missing renditions of ``source_name`` (all of them with
+    ``force``); return the names written
+    """
+    image_format = settings.IMAGE_RENDITION_FORMAT
+    if image_format not in FORMATS:
+        raise ValueError(f"IMAGE_RENDITION_FORMAT must be one of {', '.join(FORMATS)}")
+    names = {size: rendition_name(source_name, size, image_format) for size in set(sizes.values())}
+    if not force:
+        names = {size: name for size, name in names.items() if not storage.exists(name)}
+    if not names:
+        return []
+
+    with storage.open(source_name, 'rb') as source:
+        image = Image.open(source)
+        # JPEGs are decoded at the smallest scale that still covers the largest rendition
+        largest = max(names)
+        image.draft('RGB', (largest, largest))
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info or 'A' in image.getbands() else 'RGB')
+        written = []
+        for size, name in sorted(names.items(), reverse=True):
+            if force:
+                storage.delete(name)
+            written.append(storage.save(name, ContentFile(render(image, size, image_format))))
+    return written
+
+
+def delete_renditions(source_name, sizes, storage):
+    for size in set(sizes.values()):
+        for image_format in FORMATS:
+            storage.delete(rendition_name(source_name, size, image_format))
+
+
+def run_generate_renditions(source_name, sizes, storage):
+    try:
+        return generate_renditions(source_name, sizes, storage)
+    except Exception:
+        logger.exception('Could not generate renditions of %s', source_name)
+        return []
+
+
+def submit_renditions(source_name, sizes, storage):
+    """Generate the renditions of ``source_name`` on the rendition thread pool; returns the future"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(settings.IMAGE_RENDITION_WORKERS, thread_name_prefix='renditions')
+    return _executor.submit(run_generate_renditions, source_name, sizes, storage)
@@ -48,6 +48,7 @@ INSTALLED_APPS = [
     "users",
     "projects",
     "tasks",
+    "jobs",
 ]
 
 MIDDLEWARE = [
@@ -57,6 +58,8 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    # Buffers each request's activity log events into one insert (see tasks.activity)
+    "tasks.activity.ActivityMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -110,6 +113,19 @@ else:
         }
     }
 
+# Cache. Membership versions, visible project ids and statistics must be shared by
+# every web and worker process: with more than one, use Redis or the database cache
+# (see projects.checks)
+CACHES = {
+    "default": {
+        "BACKEND": config("CACHE_BACKEND", default="django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": config("CACHE_LOCATION", default=""),
+    }
+}
+
+# Web worker processes; gunicorn reads the same variable as its --workers default
+WEB_CONCURRENCY = config("WEB_CONCURRENCY", default=1, cast=int)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -183,6 +199,79 @@ REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
 }
 
+# Full-text task search backend (dotted path); auto-detected from the database when unset
+TASK_SEARCH_BACKEND = config('TASK_SEARCH_BACKEND', default=None)
+
+# Seconds a user's dashboard statistics stay cached; bounds how stale overdue counts can get
+TASK_STATS_CACHE_TIMEOUT = config('TASK_STATS_CACHE_TIMEOUT', default=300, cast=int)
+
+# Seconds a user's visible project ids stay cached; bounds how long a process whose
+# cache missed a membership change keeps listing the user's old projects
+VISIBLE_PROJECTS_CACHE_TIMEOUT = config('VISIBLE_PROJECTS_CACHE_TIMEOUT', default=60, cast=int)
+
+# Maximum number of items accepted by one /api/tasks/bulk/ request
+TASK_BULK_MAX_ITEMS = config('TASK_BULK_MAX_ITEMS', default=500, cast=int)
+
+# Archival (tasks.archive): tasks done or cancelled for this many days are
+# moved to the archive tables by archive_tasks, this many per transaction
+TASK_ARCHIVE_AFTER_DAYS = config('TASK_ARCHIVE_AFTER_DAYS', default=90, cast=int)
+TASK_ARCHIVE_BATCH_SIZE = config('TASK_ARCHIVE_BATCH_SIZE', default=500, cast=int)
+
+# Deleted projects are purged by background jobs (tasks.purge): tasks deleted per
+# transaction, and transactions per job before it queues its continuation
+PROJECT_PURGE_BATCH_SIZE = config('PROJECT_PURGE_BATCH_SIZE', default=500, cast=int)
+PROJECT_PURGE_BATCHES_PER_JOB = config('PROJECT_PURGE_BATCHES_PER_JOB', default=20, cast=int)
+
+# Buffered activity log events are written at the end of each request, or
+# whenever this many have piled up (tasks.activity)
+ACTIVITY_BUFFER_SIZE = config('ACTIVITY_BUFFER_SIZE', default=1000, cast=int)
+
+# Serve list endpoints through the .values()-based row serializers when possible
+FAST_LIST_SERIALIZATION = config('FAST_LIST_SERIALIZATION', default=True, cast=bool)
+
+# Chunked attachment uploads (tasks.uploads): partial files are written to this
+# local directory, then moved into storage as content-addressed blobs
+ATTACHMENT_UPLOAD_DIR = config('ATTACHMENT_UPLOAD_DIR', default=str(MEDIA_ROOT / 'partial_uploads'))
+ATTACHMENT_CHUNK_MAX_BYTES = config('ATTACHMENT_CHUNK_MAX_BYTES', default=8 * 1024 * 1024, cast=int)
+ATTACHMENT_MAX_BYTES = config('ATTACHMENT_MAX_BYTES', default=1024 * 1024 * 1024, cast=int)
+# Attachment downloads (tasks.downloads) are streamed by Django unless handed to
+# the front proxy: 'x-accel-redirect' (nginx) or 'x-sendfile' (Apache, lighttpd)
+ATTACHMENT_SENDFILE = config('ATTACHMENT_SENDFILE', default='')
+# Internal nginx location that maps onto MEDIA_ROOT, for 'x-accel-redirect'
+ATTACHMENT_ACCEL_REDIRECT_PREFIX = config('ATTACHMENT_ACCEL_REDIRECT_PREFIX', default='/protected-media/')
+
+# Avatar renditions (task_manager.renditions): 'webp' or 'jpeg', generated by
+# this many background threads per process
+IMAGE_RENDITION_FORMAT = config('IMAGE_RENDITION_FORMAT', default='webp')
+IMAGE_RENDITION_WORKERS = config('IMAGE_RENDITION_WORKERS', default=2, cast=int)
+
+# Background jobs (jobs.queue), run by `manage.py runworker`
+JOBS_WORKER_PROCESSES = config('JOBS_WORKER_PROCESSES', default=2, cast=int)
+JOBS_POLL_INTERVAL = config('JOBS_POLL_INTERVAL', default=1.0, cast=float)
+JOBS_MAX_ATTEMPTS = config('JOBS_MAX_ATTEMPTS', default=5, cast=int)
+# Seconds before the first retry of a failed job; doubled after each attempt
+JOBS_RETRY_BACKOFF = config('JOBS_RETRY_BACKOFF', default=10, cast=int)
+# Seconds after which a running job is considered lost with its worker and requeued
+JOBS_TIMEOUT = config('JOBS_TIMEOUT', default=600, cast=int)
+
+# Serve the task list/detail, comment list and project list from async views;
+# only useful when running the ASGI application (task_manager.asgi)
+ASYNC_READ_VIEWS = config('ASYNC_READ_VIEWS', default=False, cast=bool)
+
+# Seconds a transaction may take to commit after logging a change (tasks.sync). Sync
+# tokens stay behind newer changes, which are sent again by the next sync
+SYNC_SETTLE_SECONDS = config('SYNC_SETTLE_SECONDS', default=10, cast=int)
+
+# Real-time events (/api/events/, served under ASGI). The local broadcaster only
+# sees writes made by its own process; use tasks.events.ChangeLogBroadcaster
+# when several workers serve the API.
+EVENTS_BACKEND = config('EVENTS_BACKEND', default='tasks.events.LocalBroadcaster')
+# Events buffered per connection before a slow consumer is disconnected
+EVENTS_QUEUE_SIZE = config('EVENTS_QUEUE_SIZE', default=100, cast=int)
+EVENTS_HEARTBEAT_SECONDS = config('EVENTS_HEARTBEAT_SECONDS', default=15, cast=float)
+# Seconds between change log polls of the ChangeLogBroadcaster
+EVENTS_POLL_INTERVAL = config('EVENTS_POLL_INTERVAL', default=1.0, cast=float)
+
 # JWT Settings
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
@@ -0,0 +1,33 @@
+"""
+Streamed responses that keep memory flat under WSGI and ASGI alike.
+
+Under ASGI, Django reads a synchronous ``streaming_content`` iterator with
+``sync_to_async(list)`` before sending anything, so the whole body ends up in
+memory. ``streaming_response()`` gives ASGI requests an async iterator
+instead, which pulls one chunk at a time from the blocking iterator in a
+thread (the request's thread, so database cursors stay on their connection).
+"""
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+
+_done = object()
+
+
+async def aiterate(iterable):
+    """Iterate a blocking iterable from async code, one item per thread hop"""
+    iterator = iter(iterable)
+    try:
+        while (item := await sync_to_async(next)(iterator, _done)) is not _done:
+            yield item
+    finally:
+        close = getattr(iterator, 'close', None)
+        if close is not None:
+            await sync_to_async(close)()
+
+
+def streaming_response(request, iterable, **kwargs):
+    """A ``StreamingHttpResponse`` of ``iterable``, read chunk by chunk under ASGI too"""
+    if isinstance(request, ASGIRequest):
+        iterable = aiterate(iterable)
+    return StreamingHttpResponse(iterable, **kwargs)
@@ -10,6 +10,9 @@ from drf_spectacular.views import (
     SpectacularRedocView,
     SpectacularSwaggerView,
 )
+from projects.urls import async_urlpatterns as project_async_urlpatterns
+from tasks.urls import async_urlpatterns as task_async_urlpatterns
+from tasks.views import SyncView, task_events
 from . import views
 
 urlpatterns = [
@@ -27,8 +30,18 @@ urlpatterns = [
     path('api/users/', include('users.urls')),
     path('api/projects/', include('projects.urls')),
     path('api/tasks/', include('tasks.urls')),
+    path('api/sync/', SyncView.as_view(), name='sync'),
+    path('api/events/', task_events, name='task-events'),
 ]
 
+# Hot read endpoints served by native async views under ASGI (see task_manager.asyncviews)
+async_read_urlpatterns = [
+    path('api/projects/', include(project_async_urlpatterns)),
+    path('api/tasks/', include(task_async_urlpatterns)),
+]
+if settings.ASYNC_READ_VIEWS:
+    urlpatterns = async_read_urlpatterns + urlpatterns
+
 # Serve media and static files in development
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
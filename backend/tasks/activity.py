@@ -0,0 +1,200 @@
+"""
+Activity log: who changed what in a project (``/api/projects/{id}/activity/``).
+
+Task, comment and attachment writes and project membership changes are
+recorded as ``Activity`` rows (see ``tasks.signals``; bulk writes record
+their own). Updates carry field-level diffs, ``{field: [old, new]}``, and
+``{relation: {"added": [ids], "removed": [ids]}}`` for assignees and tags.
+Old values come from the state an instance was loaded with (``from_db``),
+so recording a change never costs an extra read.
+
+Nor does it cost an insert per write: ``ActivityMiddleware`` opens a buffer
+for each request, events join it once their transaction commits (events of
+rolled back writes are dropped), successive changes of the same object are
+merged into one event, and the buffer is written with one ``bulk_create``
+when the response is ready, or every ``ACTIVITY_BUFFER_SIZE`` events during
+big imports. Commands and jobs can use ``buffered_activity()`` the same way;
+without a buffer, every ``record_activity()`` call is written on commit.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import transaction
+from .models import Activity
+
+_buffer = ContextVar('activity_buffer', default=None)
+
+
+class ActivityBuffer:
+    """Events of one request (or command), written together"""
+
+    def __init__(self, actor=None):
+        # A user, or the request whose authenticated user is the actor
+        self.actor = actor
+        self.events = []
+        # (model, object_id) -> event that later updates are merged into
+        self.latest = {}
+        self.closed = False
+
+    def get_actor_id(self):
+        user = getattr(self.actor, 'user', self.actor)
+        return user.pk if user is not None and user.is_authenticated else None
+
+    def add(self, events):
+        if self.closed:
+            # Committed after the request was done
+            Activity.objects.bulk_create(events)
+            return
+        for event in events:
+            key = (event.model, event.object_id)
+            latest = self.latest.get(key)
+            if event.verb == 'updated' and latest is not None and latest.actor_id == event.actor_id:
+                merge_changes(latest.changes, event.changes)
+                continue
+            self.events.append(event)
+            self.latest[key] = event if event.verb in ('created', 'updated', 'restored') else None
+        if len(self.events) >= settings.ACTIVITY_BUFFER_SIZE:
+            self.flush()
+
+    def flush(self):
+        if self.events:
+            Activity.objects.bulk_create(self.events)
+        self.events = []
+        self.latest = {}
+
+    def close(self):
+        self.flush()
+        self.closed = True
+
+
+def merge_changes(changes, later):
+    """Fold the ``later`` changes of an object into its earlier ``changes``"""
+    for field, change in later.items():
+        earlier = changes.get(field)
+        if earlier is None:
+            changes[field] = change
+        elif isinstance(change, dict):
+            added, removed = set(earlier.get('added', [])), set(earlier.get('removed', []))
+            later_added, later_removed = set(change.get('added', [])), set(change.get('removed', []))
+            change = relation_change(
+                (added - later_removed) | (later_added - removed),
+                (removed - later_added) | (later_removed - added),
+            )
+            if change:
+                changes[field] = change
+            else:
+                # Added, then removed again
+                del changes[field]
+        else:
+            changes[field] = [earlier[0], change[1]]
+
+
+def relation_change(added=(), removed=()):
+    change = {}
+    if added:
+        change['added'] = sorted(added)
+    if removed:
+        change['removed'] = sorted(removed)
+    return change
+
+
+def activity(project_id, model, object_id, verb, changes=None, task_id=None):
+    """An unsaved event, attributed to the actor of the current buffer"""
+    buffer = _buffer.get()
+    return Activity(
+        project_id=project_id, task_id=task_id, model=model, object_id=object_id, verb=verb,
+        actor_id=buffer.get_actor_id() if buffer is not None else None, changes=changes or {},
+    )
+
+
+def record_activity(events):
+    """Add events to the current buffer, or write them, once the current transaction commits"""
+    if not events:
+        return
+    buffer = _buffer.get()
+    if buffer is None:
+        transaction.on_commit(lambda: Activity.objects.bulk_create(events))
+    else:
+        transaction.on_commit(lambda: buffer.add(events))
+
+
+@contextmanager
+def buffered_activity(actor=None):
+    """Buffer the events recorded inside the block and write them at its end"""
+    buffer = ActivityBuffer(actor)
+    token = _buffer.set(buffer)
+    try:
+        yield buffer
+    finally:
+        _buffer.reset(token)
+        buffer.close()
+
+
+class ActivityMiddleware:
+    """Buffer the activity of each request and write it with one insert"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        with buffered_activity(request):
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        buffer = ActivityBuffer(request)
+        token = _buffer.set(buffer)
+        try:
+            return await self.get_response(request)
+        finally:
+            _buffer.reset(token)
+            if buffer.events:
+                await sync_to_async(buffer.close)()
+            buffer.closed = True
+
+
+def remember_state(instance):
+    """Keep the ``ACTIVITY_FIELDS`` values that the next save is diffed against"""
+    instance._loaded_values = {name: getattr(instance, name) for name in instance.ACTIVITY_FIELDS}
+
+
+def diff(instance):
+    """The ``ACTIVITY_FIELDS`` changes of a saved instance since it was loaded (or last diffed)"""
+    loaded = getattr(instance, '_loaded_values', {})
+    changes = {}
+    for name, old in loaded.items():
+        new = getattr(instance, name)
+        if new != old:
+            changes[name.removesuffix('_id')] = [old, new]
+    remember_state(instance)
+    return changes
+
+
+def snapshot(instance, deleted=False):
+    """The ``ACTIVITY_FIELDS`` of a created (or deleted) instance as changes from (or to) nothing"""
+    changes = {}
+    for name in instance.ACTIVITY_FIELDS:
+        value = getattr(instance, name)
+        if value is not None and value != '':
+            changes[name.removesuffix('_id')] = [value, None] if deleted else [None, value]
+    return changes
+
+
+def task_events(tasks, verb, items=None):
+    """Events for tasks created (with their relations from ``items``), archived or restored in bulk"""
+    events = []
+    for index, task in enumerate(tasks):
+        changes = snapshot(task) if verb == 'created' else {}
+        if items is not None:
+            for field in ('assignees', 'tags'):
+                if items[index].get(field):
+                    changes[field] = relation_change(set(items[index][field]))
+        events.append(activity(task.project_id, 'task', task.pk, verb, changes, task_id=task.pk))
+    return events
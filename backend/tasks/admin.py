@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Task, Tag, TaskAttachment, Comment
+from .bulk import delete_tasks
+from .models import Task, Tag, TaskAttachment, Comment, ArchivedTask
 
 
 @admin.register(Tag)
@@ -17,9 +18,12 @@ class TaskAdmin(admin.ModelAdmin):
     list_filter = ('status', 'priority', 'created_at', 'updated_at')
     search_fields = ('title', 'description', 'project__title', 'created_by__email')
     filter_horizontal = ('assignees', 'tags')
-    readonly_fields = ('created_at', 'updated_at')
+    readonly_fields = ('comments_count', 'attachments_count', 'created_at', 'updated_at')
     date_hierarchy = 'created_at'
 
+    def delete_queryset(self, request, queryset):
+        delete_tasks(list(queryset.values_list('id', flat=True)))
+
 
 @admin.register(TaskAttachment)
 class TaskAttachmentAdmin(admin.ModelAdmin):
@@ -37,3 +41,18 @@ class CommentAdmin(admin.ModelAdmin):
     list_filter = ('created_at', 'updated_at')
     search_fields = ('content', 'task__title', 'author__email')
     readonly_fields = ('created_at', 'updated_at')
+
+
+@admin.register(ArchivedTask)
+class ArchivedTaskAdmin(admin.ModelAdmin):
+    """Admin configuration for ArchivedTask model; archived tasks are restored through the API"""
+    list_display = ('title', 'project', 'status', 'priority', 'created_at', 'archived_at')
+    list_filter = ('status', 'priority', 'archived_at')
+    search_fields = ('title', 'description', 'project__title')
+    date_hierarchy = 'archived_at'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
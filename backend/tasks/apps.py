@@ -1,6 +1,18 @@
 from django.apps import AppConfig
+from django.db import connections
+from django.db.models.signals import post_migrate
+
+
+def install_task_search_index(sender, using, **kwargs):
+    """Re-create the full-text index triggers after migrations (see tasks.search)"""
+    from .search import install_search_index
+    install_search_index(connections[using])
 
 
 class TasksConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "tasks"
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        post_migrate.connect(install_task_search_index, sender=self)
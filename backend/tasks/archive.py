@@ -0,0 +1,164 @@
+"""
+Hot/cold archival of closed tasks (``manage.py archive_tasks``).
+
+Tasks done or cancelled for ``TASK_ARCHIVE_AFTER_DAYS`` (by ``closed_at``,
+which comments and other touches of ``updated_at`` do not move) are moved
+from ``tasks`` to ``archived_tasks``, together with their comments,
+attachments, assignees and tags, ``TASK_ARCHIVE_BATCH_SIZE`` tasks per
+transaction. The hot table, its indexes and its counts then only hold the
+work people still look at. Rows keep their ids, so ``restore_tasks()`` puts a
+task back as it was. Archived tasks are read through
+``/api/tasks/?archived=true`` and restored with ``POST /api/tasks/{id}/restore/``.
+
+To the rest of the app archiving a task deletes it (the project's task count
+drops and sync clients get a tombstone) and restoring it creates it again.
+Attachment blobs are shared by both tables: the copy of an attachment takes
+a blob reference before the moved row releases its own.
+"""
+from collections import Counter
+from datetime import timedelta
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from .activity import record_activity, task_events
+from .bulk import delete_tasks
+from .counters import adjust_task_count
+from .models import (
+    CLOSED_STATUSES, Task, Comment, TaskAttachment, Blob,
+    ArchivedTask, ArchivedComment, ArchivedAttachment
+)
+from .stats import bump_project_version
+from .sync import record_changes
+
+TASK_FIELDS = (
+    'id', 'title', 'description', 'project_id', 'status', 'priority', 'priority_rank', 'due_date', 'closed_at',
+    'created_by_id', 'comments_count', 'attachments_count', 'created_at', 'updated_at',
+)
+COMMENT_FIELDS = ('id', 'task_id', 'author_id', 'content', 'created_at', 'updated_at')
+ATTACHMENT_FIELDS = ('id', 'task_id', 'file', 'blob_id', 'name', 'uploaded_by_id', 'uploaded_at')
+RELATIONS = ('assignees', 'tags')
+
+
+def copy_rows(queryset, model, fields, keep=()):
+    """
+    Insert a ``model`` row with the same ``fields`` for every row of
+    ``queryset``. ``keep`` names auto_now(_add) fields, which the insert
+    overwrites; their values are written back afterwards.
+    """
+    rows = list(queryset.values(*fields))
+    objects = model.objects.bulk_create([model(**row) for row in rows])
+    if keep and objects:
+        for obj, row in zip(objects, rows):
+            for field in keep:
+                setattr(obj, field, row[field])
+        model.objects.bulk_update(objects, keep)
+    return objects
+
+
+def copy_relation(source, target, field, ids):
+    """Copy the ``field`` M2M rows of the ``source`` objects with ``ids`` to the ``target`` objects with the same ids"""
+    source_field = getattr(source, field).field
+    target_field = getattr(target, field).field
+    pairs = (
+        getattr(source, field).through.objects
+        .filter(**{f'{source_field.m2m_field_name()}_id__in': ids})
+        .values_list(f'{source_field.m2m_field_name()}_id', f'{source_field.m2m_reverse_field_name()}_id')
+    )
+    through = getattr(target, field).through
+    through.objects.bulk_create([
+        through(**{
+            f'{target_field.m2m_field_name()}_id': owner_id,
+            f'{target_field.m2m_reverse_field_name()}_id': related_id,
+        })
+        for owner_id, related_id in pairs
+    ])
+
+
+def add_blob_references(attachments):
+    """Count one more reference to the blob of each attachment"""
+    by_count = {}
+    for blob_id, count in Counter(a.blob_id for a in attachments if a.blob_id is not None).items():
+        by_count.setdefault(count, []).append(blob_id)
+    for count, blob_ids in by_count.items():
+        Blob.objects.filter(pk__in=blob_ids).update(ref_count=F('ref_count') + count)
+
+
+def archivable_tasks(cutoff):
+    return Task.objects.filter(status__in=CLOSED_STATUSES, closed_at__lt=cutoff)
+
+
+def archive_batch(cutoff, batch_size):
+    """Archive up to ``batch_size`` of the oldest tasks closed before ``cutoff``; returns how many"""
+    with transaction.atomic():
+        tasks = archivable_tasks(cutoff).order_by('closed_at', 'id')
+        if connection.features.has_select_for_update_skip_locked:
+            # Tasks being edited right now are left for the next batch
+            tasks = tasks.select_for_update(skip_locked=True)
+        ids = list(tasks.values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return 0
+        archived = copy_rows(Task.objects.filter(id__in=ids), ArchivedTask, TASK_FIELDS)
+        for field in RELATIONS:
+            copy_relation(Task, ArchivedTask, field, ids)
+        copy_rows(Comment.objects.filter(task_id__in=ids), ArchivedComment, COMMENT_FIELDS)
+        add_blob_references(
+            copy_rows(TaskAttachment.objects.filter(task_id__in=ids), ArchivedAttachment, ATTACHMENT_FIELDS)
+        )
+        # Counts the tasks out of their projects, logs them as deleted for sync and releases
+        # the blobs; the activity log gets one "archived" event per task instead
+        delete_tasks(ids, log_activity=False)
+        record_activity(task_events(archived, 'archived'))
+    return len(ids)
+
+
+def archive_tasks(days=None, batch_size=None, progress=None):
+    """
+    Archive the tasks closed for ``days``, batch by batch;
+    ``progress(total)`` is called after every batch. Returns how many.
+    """
+    days = settings.TASK_ARCHIVE_AFTER_DAYS if days is None else days
+    batch_size = batch_size or settings.TASK_ARCHIVE_BATCH_SIZE
+    cutoff = timezone.now() - timedelta(days=days)
+    total = 0
+    while archived := archive_batch(cutoff, batch_size):
+        total += archived
+        if progress is not None:
+            progress(total)
+    return total
+
+
+def restore_tasks(ids):
+    """Move archived tasks back to the hot table; returns the restored tasks"""
+    with transaction.atomic():
+        # Concurrent restores of the same task wait here, then find nothing left
+        ids = list(ArchivedTask.objects.select_for_update().filter(id__in=ids).values_list('id', flat=True))
+        if not ids:
+            return []
+        # updated_at and closed_at become now, so a restored task gets a full period before it is archived again
+        tasks = copy_rows(ArchivedTask.objects.filter(id__in=ids), Task, TASK_FIELDS, keep=('created_at',))
+        now = timezone.now()
+        Task.objects.filter(id__in=ids).update(closed_at=now)
+        for task in tasks:
+            task.closed_at = now
+        for field in RELATIONS:
+            copy_relation(ArchivedTask, Task, field, ids)
+        comments = copy_rows(
+            ArchivedComment.objects.filter(task_id__in=ids), Comment, COMMENT_FIELDS, keep=('created_at', 'updated_at')
+        )
+        add_blob_references(copy_rows(
+            ArchivedAttachment.objects.filter(task_id__in=ids), TaskAttachment, ATTACHMENT_FIELDS, keep=('uploaded_at',)
+        ))
+        ArchivedTask.objects.filter(id__in=ids).delete()
+
+        # bulk_create() skips the signals
+        project_ids = {task.pk: task.project_id for task in tasks}
+        record_changes(
+            [('task', task.pk, task.project_id, False) for task in tasks]
+            + [('comment', comment.pk, project_ids[comment.task_id], False) for comment in comments]
+        )
+        record_activity(task_events(tasks, 'restored'))
+        for project_id, count in Counter(project_ids.values()).items():
+            adjust_task_count(project_id, count)
+            bump_project_version(project_id)
+    return tasks
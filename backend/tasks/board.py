@@ -0,0 +1,46 @@
+"""
+Kanban board: the first tasks of every status column of a project.
+
+``load_board()`` ranks the project's tasks inside their status with
+``ROW_NUMBER() OVER (PARTITION BY status ...)`` and counts each column with
+``COUNT(*) OVER (PARTITION BY status)``, then keeps the first ``limit`` rows of
+every column, so the tasks and the full column counts come back in one query
+whatever the size of the project. Rows are rendered by ``TaskListRowSerializer``
+(assignees and tags add one query each when selected).
+"""
+from django.db.models import Count, F, Window
+from django.db.models.functions import RowNumber
+from .models import Task
+from .serializers import TaskListRowSerializer
+
+DEFAULT_COLUMN_LIMIT = 20
+MAX_COLUMN_LIMIT = 100
+
+# Same order as the task list
+COLUMN_ORDERING = [F('created_at').desc(), F('id').asc()]
+
+
+def load_board(project_id, limit=DEFAULT_COLUMN_LIMIT, fields=None, expand=None, context=None):
+    """Return one column per status with its total count and first ``limit`` tasks"""
+    row_serializer = TaskListRowSerializer(fields=fields, expand=expand, context=context)
+    rows = list(
+        Task.objects.filter(project_id=project_id)
+        .annotate(
+            column_position=Window(RowNumber(), partition_by=[F('status')], order_by=COLUMN_ORDERING),
+            column_count=Window(Count('id'), partition_by=[F('status')]),
+        )
+        .filter(column_position__lte=limit)
+        .order_by('status', 'column_position')
+        .values('status', 'column_count', *row_serializer.columns)
+    )
+    tasks = row_serializer.serialize(rows)
+
+    columns = {
+        status: {'status': status, 'label': label, 'count': 0, 'tasks': []}
+        for status, label in Task.STATUS_CHOICES
+    }
+    for row, task in zip(rows, tasks):
+        column = columns[row['status']]
+        column['count'] = row['column_count']
+        column['tasks'].append(task)
+    return list(columns.values())
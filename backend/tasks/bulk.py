@@ -0,0 +1,235 @@
+"""
+Batch create, update and delete of tasks.
+
+Every item of a batch is validated first and all related ids (projects, users,
+tags, tasks) are resolved with one query per model for the whole batch. If any
+item is invalid nothing is written and the per-item errors are returned;
+otherwise all writes happen in one transaction with ``bulk_create`` /
+``bulk_update`` and bulk inserts into the M2M through tables.
+"""
+from collections import Counter
+from django.db import transaction
+from rest_framework import serializers
+from django.utils import timezone
+from projects.membership import visible_project_ids
+from users.models import User
+from .activity import activity, diff, record_activity, relation_change, task_events
+from .counters import adjust_task_count
+from .models import Task, Tag
+from .serializers import TaskBulkItemSerializer
+from .stats import bump_project_version
+from .sync import record_changes
+
+TASK_FIELDS = ('title', 'description', 'status', 'priority', 'due_date')
+
+
+class BulkValidationError(Exception):
+    """Raised with one error dict per item (empty for valid items)"""
+
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+
+def validate_items(items, partial=False):
+    """
+    Validate every item with one shared serializer instance; returns the
+    validated items (empty for invalid ones) and one error dict per item.
+    """
+    serializer = TaskBulkItemSerializer(partial=partial)
+    validated, errors = [], []
+    for item in items:
+        try:
+            validated.append(serializer.run_validation(item))
+            errors.append({})
+        except serializers.ValidationError as exc:
+            validated.append({})
+            errors.append(exc.detail if isinstance(exc.detail, dict) else {'non_field_errors': exc.detail})
+    return validated, errors
+
+
+def check_references(user, items, errors):
+    """Record an error for every item referring to an unknown or invisible object"""
+    project_ids = {item['project'] for item in items if 'project' in item}
+    user_ids = {pk for item in items for pk in item.get('assignees', [])}
+    tag_ids = {pk for item in items for pk in item.get('tags', [])}
+
+    visible = visible_project_ids(user) & project_ids
+    known_users = set(User.objects.filter(id__in=user_ids).order_by().values_list('id', flat=True))
+    known_tags = set(Tag.objects.filter(id__in=tag_ids).order_by().values_list('id', flat=True))
+
+    for item, item_errors in zip(items, errors):
+        if 'project' in item and item['project'] not in visible:
+            item_errors['project'] = [f"Invalid pk \"{item['project']}\" - object does not exist."]
+        for field, known in (('assignees', known_users), ('tags', known_tags)):
+            unknown = [pk for pk in item.get(field, []) if pk not in known]
+            if unknown:
+                item_errors[field] = [f'Invalid pk "{pk}" - object does not exist.' for pk in unknown]
+
+
+def replace_relations(tasks, items, field, clear=True):
+    """
+    Replace an M2M relation of the tasks whose item sets it, with bulk deletes
+    and inserts; returns the ids added and removed per task, for the activity log
+    """
+    relation = getattr(Task, field)
+    through = relation.through
+    target_column = relation.field.m2m_reverse_field_name() + '_id'
+    changed = [(task, item[field]) for task, item in zip(tasks, items) if field in item]
+    if not changed:
+        return {}
+    old = {}
+    if clear:
+        rows = through.objects.filter(task_id__in=[task.pk for task, _ in changed])
+        for task_id, pk in rows.values_list('task_id', target_column):
+            old.setdefault(task_id, set()).add(pk)
+        rows.delete()
+    through.objects.bulk_create([
+        through(task_id=task.pk, **{target_column: pk})
+        for task, pks in changed
+        for pk in dict.fromkeys(pks)
+    ])
+    changes = {}
+    for task, pks in changed:
+        before = old.get(task.pk, set())
+        change = relation_change(set(pks) - before, before - set(pks))
+        if change:
+            changes[task.pk] = change
+    return changes
+
+
+def bulk_create_tasks(user, items):
+    """Validate and create tasks; returns them in input order"""
+    items, errors = validate_items(items)
+    check_references(user, items, errors)
+    if any(errors):
+        raise BulkValidationError(errors)
+    return create_tasks(user, items)
+
+
+def create_tasks(user, items):
+    """Create tasks from validated items in one transaction; returns them in input order"""
+    tasks = [
+        Task(
+            project_id=item['project'],
+            created_by=user,
+            **{field: item[field] for field in TASK_FIELDS if field in item}
+        )
+        for item in items
+    ]
+    for task in tasks:
+        # bulk_create() skips save()
+        task.update_priority_rank()
+        task.update_closed_at()
+    with transaction.atomic():
+        Task.objects.bulk_create(tasks)
+        replace_relations(tasks, items, 'assignees', clear=False)
+        replace_relations(tasks, items, 'tags', clear=False)
+        record_changes([('task', task.pk, task.project_id, False) for task in tasks])
+        record_activity(task_events(tasks, 'created', items))
+        for project_id, count in Counter(task.project_id for task in tasks).items():
+            adjust_task_count(project_id, count)
+            bump_project_version(project_id)
+    return tasks
+
+
+def load_tasks(user, ids):
+    """Return the tasks with the given ids that the user can see, by id"""
+    return {
+        task.pk: task
+        for task in Task.objects.filter(id__in=ids, project_id__in=visible_project_ids(user))
+    }
+
+
+def bulk_update_tasks(user, items):
+    """Validate and partially update tasks; every item needs an ``id``"""
+    items, errors = validate_items(items, partial=True)
+    for item, item_errors in zip(items, errors):
+        if 'id' not in item and not item_errors:
+            item_errors['id'] = ['This field is required.']
+    check_references(user, items, errors)
+    tasks = load_tasks(user, [item['id'] for item in items if 'id' in item])
+    for item, item_errors in zip(items, errors):
+        if 'id' in item and item['id'] not in tasks:
+            item_errors['id'] = [f"Invalid pk \"{item['id']}\" - object does not exist."]
+    if any(errors):
+        raise BulkValidationError(errors)
+
+    now = timezone.now()
+    ordered_tasks = []
+    moved = Counter()
+    changes = []
+    task_changes = {}
+    fields = {'updated_at'}
+    for item in items:
+        task = tasks[item['id']]
+        if 'project' in item and item['project'] != task.project_id:
+            moved[task.project_id] -= 1
+            moved[item['project']] += 1
+            changes.append(('task', task.pk, task.project_id, True))
+            task.project_id = item['project']
+            fields.add('project')
+        for field in TASK_FIELDS:
+            if field in item:
+                setattr(task, field, item[field])
+                fields.add(field)
+        task.update_priority_rank()
+        task.update_closed_at(now)
+        task.updated_at = now
+        task_changes[task.pk] = diff(task)
+        ordered_tasks.append(task)
+        changes.append(('task', task.pk, task.project_id, False))
+    if {'priority', 'status'} & fields:
+        fields.add('priority_rank')
+    if 'status' in fields:
+        fields.add('closed_at')
+
+    with transaction.atomic():
+        Task.objects.bulk_update(ordered_tasks, fields)
+        for field in ('assignees', 'tags'):
+            for task_id, change in replace_relations(ordered_tasks, items, field).items():
+                task_changes[task_id][field] = change
+        record_changes(changes)
+        record_activity([
+            activity(task.project_id, 'task', task.pk, 'updated', task_changes[task.pk], task_id=task.pk)
+            for task in ordered_tasks if task_changes[task.pk]
+        ])
+        for project_id, delta in moved.items():
+            adjust_task_count(project_id, delta)
+        for project_id in {task.project_id for task in ordered_tasks} | set(moved):
+            bump_project_version(project_id)
+    return ordered_tasks
+
+
+def bulk_delete_tasks(user, ids):
+    """Delete the given tasks; every id must refer to a task the user can see"""
+    if not isinstance(ids, list) or not all(isinstance(pk, int) for pk in ids):
+        raise BulkValidationError({'ids': ['Expected a list of task ids.']})
+    tasks = load_tasks(user, ids)
+    errors = [{} if pk in tasks else {'id': [f'Invalid pk "{pk}" - object does not exist.']} for pk in ids]
+    if any(errors):
+        raise BulkValidationError(errors)
+
+    delete_tasks(list(tasks))
+    return ids
+
+
+def delete_tasks(ids, log_activity=True):
+    """
+    Delete tasks with their comments and attachments. The task receivers skip
+    queryset deletes (see tasks.signals.deleted_in_bulk), so the project
+    counters, change log and activity log are updated here once per batch.
+    """
+    with transaction.atomic():
+        rows = list(Task.objects.filter(id__in=ids).values_list('id', 'project_id', 'title'))
+        Task.objects.filter(id__in=[pk for pk, _, _ in rows]).delete()
+        record_changes([('task', pk, project_id, True) for pk, project_id, _ in rows])
+        if log_activity:
+            record_activity([
+                activity(project_id, 'task', pk, 'deleted', {'title': [title, None]}, task_id=pk)
+                for pk, project_id, title in rows
+            ])
+        for project_id, count in Counter(project_id for _, project_id, _ in rows).items():
+            adjust_task_count(project_id, -count)
+            bump_project_version(project_id)
+    return len(rows)
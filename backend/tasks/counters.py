@@ -0,0 +1,45 @@
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from projects.models import Project
+from .models import Task, TaskAttachment, Comment
+from .sync import record_change
+
+
+def adjust_task_count(project_id, delta):
+    """Atomically add ``delta`` to a project's stored task count"""
+    Project.objects.filter(pk=project_id).update(task_count=F('task_count') + delta)
+    record_change('project', project_id, project_id)
+
+
+def count_of(model, field):
+    """Correlated subquery counting ``model`` rows whose ``field`` points at the outer row"""
+    counts = (
+        model.objects.filter(**{field: OuterRef('pk')})
+        .order_by()
+        .values(field)
+        .annotate(count=Count('pk'))
+        .values('count')
+    )
+    return Coalesce(Subquery(counts), 0)
+
+
+def recount():
+    """
+    Recompute the denormalized counters from the related tables, updating only
+    rows that drifted. Returns the number of rows repaired per counter.
+    """
+    repaired = {}
+    for model, counter, related_model, field in [
+        (Task, 'comments_count', Comment, 'task'),
+        (Task, 'attachments_count', TaskAttachment, 'task'),
+        (Project, 'task_count', Task, 'project'),
+    ]:
+        drifted = (
+            model.objects.annotate(actual=count_of(related_model, field))
+            .exclude(**{counter: F('actual')})
+            .values('pk')
+        )
+        repaired[f'{model._meta.model_name}.{counter}'] = model.objects.filter(pk__in=drifted).update(
+            **{counter: count_of(related_model, field)}
+        )
+    return repaired
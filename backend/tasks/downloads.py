@@ -0,0 +1,171 @@
+"""
+Attachment downloads (``/api/tasks/attachments/{id}/download/``).
+
+After the permission check the file is served in one of two ways:
+
+- By Django, through a ``FileResponse`` of the open file. WSGI servers with a
+  ``wsgi.file_wrapper`` (gunicorn, uWSGI) send it with ``sendfile()``, so the
+  bytes never pass through Python; elsewhere it is streamed in blocks. Under
+  ASGI the blocks are read in a thread and sent one at a time (see
+  ``task_manager.streaming``), so only one block is ever held in memory; use
+  the proxy offload below to keep the bytes out of Python altogether. A
+  single ``Range`` is answered with a ``206`` of just that part.
+- By the front proxy, when ``ATTACHMENT_SENDFILE`` is ``'x-accel-redirect'``
+  (nginx) or ``'x-sendfile'`` (Apache, lighttpd): the response only names the
+  file and the proxy serves it, ranges included.
+
+The ETag is the blob's SHA-256, so a matching ``If-None-Match`` gets a ``304``
+without opening the file. Attachments from before blobs use their file name
+and size instead.
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import content_disposition_header, quote_etag
+from task_manager.streaming import streaming_response
+
+BLOCK_SIZE = 64 * 1024
+
+RANGE_PATTERN = re.compile(r'bytes=(\d*)-(\d*)')
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+class FileRange:
+    """
+    ``length`` bytes of an open file from ``start``, for ``FileResponse``.
+    ``fileno()`` lets the WSGI server ``sendfile()`` them from the file's
+    position (the server sends ``Content-Length`` bytes).
+    """
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size) if size else b''
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+    def blocks(self, block_size):
+        try:
+            while data := self.read(block_size):
+                yield data
+        finally:
+            self.close()
+
+
+def parse_range(header, size):
+    """
+    The ``(start, end)`` positions (inclusive) of a single-range ``Range``
+    header; None when it is to be ignored (malformed, or several ranges)
+    """
+    match = RANGE_PATTERN.fullmatch(header.strip())
+    if not match or not any(match.groups()):
+        return None
+    first, last = match.groups()
+    if not first:
+        # The last N bytes
+        length = int(last)
+        if not length or not size:
+            raise RangeNotSatisfiable
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable
+    return start, end
+
+
+def attachment_etag(attachment):
+    if attachment.blob_id:
+        return quote_etag(attachment.blob.sha256)
+    return quote_etag(f'{attachment.file.name}:{attachment.file.size}')
+
+
+def attachment_file_name(attachment):
+    return attachment.name or os.path.basename(attachment.file.name)
+
+
+def serve_attachment(request, attachment):
+    """The download response of an attachment the user may read"""
+    etag = attachment_etag(attachment)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        file_name = attachment_file_name(attachment)
+        offload = settings.ATTACHMENT_SENDFILE
+        if offload:
+            response = offload_response(attachment, offload)
+        else:
+            response = file_response(request, attachment, etag)
+        if response.status_code != 416:
+            content_type, _ = mimetypes.guess_type(file_name)
+            response['Content-Type'] = content_type or 'application/octet-stream'
+            response['Content-Disposition'] = content_disposition_header(True, file_name)
+    response['ETag'] = etag
+    # Permissions can change, so caches must revalidate
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def offload_response(attachment, offload):
+    """Hand the file to the front proxy, which also answers ``Range`` headers"""
+    response = HttpResponse()
+    if offload == 'x-accel-redirect':
+        response['X-Accel-Redirect'] = settings.ATTACHMENT_ACCEL_REDIRECT_PREFIX + quote(attachment.file.name)
+    elif offload == 'x-sendfile':
+        response['X-Sendfile'] = attachment.file.path
+    else:
+        raise ImproperlyConfigured(
+            f"ATTACHMENT_SENDFILE must be 'x-accel-redirect' or 'x-sendfile', not {offload!r}"
+        )
+    return response
+
+
+def file_response(request, attachment, etag):
+    """Stream the file, or the part of it a ``Range`` header asks for"""
+    size = attachment.blob.size if attachment.blob_id else attachment.file.size
+    byte_range = None
+    # A stale If-Range gets the whole (changed) file
+    if 'Range' in request.headers and request.headers.get('If-Range', etag) == etag:
+        try:
+            byte_range = parse_range(request.headers['Range'], size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+    start, end = byte_range or (0, size - 1)
+    file = attachment.file.storage.open(attachment.file.name, 'rb')
+    file_range = FileRange(file, start, end - start + 1)
+    status = 206 if byte_range else 200
+    if isinstance(request, ASGIRequest):
+        # No sendfile(), and a FileResponse would be read into memory whole
+        response = streaming_response(request, file_range.blocks(BLOCK_SIZE), status=status)
+    else:
+        response = FileResponse(file_range, status=status)
+        response.block_size = BLOCK_SIZE
+    response['Content-Length'] = end - start + 1
+    response['Accept-Ranges'] = 'bytes'
+    if byte_range:
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    return response
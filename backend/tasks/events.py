@@ -0,0 +1,221 @@
+"""
+Real-time task, comment and membership events (``/api/events/``).
+
+Events are the rows of the sync change log (see ``tasks.sync``): every logged
+change of a task or comment, and every member joining or leaving a project, is
+pushed to the open event streams of the users who can see that project. An
+event only says what changed (and carries its sync token); clients fetch the
+data with ``/api/sync/``.
+
+A broadcaster fans events out to subscriptions, indexed by project and by user:
+
+- ``LocalBroadcaster`` publishes the changes committed by its own process.
+- ``ChangeLogBroadcaster`` polls the change log once per interval for the
+  whole process instead, so writes made by any worker reach every worker's
+  streams. Like sync tokens (see ``tasks.sync``), it only moves past changes
+  once they have settled, so one committing after a newer one is not missed.
+
+Each subscription buffers at most ``EVENTS_QUEUE_SIZE`` events. A consumer
+that falls that far behind is sent an ``overflow`` event and disconnected
+rather than buffering without bound; it resyncs and reconnects.
+"""
+import asyncio
+import json
+import threading
+from collections import defaultdict
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+STREAMED_MODELS = ('task', 'comment', 'member')
+
+
+def change_event(change):
+    """The event payload of a ``Change`` row"""
+    return {
+        'token': str(change.id),
+        'model': change.model,
+        'id': change.object_id,
+        'project': change.project_id,
+        'deleted': change.deleted,
+    }
+
+
+class Subscription:
+    """One event stream: a bounded queue fed from any thread, read on its event loop"""
+
+    def __init__(self, user_id, project_ids, queue_size):
+        self.user_id = user_id
+        self.project_ids = set(project_ids)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(queue_size)
+        self.overflowed = False
+
+    def put_many(self, events):
+        """Runs on the subscription's loop"""
+        for event in events:
+            if self.overflowed:
+                return
+            try:
+                self.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                self.overflowed = True
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class LocalBroadcaster:
+    """In-process fan-out of the changes committed by this process"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.by_project = defaultdict(set)
+        self.by_user = defaultdict(set)
+
+    def subscribe(self, user_id, project_ids):
+        """Open a subscription; must be called on the consumer's event loop"""
+        subscription = Subscription(user_id, project_ids, settings.EVENTS_QUEUE_SIZE)
+        with self.lock:
+            self.by_user[user_id].add(subscription)
+            for project_id in subscription.project_ids:
+                self.by_project[project_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            self.discard(self.by_user, subscription.user_id, subscription)
+            for project_id in subscription.project_ids:
+                self.discard(self.by_project, project_id, subscription)
+
+    @staticmethod
+    def discard(index, key, subscription):
+        subscriptions = index.get(key)
+        if subscriptions is not None:
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del index[key]
+
+    @property
+    def subscription_count(self):
+        with self.lock:
+            return sum(len(subscriptions) for subscriptions in self.by_user.values())
+
+    def committed(self, changes):
+        """Called with the ``Change`` rows of every committed transaction of this process"""
+        self.publish(changes)
+
+    def publish(self, changes):
+        """Deliver changes to the subscriptions that can see them; safe from any thread"""
+        pending = defaultdict(list)
+        with self.lock:
+            for change in changes:
+                if change.model not in STREAMED_MODELS:
+                    continue
+                if change.model == 'member':
+                    targets = self.by_user.get(change.object_id, ())
+                    for subscription in targets:
+                        self.update_membership(subscription, change.project_id, joined=not change.deleted)
+                else:
+                    targets = self.by_project.get(change.project_id, ())
+                event = change_event(change)
+                for subscription in targets:
+                    pending[subscription].append(event)
+        for subscription, events in pending.items():
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.put_many, events)
+            except RuntimeError:
+                # The consumer's loop is closed; it is unsubscribing
+                pass
+
+    def update_membership(self, subscription, project_id, joined):
+        if joined:
+            subscription.project_ids.add(project_id)
+            self.by_project[project_id].add(subscription)
+        else:
+            subscription.project_ids.discard(project_id)
+            self.discard(self.by_project, project_id, subscription)
+
+
+class ChangeLogBroadcaster(LocalBroadcaster):
+    """
+    Shared backend: one poller per process reads new change log rows and fans
+    them out, so every worker sees the writes of all workers.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.poller = None
+        # Every change up to last_id was published; newer ones published are in sent
+        self.last_id = None
+        self.sent = set()
+
+    def committed(self, changes):
+        # Picked up by the poller like every other worker's changes
+        pass
+
+    def subscribe(self, user_id, project_ids):
+        subscription = super().subscribe(user_id, project_ids)
+        if self.poller is None or self.poller.done():
+            self.poller = asyncio.get_running_loop().create_task(self.poll())
+        return subscription
+
+    async def poll(self):
+        from .models import Change
+        from .sync import current_token
+
+        if self.last_id is None:
+            self.last_id = await sync_to_async(current_token)()
+        while self.subscription_count:
+            # Read before the changes, so everything up to it is among them
+            settled = await sync_to_async(current_token)()
+            changes = await sync_to_async(list)(
+                Change.objects.filter(id__gt=self.last_id, model__in=STREAMED_MODELS).order_by('id')[:1000]
+            )
+            new = [change for change in changes if change.id not in self.sent]
+            if len(changes) == 1000:
+                settled = min(settled, changes[-1].id)
+            self.last_id = max(self.last_id, settled)
+            self.sent = {change.id for change in changes if change.id > self.last_id}
+            if new:
+                self.publish(new)
+            if len(changes) < 1000:
+                await asyncio.sleep(settings.EVENTS_POLL_INTERVAL)
+        # The next subscriber starts from the then current token
+        self.last_id = None
+        self.sent = set()
+
+
+_broadcaster = None
+
+
+def get_broadcaster():
+    global _broadcaster
+    if _broadcaster is None:
+        _broadcaster = import_string(settings.EVENTS_BACKEND)()
+    return _broadcaster
+
+
+def format_event(event, data, event_id=None):
+    """Encode one server-sent event"""
+    lines = [f'id: {event_id}'] if event_id is not None else []
+    lines += [f'event: {event}', f'data: {json.dumps(data)}']
+    return '\n'.join(lines) + '\n\n'
+
+
+async def event_stream(broadcaster, subscription, token):
+    """Server-sent events of one subscription, with heartbeats while idle"""
+    try:
+        yield format_event('ready', {'token': token})
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.get(), settings.EVENTS_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ': keepalive\n\n'
+                continue
+            if subscription.overflowed:
+                yield format_event('overflow', {'detail': 'Too many pending events; resync and reconnect'})
+                return
+            yield format_event('change', event, event_id=event['token'])
+    finally:
+        broadcaster.unsubscribe(subscription)
@@ -0,0 +1,226 @@
+"""
+Chunked import of tasks into a project from CSV or NDJSON
+(``/api/projects/{id}/import/`` and ``manage.py import_tasks``).
+
+The file is read line by line and handled ``IMPORT_CHUNK_SIZE`` records at a
+time, so its size does not matter. For each chunk, assignee emails and tag
+names are resolved with one query each, the rows are validated like
+``/api/tasks/bulk/`` items (see tasks.bulk), the tags missing for valid rows
+are created, and those rows are inserted in one transaction with
+``bulk_create`` and bulk M2M through-rows. Invalid rows are skipped and
+reported with their line number, so a fixed file of just the failed rows can
+be imported again.
+
+Columns (CSV header or NDJSON keys) are those of the export (tasks.export):
+``title``, ``description``, ``status``, ``priority``, ``due_date``, and
+``assignee_emails``/``tag_names`` or ``assignees``/``tags`` ids. CSV lists are
+separated with ``;``. Other columns are ignored.
+"""
+import codecs
+import csv
+import json
+import time
+from itertools import islice
+from users.models import User
+from .bulk import validate_items, check_references, create_tasks
+from .models import Tag
+from .sync import record_changes
+
+IMPORT_CHUNK_SIZE = 1000
+
+IMPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+TASK_FIELDS = ('title', 'description', 'status', 'priority', 'due_date')
+# List field -> what its entries may be
+LIST_FIELDS = {
+    'assignees': (str, int),
+    'tags': (str, int),
+    'assignee_emails': (str,),
+    'tag_names': (str,),
+}
+
+# Errors listed in an import result; the rest are only counted
+MAX_REPORTED_ERRORS = 100
+
+TAG_NAME_MAX_LENGTH = Tag._meta.get_field('name').max_length
+
+
+class ImportFormatError(Exception):
+    """The file as a whole cannot be read (unknown format, missing header)"""
+
+
+class ImportResult:
+    def __init__(self):
+        self.imported = 0
+        self.failed = 0
+        self.errors = []
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    @property
+    def rows_per_second(self):
+        rows = self.imported + self.failed
+        return rows / self.elapsed if self.elapsed else 0.0
+
+    def add_errors(self, errors):
+        self.failed += len(errors)
+        room = MAX_REPORTED_ERRORS - len(self.errors)
+        self.errors.extend({'line': line, 'errors': row_errors} for line, row_errors in errors[:max(room, 0)])
+
+    def as_dict(self):
+        return {
+            'imported': self.imported,
+            'failed': self.failed,
+            'errors': self.errors,
+            'elapsed': round(self.elapsed, 3),
+            'rows_per_second': round(self.rows_per_second, 1),
+        }
+
+
+def read_records(lines, import_format):
+    """
+    Yield ``(line number, record, error)`` for every record of the byte
+    ``lines`` of a CSV or NDJSON file
+    """
+    text = codecs.iterdecode(lines, 'utf-8-sig')
+    if import_format == 'csv':
+        reader = csv.DictReader(text)
+        if not reader.fieldnames or 'title' not in reader.fieldnames:
+            raise ImportFormatError('The CSV header must have a title column')
+        for record in reader:
+            yield reader.line_num, record, None
+    elif import_format == 'ndjson':
+        for line_number, line in enumerate(text, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                yield line_number, None, {'non_field_errors': ['Invalid JSON.']}
+                continue
+            if not isinstance(record, dict):
+                yield line_number, None, {'non_field_errors': ['Expected a JSON object.']}
+                continue
+            yield line_number, record, None
+    else:
+        raise ImportFormatError(f"format must be one of {', '.join(IMPORT_FORMATS)}")
+
+
+def to_item(record, project_id, errors):
+    """
+    A bulk item (see TaskBulkItemSerializer) from a CSV or NDJSON record; list
+    fields of the wrong shape are left out and reported in ``errors``
+    """
+    item = {'project': project_id}
+    for field in TASK_FIELDS:
+        value = record.get(field)
+        # Empty CSV cells leave the default
+        if value is not None and value != '':
+            item[field] = value
+    for field, types in LIST_FIELDS.items():
+        value = record.get(field)
+        if isinstance(value, str):
+            value = [part.strip() for part in value.split(';') if part.strip()]
+        elif value is not None and not (
+            isinstance(value, list)
+            and all(isinstance(part, types) and not isinstance(part, bool) for part in value)
+        ):
+            errors[field] = ['Expected a list of ids.' if int in types else 'Expected a list of strings.']
+            continue
+        if value:
+            item[field] = value
+    return item
+
+
+def resolve_names(items, errors):
+    """
+    Turn ``assignee_emails`` and ``tag_names`` into ids with one lookup each
+    for the chunk; unknown emails are row errors. Returns the names of each
+    item's tags that do not exist yet, created once the row turns out valid.
+    """
+    parsed = [item for item in items if item is not None]
+    emails = {email for item in parsed for email in item.get('assignee_emails', [])}
+    names = {name for item in parsed for name in item.get('tag_names', []) if len(name) <= TAG_NAME_MAX_LENGTH}
+    user_ids = dict(User.objects.filter(email__in=emails).order_by().values_list('email', 'id')) if emails else {}
+    tag_ids = dict(Tag.objects.filter(name__in=names).order_by().values_list('name', 'id')) if names else {}
+
+    missing_tags = []
+    for item, item_errors in zip(items, errors):
+        if item is None:
+            missing_tags.append([])
+            continue
+        emails = item.pop('assignee_emails', [])
+        names = item.pop('tag_names', [])
+        unknown = [email for email in emails if email not in user_ids]
+        if unknown:
+            item_errors['assignee_emails'] = [f'Unknown user "{email}".' for email in unknown]
+        if any(len(name) > TAG_NAME_MAX_LENGTH for name in names):
+            item_errors['tag_names'] = [f'Tag names can have at most {TAG_NAME_MAX_LENGTH} characters.']
+        if emails:
+            known = [user_ids[email] for email in emails if email in user_ids]
+            item['assignees'] = [*item.get('assignees', []), *known]
+        if names:
+            known = [tag_ids[name] for name in names if name in tag_ids]
+            item['tags'] = [*item.get('tags', []), *known]
+        missing_tags.append([name for name in names if name not in tag_ids])
+    return missing_tags
+
+
+def create_tags(names):
+    """Create the named tags; returns their ids by name"""
+    # Tags created concurrently by another import are ignored here and read back
+    Tag.objects.bulk_create([Tag(name=name) for name in sorted(names)], ignore_conflicts=True)
+    tag_ids = dict(Tag.objects.filter(name__in=names).order_by().values_list('name', 'id'))
+    # bulk_create() skips the signals that log new tags for sync
+    record_changes([('tag', tag_id, None, False) for tag_id in tag_ids.values()])
+    return tag_ids
+
+
+def import_chunk(user, project_id, records):
+    """Validate a chunk of records and create its valid rows; returns the created count and row errors"""
+    lines = [line for line, _, _ in records]
+    errors = [dict(error) if error else {} for _, _, error in records]
+    items = [
+        to_item(record, project_id, item_errors) if record is not None else None
+        for (_, record, _), item_errors in zip(records, errors)
+    ]
+    missing_tags = resolve_names(items, errors)
+
+    parsed = [index for index, item in enumerate(items) if item is not None]
+    validated, validation_errors = validate_items([items[index] for index in parsed])
+    check_references(user, validated, validation_errors)
+    for index, item_errors in zip(parsed, validation_errors):
+        errors[index].update(item_errors)
+
+    valid = [(index, item) for index, item in zip(parsed, validated) if not errors[index]]
+    names = {name for index, _ in valid for name in missing_tags[index]}
+    if names:
+        tag_ids = create_tags(names)
+        for index, item in valid:
+            if missing_tags[index]:
+                item['tags'] = [*item.get('tags', []), *(tag_ids[name] for name in missing_tags[index])]
+    if valid:
+        create_tasks(user, [item for _, item in valid])
+    return len(valid), [(line, item_errors) for line, item_errors in zip(lines, errors) if item_errors]
+
+
+def import_tasks(user, project_id, lines, import_format, chunk_size=None, progress=None):
+    """
+    Import the tasks of a CSV or NDJSON file (an iterable of byte lines) into
+    the project. ``progress(result)`` is called after every chunk.
+    """
+    result = ImportResult()
+    records = read_records(lines, import_format)
+    chunk_size = chunk_size or IMPORT_CHUNK_SIZE
+    while chunk := list(islice(records, chunk_size)):
+        imported, errors = import_chunk(user, project_id, chunk)
+        result.imported += imported
+        result.add_errors(errors)
+        result.elapsed = time.perf_counter() - result.started
+        if progress is not None:
+            progress(result)
+    result.elapsed = time.perf_counter() - result.started
+    return result
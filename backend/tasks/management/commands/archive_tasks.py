@@ -0,0 +1,40 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from tasks.archive import archivable_tasks, archive_tasks
+
+
+class Command(BaseCommand):
+    help = 'Move tasks that have been done or cancelled for a while to the archive tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.TASK_ARCHIVE_AFTER_DAYS,
+            help=f'Archive tasks closed for DAYS days (default: {settings.TASK_ARCHIVE_AFTER_DAYS})',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.TASK_ARCHIVE_BATCH_SIZE,
+            help=f'Tasks moved per transaction (default: {settings.TASK_ARCHIVE_BATCH_SIZE})',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only count the tasks that would be archived',
+        )
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            count = archivable_tasks(timezone.now() - timedelta(days=options['days'])).count()
+            self.stdout.write(f'{count} task(s) would be archived')
+            return
+
+        def progress(total):
+            self.stdout.write(f'{total} task(s) archived so far')
+
+        total = archive_tasks(options['days'], options['batch_size'], progress=progress)
+        self.stdout.write(self.style.SUCCESS(f'{total} task(s) archived'))
@@ -0,0 +1,169 @@
+import asyncio
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from django.test import override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from projects.models import Project
+from task_manager.asyncviews import read_urlconf
+from tasks.models import Change, Comment, Task
+from users.models import User
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare requests/sec and latency of the hot read endpoints (task list and '
+        'detail, comment list, project list) served by the viewsets through the WSGI '
+        'handler, with --workers sync workers, and by the async views through the ASGI '
+        'handler, both driven in this process by --concurrency clients. The benchmark '
+        'data is committed, then deleted.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000, help='Requests sent to each handler')
+        parser.add_argument('--concurrency', type=int, default=200, help='Concurrent clients')
+        parser.add_argument('--workers', type=int, default=4, help='Sync workers of the WSGI path')
+        parser.add_argument('--tasks', type=int, default=200, help='Tasks in the benchmark project')
+
+    def handle(self, *args, **options):
+        user = User.objects.create_user(
+            email='benchmark-async-reads@example.com', username='benchmark-async-reads', password=None
+        )
+        project = Project.objects.create(title='Async reads benchmark', owner=user)
+        try:
+            tasks = Task.objects.bulk_create([
+                Task(title=f'Task {number}', project=project, created_by=user)
+                for number in range(options['tasks'])
+            ])
+            Comment.objects.bulk_create([
+                Comment(content=f'Comment {number}', task=tasks[0], author=user) for number in range(20)
+            ])
+            urls = [
+                f'/api/tasks/?project={project.pk}',
+                f'/api/tasks/{tasks[0].pk}/',
+                f'/api/tasks/comments/?task={tasks[0].pk}',
+                '/api/projects/',
+            ]
+            authorization = f'Bearer {AccessToken.for_user(user)}'
+            with override_settings(ROOT_URLCONF=read_urlconf(use_async=False)):
+                wsgi = self.run_wsgi(urls, authorization, options)
+            with override_settings(ROOT_URLCONF=read_urlconf(use_async=True)):
+                asgi = async_to_sync(self.run_asgi)(urls, authorization, options)
+        finally:
+            project_id = project.pk
+            user.delete()
+            Change.objects.filter(project_id=project_id).delete()
+
+        self.stdout.write(
+            f"{options['requests']} requests per handler, {options['concurrency']} concurrent clients"
+        )
+        self.stdout.write(f"{'handler':<28}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+        for label, (latencies, elapsed) in [
+            (f"wsgi ({options['workers']} sync workers)", wsgi), ('asgi (async views)', asgi)
+        ]:
+            self.stdout.write(
+                f'{label:<28}{len(latencies) / elapsed:>10.1f}'
+                f'{percentile(latencies, 0.5) * 1000:>10.1f}{percentile(latencies, 0.99) * 1000:>10.1f}'
+            )
+
+    def get_host(self):
+        return next((host.lstrip('.') for host in settings.ALLOWED_HOSTS if host != '*'), 'localhost')
+
+    def check_status(self, status, url):
+        if status != 200:
+            raise CommandError(f'GET {url} returned {status}')
+
+    def run_wsgi(self, urls, authorization, options):
+        """Requests queue (first come, first served) for --workers threads, like for free sync workers"""
+        application = get_wsgi_application()
+        host = self.get_host()
+        count, concurrency = options['requests'], options['concurrency']
+
+        def handle(url):
+            path, _, query = url.partition('?')
+            environ = {
+                'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': query, 'SCRIPT_NAME': '',
+                'SERVER_NAME': host, 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+                'HTTP_HOST': host, 'HTTP_AUTHORIZATION': authorization,
+                'wsgi.input': BytesIO(), 'wsgi.errors': sys.stderr, 'wsgi.url_scheme': 'http',
+                'wsgi.version': (1, 0), 'wsgi.multithread': True, 'wsgi.multiprocess': False,
+                'wsgi.run_once': False,
+            }
+            statuses = []
+            response = application(environ, lambda status, headers: statuses.append(int(status[:3])))
+            try:
+                b''.join(response)
+            finally:
+                response.close()
+            return statuses[0]
+
+        with ThreadPoolExecutor(options['workers']) as workers, ThreadPoolExecutor(concurrency) as clients:
+            def get(url):
+                started = time.perf_counter()
+                status = workers.submit(handle, url).result()
+                latency = time.perf_counter() - started
+                self.check_status(status, url)
+                return latency
+
+            def client(number):
+                return [get(urls[index % len(urls)]) for index in range(number, count, concurrency)]
+
+            started = time.perf_counter()
+            results = list(clients.map(client, range(concurrency)))
+        latencies = [latency for client_latencies in results for latency in client_latencies]
+        return latencies, time.perf_counter() - started
+
+    async def run_asgi(self, urls, authorization, options):
+        """All clients share one event loop, like an ASGI worker"""
+        application = get_asgi_application()
+        host = self.get_host()
+        count, concurrency = options['requests'], options['concurrency']
+
+        async def get(url):
+            path, _, query = url.partition('?')
+            scope = {
+                'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+                'method': 'GET', 'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+                'query_string': query.encode(), 'root_path': '',
+                'headers': [(b'host', host.encode()), (b'authorization', authorization.encode())],
+                'client': ('127.0.0.1', 0), 'server': (host, 80),
+            }
+            statuses = []
+            request_sent = False
+
+            async def receive():
+                nonlocal request_sent
+                if not request_sent:
+                    request_sent = True
+                    return {'type': 'http.request', 'body': b'', 'more_body': False}
+                # The client stays connected; the handler stops listening once it has responded
+                await asyncio.Event().wait()
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    statuses.append(message['status'])
+
+            started = time.perf_counter()
+            await application(scope, receive, send)
+            latency = time.perf_counter() - started
+            self.check_status(statuses[0], url)
+            return latency
+
+        async def client(number):
+            return [await get(urls[index % len(urls)]) for index in range(number, count, concurrency)]
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*[client(number) for number in range(concurrency)])
+        latencies = [latency for client_latencies in results for latency in client_latencies]
+        return latencies, time.perf_counter() - started
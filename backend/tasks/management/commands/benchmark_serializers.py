@@ -0,0 +1,109 @@
+import statistics
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from projects.models import Project
+from projects.serializers import ProjectListSerializer, ProjectListRowSerializer
+from tasks.models import Task, Tag
+from tasks.serializers import TaskListSerializer, TaskListRowSerializer
+from users.models import User
+from users.serializers import UserSerializer, UserRowSerializer
+
+SIZES = (20, 100, 1000)
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the DRF list serializers with the .values()-based row serializers '
+        'at 20, 100 and 1000 rows. Benchmark data is created in a transaction that '
+        'is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per measurement (median is reported)')
+
+    def handle(self, *args, **options):
+        self.repeat = options['repeat']
+        self.stdout.write(f"{'serializer':<12}{'rows':>6}{'drf ms':>10}{'fast ms':>10}{'speedup':>9}")
+        try:
+            with transaction.atomic():
+                self.run()
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self):
+        renderer = JSONRenderer()
+        users = User.objects.bulk_create([
+            User(email=f'bench{i}@example.com', username=f'bench{i}') for i in range(max(SIZES))
+        ])
+        tags = Tag.objects.bulk_create([Tag(name=f'bench-{i}') for i in range(5)])
+        owner = users[0]
+        projects = Project.objects.bulk_create([
+            Project(title=f'Project {i}', owner=owner) for i in range(max(SIZES))
+        ])
+        project = projects[0]
+        tasks = Task.objects.bulk_create([
+            Task(title=f'Task {i}', description='Benchmark task', project=project, created_by=owner)
+            for i in range(max(SIZES))
+        ])
+        Task.assignees.through.objects.bulk_create([
+            Task.assignees.through(task_id=task.pk, user_id=user.pk)
+            for i, task in enumerate(tasks) for user in (users[i % 50], users[(i + 1) % 50])
+        ])
+        Task.tags.through.objects.bulk_create([
+            Task.tags.through(task_id=task.pk, tag_id=tags[i % 5].pk) for i, task in enumerate(tasks)
+        ])
+
+        for size in SIZES:
+            task_ids = [task.pk for task in tasks[:size]]
+            self.compare(
+                'task', size,
+                lambda: renderer.render(TaskListSerializer(
+                    Task.objects.filter(pk__in=task_ids).select_related('project')
+                    .prefetch_related('assignees', 'tags'),
+                    many=True
+                ).data),
+                lambda: self.render_rows(renderer, TaskListRowSerializer(), Task.objects.filter(pk__in=task_ids)),
+            )
+        for size in SIZES:
+            project_ids = [p.pk for p in projects[:size]]
+            self.compare(
+                'project', size,
+                lambda: renderer.render(ProjectListSerializer(
+                    Project.objects.filter(pk__in=project_ids).select_related('owner'), many=True
+                ).data),
+                lambda: self.render_rows(
+                    renderer, ProjectListRowSerializer(), Project.objects.filter(pk__in=project_ids)
+                ),
+            )
+        for size in SIZES:
+            user_ids = [user.pk for user in users[:size]]
+            self.compare(
+                'user', size,
+                lambda: renderer.render(UserSerializer(User.objects.filter(pk__in=user_ids), many=True).data),
+                lambda: self.render_rows(renderer, UserRowSerializer(), User.objects.filter(pk__in=user_ids)),
+            )
+
+    def render_rows(self, renderer, row_serializer, queryset):
+        return renderer.render(row_serializer.serialize(list(queryset.values(*row_serializer.columns))))
+
+    def measure(self, func):
+        timings = []
+        for _ in range(self.repeat):
+            start = time.perf_counter()
+            output = func()
+            timings.append(time.perf_counter() - start)
+        return statistics.median(timings) * 1000, output
+
+    def compare(self, name, size, drf, fast):
+        drf_ms, drf_output = self.measure(drf)
+        fast_ms, fast_output = self.measure(fast)
+        if drf_output != fast_output:
+            self.stderr.write(self.style.ERROR(f'{name} x{size}: outputs differ'))
+        self.stdout.write(f'{name:<12}{size:>6}{drf_ms:>10.2f}{fast_ms:>10.2f}{drf_ms / fast_ms:>8.1f}x')
@@ -0,0 +1,120 @@
+import asyncio
+import time
+import tracemalloc
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from django.core.signals import request_started, request_finished
+from django.db import close_old_connections, transaction
+from rest_framework_simplejwt.tokens import AccessToken
+from projects.models import Project
+from tasks.events import get_broadcaster
+from tasks.models import Change
+from users.models import User
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Open many idle /api/events/ streams against the ASGI application in this '
+        'process, then fan events out to all of them; reports the memory held per '
+        'idle connection and the fan-out latency. Test data is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--connections', type=int, default=2000, help='Concurrent event streams')
+        parser.add_argument('--events', type=int, default=10, help='Events fanned out to every stream')
+
+    def handle(self, *args, **options):
+        if options['events'] > settings.EVENTS_QUEUE_SIZE:
+            raise CommandError(f'--events must not exceed EVENTS_QUEUE_SIZE ({settings.EVENTS_QUEUE_SIZE})')
+        # Like the test client: keep the connection (and its transaction) across requests
+        request_started.disconnect(close_old_connections)
+        request_finished.disconnect(close_old_connections)
+        try:
+            with transaction.atomic():
+                user = User.objects.create_user(
+                    email='events-load-test@example.com', username='events-load-test', password=None
+                )
+                project = Project.objects.create(title='Events load test', owner=user)
+                async_to_sync(self.run)(str(AccessToken.for_user(user)), project.pk, options)
+                raise Rollback
+        except Rollback:
+            pass
+        finally:
+            request_started.connect(close_old_connections)
+            request_finished.connect(close_old_connections)
+
+    async def run(self, access_token, project_id, options):
+        count, event_count = options['connections'], options['events']
+        application = get_asgi_application()
+        host = next((host.lstrip('.') for host in settings.ALLOWED_HOSTS if host != '*'), 'localhost')
+        disconnect = asyncio.Event()
+        ready = [0]
+        received = [0]
+        all_ready = asyncio.Event()
+        all_received = asyncio.Event()
+
+        async def connection(number):
+            scope = {
+                'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+                'method': 'GET', 'scheme': 'http', 'path': '/api/events/', 'raw_path': b'/api/events/',
+                'query_string': f'access_token={access_token}'.encode(), 'root_path': '',
+                'headers': [(b'host', host.encode())], 'client': ('127.0.0.1', number), 'server': (host, 80),
+            }
+            request_sent = False
+
+            async def receive():
+                nonlocal request_sent
+                if not request_sent:
+                    request_sent = True
+                    return {'type': 'http.request', 'body': b'', 'more_body': False}
+                await disconnect.wait()
+                return {'type': 'http.disconnect'}
+
+            async def send(message):
+                if message['type'] == 'http.response.start' and message['status'] != 200:
+                    raise RuntimeError(f"Event stream failed with status {message['status']}")
+                body = message.get('body', b'')
+                if b'event: ready' in body:
+                    ready[0] += 1
+                    if ready[0] == count:
+                        all_ready.set()
+                if b'event: change' in body:
+                    received[0] += body.count(b'event: change')
+                    if received[0] == count * event_count:
+                        all_received.set()
+
+            await application(scope, receive, send)
+
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        tasks = [asyncio.create_task(connection(number)) for number in range(count)]
+        await all_ready.wait()
+        setup = time.perf_counter() - started
+        held = tracemalloc.get_traced_memory()[0] - baseline
+        tracemalloc.stop()
+        self.stdout.write(f'{count} idle streams open in {setup:.2f}s')
+        self.stdout.write(f'memory held: {held / 1024 / 1024:.1f} MiB ({held / count / 1024:.1f} KiB per stream)')
+
+        started = time.perf_counter()
+        get_broadcaster().publish([
+            Change(id=number, model='task', object_id=number, project_id=project_id)
+            for number in range(1, event_count + 1)
+        ])
+        if event_count:
+            await all_received.wait()
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f'{count * event_count} events delivered in {elapsed * 1000:.1f}ms '
+                f'({elapsed / event_count * 1000:.2f}ms per event fanned out to every stream)'
+            )
+
+        disconnect.set()
+        await asyncio.gather(*tasks)
+        self.stdout.write(self.style.SUCCESS(f'{get_broadcaster().subscription_count} subscriptions left open'))
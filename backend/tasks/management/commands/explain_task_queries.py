@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from tasks.filters import filter_tasks
+from tasks.models import Task
+
+
+# (description, query params, ordering) for every filter combination the task
+# list endpoint builds; each should be served by one of the indexes on Task.
+FILTER_COMBINATIONS = [
+    ('All tasks', {}, ['-created_at', 'id']),
+    ('Tasks of a project', {'project': '1'}, ['-created_at', 'id']),
+    ('Tasks of a project by status', {'project': '1', 'status': 'todo'}, ['-created_at']),
+    ('Tasks of a project by priority', {'project': '1', 'priority': 'high'}, ['-created_at']),
+    ('Tasks of a project by status and priority',
+     {'project': '1', 'status': 'todo', 'priority': 'high'}, ['-created_at']),
+    ('Tasks by status', {'status': 'todo'}, ['-created_at']),
+    ('Open tasks of a project by due date', {'project': '1', 'open': 'true'}, ['due_date']),
+    ('Tasks of a project by priority, then due date', {'project': '1'}, ['priority_rank', 'due_date']),
+    ('Tasks of a project assigned to a user', {'project': '1', 'assignee': '1'}, ['-created_at']),
+]
+
+
+class Command(BaseCommand):
+    help = 'Print the query plan for each filter combination of the task list endpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--analyze',
+            action='store_true',
+            help='Run EXPLAIN ANALYZE (PostgreSQL only)',
+        )
+
+    def handle(self, *args, **options):
+        explain_options = {}
+        if options['analyze'] and connection.vendor == 'postgresql':
+            explain_options['analyze'] = True
+
+        self.stdout.write(f'Database: {connection.vendor}')
+        for description, params, ordering in FILTER_COMBINATIONS:
+            queryset = filter_tasks(Task.objects.all(), params).order_by(*ordering)
+            self.stdout.write('')
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"{description} ({', '.join(f'{k}={v}' for k, v in params.items()) or 'no filters'}; "
+                f"ordering={','.join(ordering)})"
+            ))
+            self.stdout.write(queryset.explain(**explain_options))
@@ -0,0 +1,59 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from projects.membership import visible_project_ids
+from projects.models import Project
+from tasks.activity import buffered_activity
+from tasks.imports import IMPORT_FORMATS, ImportFormatError, import_tasks
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        'Import tasks into a project from a CSV or NDJSON file (see tasks.imports), '
+        'chunk by chunk, reporting progress in rows/sec and the rows that failed'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or NDJSON file')
+        parser.add_argument('--project', type=int, required=True, help='Id of the project to import into')
+        parser.add_argument('--user', required=True, help='Email of the user the tasks are created by')
+        parser.add_argument(
+            '--format', choices=list(IMPORT_FORMATS),
+            help='File format (default: from the file extension, else csv)',
+        )
+        parser.add_argument('--chunk-size', type=int, default=None, help='Rows validated and written at once')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(email=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"No user with email {options['user']}")
+        if not Project.objects.filter(pk=options['project'], deleted_at__isnull=True).exists():
+            raise CommandError(f"No project with id {options['project']}")
+        if options['project'] not in visible_project_ids(user):
+            raise CommandError(f"{user.email} is not a member of project {options['project']}")
+        import_format = options['format'] or ('ndjson' if options['path'].endswith(('.ndjson', '.jsonl')) else 'csv')
+
+        def progress(result):
+            self.stdout.write(
+                f'{result.imported + result.failed} rows read, {result.imported} imported, '
+                f'{result.failed} failed ({result.rows_per_second:.0f} rows/s)'
+            )
+
+        try:
+            with open(options['path'], 'rb') as file, buffered_activity(actor=user):
+                result = import_tasks(
+                    user, options['project'], file, import_format,
+                    chunk_size=options['chunk_size'], progress=progress
+                )
+        except (OSError, ImportFormatError) as e:
+            raise CommandError(str(e))
+
+        for error in result.errors:
+            self.stderr.write(f"line {error['line']}: {json.dumps(error['errors'])}")
+        if result.failed > len(result.errors):
+            self.stderr.write(f'... and {result.failed - len(result.errors)} more failed rows')
+        self.stdout.write(self.style.SUCCESS(
+            f'{result.imported} task(s) imported, {result.failed} failed in {result.elapsed:.1f}s '
+            f'({result.rows_per_second:.0f} rows/s)'
+        ))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from tasks.sync import prune_changes
+
+
+class Command(BaseCommand):
+    help = 'Delete old rows of the sync change log'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=30,
+            help='Keep changes from the last DAYS days (default: 30)',
+        )
+
+    def handle(self, *args, **options):
+        deleted = prune_changes(options['days'])
+        self.stdout.write(self.style.SUCCESS(f'{deleted} change(s) pruned'))
@@ -0,0 +1,21 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from tasks.models import AttachmentUpload
+
+
+class Command(BaseCommand):
+    help = 'Delete chunked attachment uploads (and their partial files) that stopped receiving chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hours',
+            type=int,
+            default=24,
+            help='Keep uploads that received a chunk in the last HOURS hours (default: 24)',
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options['hours'])
+        deleted, _ = AttachmentUpload.objects.filter(updated_at__lt=cutoff).delete()
+        self.stdout.write(self.style.SUCCESS(f'{deleted} upload(s) pruned'))
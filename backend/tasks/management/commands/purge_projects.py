@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from projects.models import Project
+from tasks.purge import purge_project
+
+
+class Command(BaseCommand):
+    help = 'Purge deleted projects now, for instance after their background jobs were lost'
+
+    def handle(self, *args, **options):
+        def progress(project, model, count):
+            self.stdout.write(f'Project {project.pk}: {count} {model._meta.verbose_name_plural} purged')
+
+        project_ids = list(Project.objects.filter(deleted_at__isnull=False).values_list('id', flat=True))
+        for project_id in project_ids:
+            purge_project(project_id, progress=progress)
+        self.stdout.write(self.style.SUCCESS(f'{len(project_ids)} project(s) purged'))
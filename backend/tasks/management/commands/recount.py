@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from tasks.counters import recount
+
+
+class Command(BaseCommand):
+    help = 'Repair the denormalized comment, attachment and task counters'
+
+    def handle(self, *args, **options):
+        for counter, repaired in recount().items():
+            self.stdout.write(f'{counter}: {repaired} row(s) repaired')
+        self.stdout.write(self.style.SUCCESS('Counters are up to date'))
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tasks", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(
+                fields=["task", "created_at", "id"], name="comments_task_created_id_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                fields=["-created_at", "id"], name="tasks_created_id_idx"
+            ),
+        ),
+    ]
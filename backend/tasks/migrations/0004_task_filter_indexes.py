@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:23
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0003_cursor_indexes"),
+        ("tasks", "0003_cursor_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                fields=["project", "-created_at", "id"], name="tasks_proj_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                fields=["project", "status", "-created_at"],
+                name="tasks_proj_status_created_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                fields=["project", "priority", "-created_at"],
+                name="tasks_proj_prio_created_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                fields=["status", "-created_at"], name="tasks_status_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                condition=models.Q(
+                    ("status__in", ("done", "cancelled")), _negated=True
+                ),
+                fields=["project", "due_date"],
+                name="tasks_open_proj_due_idx",
+            ),
+        ),
+    ]
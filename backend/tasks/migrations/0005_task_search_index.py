@@ -0,0 +1,17 @@
+from django.db import migrations
+
+
+def install_search_index(apps, schema_editor):
+    from tasks.search import install_search_index
+    install_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tasks", "0004_task_filter_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:28
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_of(model, field):
+    counts = (
+        model.objects.filter(**{field: OuterRef("pk")})
+        .order_by()
+        .values(field)
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    return Coalesce(Subquery(counts), 0)
+
+
+def fill_counters(apps, schema_editor):
+    Task = apps.get_model("tasks", "Task")
+    Project = apps.get_model("projects", "Project")
+    Task.objects.update(
+        comments_count=count_of(apps.get_model("tasks", "Comment"), "task"),
+        attachments_count=count_of(apps.get_model("tasks", "TaskAttachment"), "task"),
+    )
+    Project.objects.update(task_count=count_of(Task, "project"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0004_project_task_count"),
+        ("tasks", "0005_task_search_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="task",
+            name="attachments_count",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="task",
+            name="comments_count",
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:51
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Case, Value, When
+
+PRIORITY_RANKS = {"urgent": 0, "high": 1, "medium": 2, "low": 3}
+CLOSED_RANK_OFFSET = 4
+CLOSED_STATUSES = ("done", "cancelled")
+
+
+def fill_priority_rank(apps, schema_editor):
+    Task = apps.get_model("tasks", "Task")
+    Task.objects.update(
+        priority_rank=Case(
+            *[
+                When(priority=priority, then=Value(rank))
+                for priority, rank in PRIORITY_RANKS.items()
+            ],
+            default=Value(PRIORITY_RANKS["medium"]),
+        )
+        + Case(
+            When(status__in=CLOSED_STATUSES, then=Value(CLOSED_RANK_OFFSET)),
+            default=Value(0),
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0004_project_task_count"),
+        ("tasks", "0006_task_counters"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="task",
+            name="priority_rank",
+            field=models.PositiveSmallIntegerField(default=2, editable=False),
+        ),
+        migrations.RunPython(fill_priority_rank, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                fields=["project", "priority_rank", "due_date"],
+                name="tasks_proj_rank_due_idx",
+            ),
+        ),
+    ]
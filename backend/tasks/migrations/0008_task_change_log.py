@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tasks", "0007_task_priority_rank"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Change",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "model",
+                    models.CharField(
+                        choices=[
+                            ("task", "Task"),
+                            ("project", "Project"),
+                            ("comment", "Comment"),
+                            ("tag", "Tag"),
+                            ("member", "Project member"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("object_id", models.BigIntegerField()),
+                ("project_id", models.BigIntegerField(blank=True, null=True)),
+                ("deleted", models.BooleanField(default=False)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "db_table": "task_changes",
+                "ordering": ["id"],
+                "indexes": [
+                    models.Index(
+                        fields=["project_id", "id"], name="changes_project_seq_idx"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,191 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0004_project_task_count"),
+        ("tasks", "0009_attachment_blobs_and_uploads"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedAttachment",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                ("file", models.FileField(upload_to="task_attachments/")),
+                ("name", models.CharField(blank=True, max_length=255)),
+                ("uploaded_at", models.DateTimeField()),
+            ],
+            options={
+                "db_table": "archived_task_attachments",
+                "ordering": ["-uploaded_at"],
+            },
+        ),
+        migrations.CreateModel(
+            name="ArchivedComment",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                ("content", models.TextField()),
+                ("created_at", models.DateTimeField()),
+                ("updated_at", models.DateTimeField()),
+            ],
+            options={
+                "db_table": "archived_comments",
+                "ordering": ["created_at"],
+            },
+        ),
+        migrations.CreateModel(
+            name="ArchivedTask",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                ("title", models.CharField(max_length=200)),
+                ("description", models.TextField(blank=True, null=True)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("todo", "To Do"),
+                            ("in_progress", "In Progress"),
+                            ("review", "In Review"),
+                            ("done", "Done"),
+                            ("cancelled", "Cancelled"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "priority",
+                    models.CharField(
+                        choices=[
+                            ("low", "Low"),
+                            ("medium", "Medium"),
+                            ("high", "High"),
+                            ("urgent", "Urgent"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("priority_rank", models.PositiveSmallIntegerField()),
+                ("due_date", models.DateTimeField(blank=True, null=True)),
+                ("comments_count", models.IntegerField(default=0)),
+                ("attachments_count", models.IntegerField(default=0)),
+                ("created_at", models.DateTimeField()),
+                ("updated_at", models.DateTimeField()),
+                ("archived_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "db_table": "archived_tasks",
+                "ordering": ["-created_at"],
+            },
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                condition=models.Q(("status__in", ("done", "cancelled"))),
+                fields=["updated_at", "id"],
+                name="tasks_closed_updated_idx",
+            ),
+        ),
+        migrations.AddField(
+            model_name="archivedattachment",
+            name="blob",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="archived_attachments",
+                to="tasks.blob",
+            ),
+        ),
+        migrations.AddField(
+            model_name="archivedattachment",
+            name="uploaded_by",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddField(
+            model_name="archivedcomment",
+            name="author",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddField(
+            model_name="archivedtask",
+            name="assignees",
+            field=models.ManyToManyField(
+                blank=True,
+                related_name="archived_assigned_tasks",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddField(
+            model_name="archivedtask",
+            name="created_by",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddField(
+            model_name="archivedtask",
+            name="project",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="archived_tasks",
+                to="projects.project",
+            ),
+        ),
+        migrations.AddField(
+            model_name="archivedtask",
+            name="tags",
+            field=models.ManyToManyField(
+                blank=True, related_name="archived_tasks", to="tasks.tag"
+            ),
+        ),
+        migrations.AddField(
+            model_name="archivedcomment",
+            name="task",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="comments",
+                to="tasks.archivedtask",
+            ),
+        ),
+        migrations.AddField(
+            model_name="archivedattachment",
+            name="task",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="attachments",
+                to="tasks.archivedtask",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="archivedtask",
+            index=models.Index(
+                fields=["-created_at", "id"], name="archived_created_id_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="archivedtask",
+            index=models.Index(
+                fields=["project", "-created_at", "id"],
+                name="archived_proj_created_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,94 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:45
+
+import django.core.serializers.json
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tasks", "0010_task_archive"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Activity",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("project_id", models.BigIntegerField()),
+                ("task_id", models.BigIntegerField(blank=True, null=True)),
+                (
+                    "model",
+                    models.CharField(
+                        choices=[
+                            ("task", "Task"),
+                            ("comment", "Comment"),
+                            ("attachment", "Attachment"),
+                            ("member", "Project member"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("object_id", models.BigIntegerField()),
+                (
+                    "verb",
+                    models.CharField(
+                        choices=[
+                            ("created", "Created"),
+                            ("updated", "Updated"),
+                            ("deleted", "Deleted"),
+                            ("archived", "Archived"),
+                            ("restored", "Restored"),
+                            ("added", "Added"),
+                            ("removed", "Removed"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                (
+                    "changes",
+                    models.JSONField(
+                        default=dict,
+                        encoder=django.core.serializers.json.DjangoJSONEncoder,
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now, editable=False
+                    ),
+                ),
+                (
+                    "actor",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "activity",
+                "ordering": ["-created_at", "id"],
+                "indexes": [
+                    models.Index(
+                        fields=["project_id", "created_at"],
+                        name="activity_project_created_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:58
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+CLOSED_STATUSES = ("done", "cancelled")
+
+
+def fill_closed_at(apps, schema_editor):
+    # The last update is the best estimate of when existing tasks were closed
+    for name in ("Task", "ArchivedTask"):
+        model = apps.get_model("tasks", name)
+        model.objects.filter(status__in=CLOSED_STATUSES).update(closed_at=F("updated_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0005_project_deleted_at"),
+        ("tasks", "0011_activity_log"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="task",
+            name="tasks_closed_updated_idx",
+        ),
+        migrations.AddField(
+            model_name="archivedtask",
+            name="closed_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="task",
+            name="closed_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(fill_closed_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                condition=models.Q(("status__in", ("done", "cancelled"))),
+                fields=["closed_at", "id"],
+                name="tasks_closed_at_idx",
+            ),
+        ),
+    ]
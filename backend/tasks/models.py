@@ -1,7 +1,24 @@
+import uuid
 from django.db import models
 from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
 from projects.models import Project
 
+# Task statuses that count as finished work
+CLOSED_STATUSES = ('done', 'cancelled')
+
+# Sort key behind priority ordering: lower is more pressing, and closed tasks
+# rank below every open task (see Task.priority_rank)
+PRIORITY_RANKS = {'urgent': 0, 'high': 1, 'medium': 2, 'low': 3}
+CLOSED_RANK_OFFSET = len(PRIORITY_RANKS)
+
+
+def get_priority_rank(priority, status):
+    return PRIORITY_RANKS.get(priority, PRIORITY_RANKS['medium']) + (
+        CLOSED_RANK_OFFSET if status in CLOSED_STATUSES else 0
+    )
+
 
 class Tag(models.Model):
     """Tag model for categorizing tasks"""
@@ -27,6 +44,11 @@ class Task(models.Model):
         ('cancelled', 'Cancelled'),
     ]
 
+    CLOSED_STATUSES = CLOSED_STATUSES
+
+    # Fields whose changes are recorded in the activity log (see tasks.activity)
+    ACTIVITY_FIELDS = ('title', 'description', 'status', 'priority', 'due_date', 'project_id')
+
     PRIORITY_CHOICES = [
         ('low', 'Low'),
         ('medium', 'Medium'),
@@ -56,16 +78,101 @@ class Task(models.Model):
         null=True,
         related_name='created_tasks'
     )
+    # Derived from priority and status on save (and by tasks.bulk); what
+    # ?ordering=priority sorts on, since priority itself sorts alphabetically
+    priority_rank = models.PositiveSmallIntegerField(default=PRIORITY_RANKS['medium'], editable=False)
+    # Set when the status becomes closed and cleared on reopen, on save (and by
+    # tasks.bulk); what tasks.archive ages closed tasks by, unlike updated_at
+    # it does not move with comments or embedded tags and users
+    closed_at = models.DateTimeField(blank=True, null=True, editable=False)
+    # Denormalized counters, maintained by tasks.signals (repair with `recount`)
+    comments_count = models.IntegerField(default=0, editable=False)
+    attachments_count = models.IntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = 'tasks'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', 'id'], name='tasks_created_id_idx'),
+            # Project task lists, optionally narrowed by status or priority
+            models.Index(fields=['project', '-created_at', 'id'], name='tasks_proj_created_idx'),
+            models.Index(fields=['project', 'status', '-created_at'], name='tasks_proj_status_created_idx'),
+            models.Index(fields=['project', 'priority', '-created_at'], name='tasks_proj_prio_created_idx'),
+            models.Index(fields=['status', '-created_at'], name='tasks_status_created_idx'),
+            # Open tasks of a project ordered by due date (?open=true&ordering=due_date)
+            models.Index(
+                fields=['project', 'due_date'],
+                name='tasks_open_proj_due_idx',
+                condition=~models.Q(status__in=CLOSED_STATUSES),
+            ),
+            # "What next" view: most pressing first, then earliest due (?ordering=-priority,due_date)
+            models.Index(fields=['project', 'priority_rank', 'due_date'], name='tasks_proj_rank_due_idx'),
+            # Closed tasks by age, for archival (see tasks.archive)
+            models.Index(
+                fields=['closed_at', 'id'],
+                name='tasks_closed_at_idx',
+                condition=models.Q(status__in=CLOSED_STATUSES),
+            ),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.project.title}"
 
+    def update_priority_rank(self):
+        self.priority_rank = get_priority_rank(self.priority, self.status)
+
+    def update_closed_at(self, now=None):
+        if self.status not in CLOSED_STATUSES:
+            self.closed_at = None
+        elif self.closed_at is None:
+            self.closed_at = now or timezone.now()
+
+    def save(self, *args, **kwargs):
+        self.update_priority_rank()
+        self.update_closed_at()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'priority', 'status'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'priority_rank'}
+        if update_fields is not None and 'status' in update_fields:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'closed_at'}
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the loaded project so a move can update both projects' task_count
+        if 'project_id' in field_names:
+            instance._loaded_project_id = instance.project_id
+        # The loaded state the activity log diffs saves against
+        instance._loaded_values = {name: getattr(instance, name) for name in cls.ACTIVITY_FIELDS if name in field_names}
+        return instance
+
+
+def blob_path(blob, filename):
+    """Blobs are stored under their digest, fanned out over 256 directories"""
+    return f'task_attachments/blobs/{blob.sha256[:2]}/{blob.sha256}'
+
+
+class Blob(models.Model):
+    """
+    Content-addressed attachment file, shared by every attachment with the
+    same content (see tasks.uploads). ``ref_count`` counts those attachments;
+    the blob and its file are deleted when it drops to zero.
+    """
+    sha256 = models.CharField(max_length=64, unique=True)
+    file = models.FileField(upload_to=blob_path)
+    size = models.BigIntegerField()
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'attachment_blobs'
+
+    def __str__(self):
+        return self.sha256
+
 
 class TaskAttachment(models.Model):
     """Model for task file attachments"""
@@ -74,7 +181,17 @@ class TaskAttachment(models.Model):
         on_delete=models.CASCADE,
         related_name='attachments'
     )
+    # Points at the blob's file; attachments from before blobs have no blob
     file = models.FileField(upload_to='task_attachments/')
+    blob = models.ForeignKey(
+        Blob,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='attachments'
+    )
+    # The uploaded file's name, since blob files are named by their digest
+    name = models.CharField(max_length=255, blank=True)
     uploaded_by = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.SET_NULL,
@@ -90,8 +207,40 @@ class TaskAttachment(models.Model):
         return f"Attachment for {self.task.title}"
 
 
+class AttachmentUpload(models.Model):
+    """A resumable, chunked attachment upload in progress (see tasks.uploads)"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    task = models.ForeignKey(
+        Task,
+        on_delete=models.CASCADE,
+        related_name='uploads'
+    )
+    uploaded_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='attachment_uploads'
+    )
+    file_name = models.CharField(max_length=255)
+    size = models.BigIntegerField()
+    # Bytes received so far; the next chunk must start here
+    offset = models.BigIntegerField(default=0)
+    # Digest announced by the client, checked when the upload completes
+    sha256 = models.CharField(max_length=64, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'attachment_uploads'
+        ordering = ['created_at']
+
+    def __str__(self):
+        return f"Upload of {self.file_name} ({self.offset}/{self.size})"
+
+
 class Comment(models.Model):
     """Comment model for tasks"""
+    ACTIVITY_FIELDS = ('content',)
+
     task = models.ForeignKey(
         Task,
         on_delete=models.CASCADE,
@@ -109,6 +258,207 @@ class Comment(models.Model):
     class Meta:
         db_table = 'comments'
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['task', 'created_at', 'id'], name='comments_task_created_id_idx'),
+        ]
 
     def __str__(self):
         return f"Comment by {self.author.email} on {self.task.title}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = {name: getattr(instance, name) for name in cls.ACTIVITY_FIELDS if name in field_names}
+        return instance
+
+
+class ArchivedTask(models.Model):
+    """
+    A closed task moved out of the ``tasks`` table by tasks.archive, under its
+    original id so that it can be restored as it was. Its comments and
+    attachments are archived along with it.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    title = models.CharField(max_length=200)
+    description = models.TextField(blank=True, null=True)
+    project = models.ForeignKey(
+        Project,
+        on_delete=models.CASCADE,
+        related_name='archived_tasks'
+    )
+    status = models.CharField(max_length=20, choices=Task.STATUS_CHOICES)
+    priority = models.CharField(max_length=20, choices=Task.PRIORITY_CHOICES)
+    priority_rank = models.PositiveSmallIntegerField()
+    due_date = models.DateTimeField(blank=True, null=True)
+    closed_at = models.DateTimeField(blank=True, null=True)
+    assignees = models.ManyToManyField(
+        settings.AUTH_USER_MODEL,
+        related_name='archived_assigned_tasks',
+        blank=True
+    )
+    tags = models.ManyToManyField(Tag, related_name='archived_tasks', blank=True)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='+'
+    )
+    comments_count = models.IntegerField(default=0)
+    attachments_count = models.IntegerField(default=0)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'archived_tasks'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', 'id'], name='archived_created_id_idx'),
+            models.Index(fields=['project', '-created_at', 'id'], name='archived_proj_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.title} (archived)"
+
+
+class ArchivedAttachment(models.Model):
+    """An attachment of an archived task; it keeps its reference to the blob"""
+    id = models.BigIntegerField(primary_key=True)
+    task = models.ForeignKey(
+        ArchivedTask,
+        on_delete=models.CASCADE,
+        related_name='attachments'
+    )
+    file = models.FileField(upload_to='task_attachments/')
+    blob = models.ForeignKey(
+        Blob,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='archived_attachments'
+    )
+    name = models.CharField(max_length=255, blank=True)
+    uploaded_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='+'
+    )
+    uploaded_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'archived_task_attachments'
+        ordering = ['-uploaded_at']
+
+    def __str__(self):
+        return f"Attachment for {self.task.title} (archived)"
+
+
+class ArchivedComment(models.Model):
+    """A comment of an archived task"""
+    id = models.BigIntegerField(primary_key=True)
+    task = models.ForeignKey(
+        ArchivedTask,
+        on_delete=models.CASCADE,
+        related_name='comments'
+    )
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    content = models.TextField()
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'archived_comments'
+        ordering = ['created_at']
+
+    def __str__(self):
+        return f"Comment by {self.author.email} on {self.task.title} (archived)"
+
+
+class Change(models.Model):
+    """
+    Append-only change log behind ``/api/sync/`` (see tasks.sync): one row per
+    create, update or delete of a synced object. The auto-incrementing id is
+    the change sequence that sync tokens refer to.
+    """
+    MODEL_CHOICES = [
+        ('task', 'Task'),
+        ('project', 'Project'),
+        ('comment', 'Comment'),
+        ('tag', 'Tag'),
+        ('member', 'Project member'),
+    ]
+
+    model = models.CharField(max_length=10, choices=MODEL_CHOICES)
+    # For "member" rows, the id of the user who joined the project
+    object_id = models.BigIntegerField()
+    # The project the change is visible through; null for global objects (tags)
+    project_id = models.BigIntegerField(blank=True, null=True)
+    deleted = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'task_changes'
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['project_id', 'id'], name='changes_project_seq_idx'),
+        ]
+
+    def __str__(self):
+        return f"{'Delete' if self.deleted else 'Change'} {self.model} {self.object_id}"
+
+
+class Activity(models.Model):
+    """
+    Append-only activity log behind ``/api/projects/{id}/activity/`` (see
+    tasks.activity): who created, changed or deleted what in a project, with
+    the changed fields' old and new values.
+    """
+    MODEL_CHOICES = [
+        ('task', 'Task'),
+        ('comment', 'Comment'),
+        ('attachment', 'Attachment'),
+        ('member', 'Project member'),
+    ]
+
+    VERB_CHOICES = [
+        ('created', 'Created'),
+        ('updated', 'Updated'),
+        ('deleted', 'Deleted'),
+        ('archived', 'Archived'),
+        ('restored', 'Restored'),
+        ('added', 'Added'),
+        ('removed', 'Removed'),
+    ]
+
+    # Plain ids, like Change: rows are never touched by deletes of what they describe
+    project_id = models.BigIntegerField()
+    task_id = models.BigIntegerField(blank=True, null=True)
+    model = models.CharField(max_length=10, choices=MODEL_CHOICES)
+    # For "member" rows, the id of the user who joined or left the project
+    object_id = models.BigIntegerField()
+    verb = models.CharField(max_length=10, choices=VERB_CHOICES)
+    actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='+'
+    )
+    # {field: [old, new]}, or {relation: {"added": [ids], "removed": [ids]}}
+    changes = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    # When the change happened, not when the buffered row was written
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+
+    class Meta:
+        db_table = 'activity'
+        ordering = ['-created_at', 'id']
+        indexes = [
+            models.Index(fields=['project_id', 'created_at'], name='activity_project_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.model} {self.object_id} {self.verb}"
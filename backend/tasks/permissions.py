@@ -1,4 +1,5 @@
 from rest_framework import permissions
+from projects.membership import can_see_project
 
 
 class IsTaskProjectMember(permissions.BasePermission):
@@ -7,8 +8,7 @@ class IsTaskProjectMember(permissions.BasePermission):
     """
 
     def has_object_permission(self, request, view, obj):
-        project = obj.project
-        return project.owner == request.user or request.user in project.members.all()
+        return can_see_project(request.user, obj.project_id)
 
     def has_permission(self, request, view):
         """
@@ -28,8 +28,7 @@ class IsCommentAuthor(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         # Read permissions are allowed to project members
         if request.method in permissions.SAFE_METHODS:
-            project = obj.task.project
-            return project.owner == request.user or request.user in project.members.all()
+            return can_see_project(request.user, obj.task.project_id)
         
         # Write permissions are only allowed to the comment author
         return obj.author == request.user
@@ -47,8 +46,7 @@ class IsAttachmentTaskProjectMember(permissions.BasePermission):
     """
 
     def has_object_permission(self, request, view, obj):
-        project = obj.task.project
-        return project.owner == request.user or request.user in project.members.all()
+        return can_see_project(request.user, obj.task.project_id)
 
     def has_permission(self, request, view):
         """
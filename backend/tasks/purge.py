@@ -0,0 +1,95 @@
+"""
+Background deletion of projects.
+
+Deleting a project only marks it deleted (``deleted_at``): it disappears for
+everyone at once, and a job (see jobs.queue) purges its tasks, its archived
+tasks, then its activity log, ``PROJECT_PURGE_BATCH_SIZE`` at a time and one transaction
+each, before deleting the project row itself. A job stops after
+``PROJECT_PURGE_BATCHES_PER_JOB`` batches and queues its continuation, so a
+big project never holds locks for long nor keeps a worker past
+``JOBS_TIMEOUT``, and other jobs get their turn in between.
+
+Every batch is deleted as part of the project's cascade (the project is the
+collector's origin), so the signals skip per-task counters and change log
+rows, while attachment blobs are still released and their files deleted
+once the batch commits, as are the files of attachments from before blobs.
+``manage.py purge_projects`` finishes purges whose jobs were lost.
+"""
+from django.conf import settings
+from django.db import router, transaction
+from django.db.models.deletion import Collector
+from django.utils import timezone
+from jobs.queue import enqueue
+from projects.membership import bump_membership_version
+from projects.models import Project
+from .models import Task, ArchivedTask, Activity
+
+# Purged in this order; tasks are the root of a cascade over their comments and attachments
+PURGED_MODELS = (Task, ArchivedTask, Activity)
+
+
+def delete_project(project):
+    """Mark the project deleted, hiding it from its members, and queue the purge"""
+    with transaction.atomic():
+        project.deleted_at = timezone.now()
+        Project.objects.filter(pk=project.pk).update(deleted_at=project.deleted_at)
+        user_ids = [project.owner_id, *project.members.values_list('id', flat=True)]
+        enqueue(purge_project_job, args=[project.pk])
+        # After the commit, so the visible ids cannot be cached again from the old state
+        transaction.on_commit(lambda: bump_membership_version(*user_ids))
+
+
+def purge_batch(project, model, batch_size):
+    """Delete up to ``batch_size`` of the project's ``model`` rows and everything under them; returns how many"""
+    with transaction.atomic():
+        ids = list(
+            model.objects.filter(project_id=project.pk).order_by('id').values_list('id', flat=True)[:batch_size]
+        )
+        if ids:
+            collector = Collector(using=router.db_for_write(model), origin=project)
+            collector.collect(model.objects.filter(id__in=ids))
+            collector.delete()
+    return len(ids)
+
+
+def purge_project(project_id, max_batches=None, progress=None):
+    """
+    Purge a deleted project, at most ``max_batches`` batches of it;
+    ``progress(project, model, count)`` is called after every batch.
+    Returns whether the project is gone.
+    """
+    project = Project.objects.filter(pk=project_id, deleted_at__isnull=False).first()
+    if project is None:
+        return True
+    batches = 0
+    for model in PURGED_MODELS:
+        while True:
+            if max_batches is not None and batches >= max_batches:
+                return False
+            purged = purge_batch(project, model, settings.PROJECT_PURGE_BATCH_SIZE)
+            if not purged:
+                break
+            batches += 1
+            if progress is not None:
+                progress(project, model, purged)
+    # Only the members are left to cascade
+    project.delete()
+    return True
+
+
+def purge_project_job(project_id):
+    """Job: purge the next batches of a deleted project and queue the rest"""
+    if not purge_project(project_id, settings.PROJECT_PURGE_BATCHES_PER_JOB):
+        enqueue(purge_project_job, args=[project_id])
+
+
+def purge_progress(project):
+    """How far the purge of a deleted project has got"""
+    return {
+        'id': project.pk,
+        'deleted_at': project.deleted_at,
+        # Not decremented by the purge: the number of tasks when the project was deleted
+        'task_count': project.task_count,
+        'tasks_remaining': Task.objects.filter(project_id=project.pk).count(),
+        'archived_tasks_remaining': ArchivedTask.objects.filter(project_id=project.pk).count(),
+    }
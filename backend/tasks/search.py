@@ -0,0 +1,189 @@
+"""
+Full-text search backends for tasks.
+
+``get_search_backend()`` picks the best backend for the database in use:
+
+- ``SQLiteFTSBackend``: an FTS5 virtual table (``tasks_fts``) over the tasks
+  table, kept in sync by triggers, ranked with ``bm25()``.
+- ``PostgresSearchBackend``: a generated ``tsvector`` column on the tasks table
+  with a GIN index, ranked with ``ts_rank()``.
+- ``IcontainsSearchBackend``: the old ``LIKE '%term%'`` behaviour, used when
+  neither of the above is available.
+
+Set ``TASK_SEARCH_BACKEND`` to a dotted path to force a backend.
+"""
+import re
+from django.conf import settings
+from django.db import connection, DatabaseError
+from django.db.models import BooleanField, Q
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+SEARCH_TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def search_terms(query):
+    """Split a search string into plain word tokens (no query syntax)."""
+    return SEARCH_TERM_RE.findall(query)
+
+
+class IcontainsSearchBackend:
+    """Case-insensitive substring match on title and description (no ranking)."""
+
+    def is_available(self, connection):
+        return True
+
+    def install(self, connection):
+        pass
+
+    def search(self, queryset, query):
+        condition = Q()
+        for term in query.split():
+            condition &= Q(title__icontains=term) | Q(description__icontains=term)
+        return queryset.filter(condition)
+
+
+class SQLiteFTSBackend:
+    """FTS5 external-content table over ``tasks``, kept in sync by triggers."""
+    vendor = 'sqlite'
+
+    install_sql = [
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+            title, description, content='tasks', content_rowid='id'
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks BEGIN
+            INSERT INTO tasks_fts(rowid, title, description)
+            VALUES (new.id, new.title, new.description);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks BEGIN
+            INSERT INTO tasks_fts(tasks_fts, rowid, title, description)
+            VALUES ('delete', old.id, old.title, old.description);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS tasks_fts_update AFTER UPDATE OF title, description ON tasks BEGIN
+            INSERT INTO tasks_fts(tasks_fts, rowid, title, description)
+            VALUES ('delete', old.id, old.title, old.description);
+            INSERT INTO tasks_fts(rowid, title, description)
+            VALUES (new.id, new.title, new.description);
+        END
+        """,
+    ]
+
+    def is_available(self, connection):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT COUNT(*) FROM sqlite_master WHERE name IN ('tasks_fts', 'tasks_fts_insert')"
+            )
+            return cursor.fetchone()[0] == 2
+
+    def install(self, connection):
+        """
+        Create the FTS table and triggers if missing. Idempotent; it also runs
+        after every migrate because SQLite table rebuilds drop the triggers.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE name = 'tasks_fts_insert'")
+            had_triggers = cursor.fetchone()[0] == 1
+            try:
+                for sql in self.install_sql:
+                    cursor.execute(sql)
+            except DatabaseError:
+                # SQLite built without FTS5; searches fall back to icontains
+                return
+            if not had_triggers:
+                cursor.execute("INSERT INTO tasks_fts(tasks_fts) VALUES ('rebuild')")
+
+    def match_expression(self, query):
+        # Quote every term so user input never reaches the FTS5 query syntax,
+        # and prefix-match the terms so results update while the user types.
+        return ' '.join('"{}"*'.format(term) for term in search_terms(query))
+
+    def search(self, queryset, query):
+        match = self.match_expression(query)
+        if not match:
+            return queryset
+        return queryset.filter(
+            id__in=RawSQL('SELECT rowid FROM tasks_fts WHERE tasks_fts MATCH %s', [match])
+        ).annotate(
+            # bm25() is lower-is-better; negate so higher search_rank is better
+            search_rank=RawSQL(
+                'SELECT -bm25(tasks_fts) FROM tasks_fts WHERE tasks_fts MATCH %s AND rowid = tasks.id',
+                [match]
+            )
+        )
+
+
+class PostgresSearchBackend:
+    """Generated, weighted ``tsvector`` column on ``tasks`` with a GIN index."""
+    vendor = 'postgresql'
+
+    install_sql = [
+        """
+        ALTER TABLE tasks ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(description, '')), 'B')
+        ) STORED
+        """,
+        "CREATE INDEX IF NOT EXISTS tasks_search_vector_idx ON tasks USING gin (search_vector)",
+    ]
+
+    def is_available(self, connection):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT COUNT(*) FROM information_schema.columns "
+                "WHERE table_name = 'tasks' AND column_name = 'search_vector'"
+            )
+            return cursor.fetchone()[0] == 1
+
+    def install(self, connection):
+        with connection.cursor() as cursor:
+            for sql in self.install_sql:
+                cursor.execute(sql)
+
+    def tsquery(self, query):
+        return ' & '.join('{}:*'.format(term) for term in search_terms(query))
+
+    def search(self, queryset, query):
+        tsquery = self.tsquery(query)
+        if not tsquery:
+            return queryset
+        return queryset.filter(
+            RawSQL("tasks.search_vector @@ to_tsquery('english', %s)", [tsquery], output_field=BooleanField())
+        ).annotate(
+            search_rank=RawSQL("ts_rank(tasks.search_vector, to_tsquery('english', %s))", [tsquery])
+        )
+
+
+BACKENDS = [SQLiteFTSBackend, PostgresSearchBackend]
+
+_available_backends = {}
+
+
+def install_search_index(connection):
+    """Install the full-text index for the connection's database, if supported."""
+    for backend_class in BACKENDS:
+        if backend_class.vendor == connection.vendor:
+            backend_class().install(connection)
+    _available_backends.pop(connection.alias, None)
+
+
+def get_search_backend():
+    """Return the search backend to use for the default database connection."""
+    backend_path = getattr(settings, 'TASK_SEARCH_BACKEND', None)
+    if backend_path:
+        return import_string(backend_path)()
+
+    if connection.alias not in _available_backends:
+        backend = IcontainsSearchBackend()
+        for backend_class in BACKENDS:
+            if backend_class.vendor == connection.vendor and backend_class().is_available(connection):
+                backend = backend_class()
+        _available_backends[connection.alias] = backend
+    return _available_backends[connection.alias]
@@ -1,10 +1,17 @@
+import re
 from rest_framework import serializers
-from .models import Task, Tag, TaskAttachment, Comment
-from users.serializers import UserSerializer
-from projects.serializers import ProjectListSerializer
-
-
-class TagSerializer(serializers.ModelSerializer):
+from .models import (
+    Task, Tag, TaskAttachment, AttachmentUpload, Comment,
+    ArchivedTask, ArchivedAttachment, ArchivedComment, Activity
+)
+from users.models import User
+from users.serializers import UserSerializer, UserRowSerializer
+from projects.serializers import ProjectListSerializer, ProjectListRowSerializer
+from task_manager.fieldsets import DynamicFieldsMixin
+from task_manager.fastserializers import RowSerializer, related_ordering
+
+
+class TagSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for Tag model"""
     class Meta:
         model = Tag
@@ -12,40 +19,55 @@ class TagSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'created_at')
 
 
-class TaskAttachmentSerializer(serializers.ModelSerializer):
+class TaskAttachmentSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for TaskAttachment model"""
-    uploaded_by_detail = UserSerializer(source='uploaded_by', read_only=True)
     file_name = serializers.SerializerMethodField()
 
     class Meta:
         model = TaskAttachment
-        fields = ('id', 'file', 'file_name', 'uploaded_by', 'uploaded_by_detail', 'uploaded_at')
-        read_only_fields = ('id', 'uploaded_by_detail', 'uploaded_at')
+        fields = ('id', 'task', 'file', 'file_name', 'uploaded_by', 'uploaded_by_detail', 'uploaded_at')
+        read_only_fields = ('id', 'uploaded_by', 'uploaded_by_detail', 'uploaded_at')
+        expandable_fields = {
+            'uploaded_by_detail': (UserSerializer, {'source': 'uploaded_by', 'read_only': True}),
+        }
 
     def get_file_name(self, obj):
+        # Blob files are named by their digest; the uploaded name is kept on the attachment
+        if obj.name:
+            return obj.name
         if obj.file:
             return obj.file.name.split('/')[-1]
         return None
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class AttachmentUploadSerializer(serializers.ModelSerializer):
+    """Serializer for chunked attachment uploads in progress"""
+
+    class Meta:
+        model = AttachmentUpload
+        fields = ('id', 'task', 'file_name', 'size', 'offset', 'sha256', 'created_at', 'updated_at')
+        read_only_fields = ('id', 'offset', 'created_at', 'updated_at')
+
+    def validate_sha256(self, value):
+        if value and not re.fullmatch(r'[0-9a-fA-F]{64}', value):
+            raise serializers.ValidationError('Expected a hex SHA-256 digest')
+        return value.lower()
+
+
+class CommentSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for Comment model"""
-    author_detail = UserSerializer(source='author', read_only=True)
 
     class Meta:
         model = Comment
         fields = ('id', 'content', 'task', 'author', 'author_detail', 'created_at', 'updated_at')
         read_only_fields = ('id', 'author', 'author_detail', 'created_at', 'updated_at')
+        expandable_fields = {
+            'author_detail': (UserSerializer, {'source': 'author', 'read_only': True}),
+        }
 
 
-class TaskSerializer(serializers.ModelSerializer):
+class TaskSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for Task model with nested relationships"""
-    assignees_detail = UserSerializer(source='assignees', many=True, read_only=True)
-    tags_detail = TagSerializer(source='tags', many=True, read_only=True)
-    created_by_detail = UserSerializer(source='created_by', read_only=True)
-    project_detail = ProjectListSerializer(source='project', read_only=True)
-    comments_count = serializers.IntegerField(source='comments.count', read_only=True)
-    attachments_count = serializers.IntegerField(source='attachments.count', read_only=True)
 
     class Meta:
         model = Task
@@ -55,13 +77,19 @@ class TaskSerializer(serializers.ModelSerializer):
             'tags', 'tags_detail', 'created_by', 'created_by_detail',
             'comments_count', 'attachments_count', 'created_at', 'updated_at'
         )
-        read_only_fields = ('id', 'created_by', 'created_at', 'updated_at')
+        read_only_fields = (
+            'id', 'created_by', 'comments_count', 'attachments_count', 'created_at', 'updated_at'
+        )
+        expandable_fields = {
+            'project_detail': (ProjectListSerializer, {'source': 'project', 'read_only': True}),
+            'assignees_detail': (UserSerializer, {'source': 'assignees', 'many': True, 'read_only': True}),
+            'tags_detail': (TagSerializer, {'source': 'tags', 'many': True, 'read_only': True}),
+            'created_by_detail': (UserSerializer, {'source': 'created_by', 'read_only': True}),
+        }
 
 
-class TaskListSerializer(serializers.ModelSerializer):
+class TaskListSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Lightweight serializer for task lists"""
-    assignees_detail = UserSerializer(source='assignees', many=True, read_only=True)
-    tags_detail = TagSerializer(source='tags', many=True, read_only=True)
     project_title = serializers.CharField(source='project.title', read_only=True)
 
     class Meta:
@@ -72,12 +100,132 @@ class TaskListSerializer(serializers.ModelSerializer):
             'tags_detail', 'created_at', 'updated_at'
         )
         read_only_fields = ('id', 'created_at', 'updated_at')
+        # project_detail and created_by_detail are only rendered on ?expand=
+        expandable_fields = TaskSerializer.Meta.expandable_fields
+
+
+class TagRowSerializer(RowSerializer):
+    """Read-only fast path for TagSerializer (see task_manager.fastserializers)"""
+    serializer_class = TagSerializer
+    value_fields = {'id': 'id', 'name': 'name', 'color': 'color'}
+    datetime_fields = {'created_at': 'created_at'}
+
+
+class TaskListRowSerializer(RowSerializer):
+    """Read-only fast path for TaskListSerializer (see task_manager.fastserializers)"""
+    serializer_class = TaskListSerializer
+    value_fields = {
+        'id': 'id', 'title': 'title', 'description': 'description', 'project': 'project_id',
+        'project_title': 'project__title', 'status': 'status', 'priority': 'priority',
+    }
+    datetime_fields = {'due_date': 'due_date', 'created_at': 'created_at', 'updated_at': 'updated_at'}
+    nested_fields = {
+        'project_detail': (ProjectListRowSerializer, 'project'),
+        'created_by_detail': (UserRowSerializer, 'created_by'),
+    }
+    many_fields = ('assignees_detail', 'tags_detail')
+
+    def get_many_querysets(self, ids):
+        querysets = {}
+        if 'assignees_detail' in self.field_names:
+            users = UserRowSerializer(prefix='user__', context=self.context)
+            rows = (
+                Task.assignees.through.objects.filter(task_id__in=ids)
+                .order_by(*related_ordering(User, 'user'))
+                .values('task_id', *users.columns)
+            )
+            querysets['assignees_detail'] = (rows, 'task_id', users)
+        if 'tags_detail' in self.field_names:
+            tags = TagRowSerializer(prefix='tag__', context=self.context)
+            rows = (
+                Task.tags.through.objects.filter(task_id__in=ids)
+                .order_by(*related_ordering(Tag, 'tag'))
+                .values('task_id', *tags.columns)
+            )
+            querysets['tags_detail'] = (rows, 'task_id', tags)
+        return querysets
 
 
 class TaskDetailSerializer(TaskSerializer):
     """Detailed serializer for task with comments and attachments"""
-    comments = CommentSerializer(many=True, read_only=True)
-    attachments = TaskAttachmentSerializer(many=True, read_only=True)
 
     class Meta(TaskSerializer.Meta):
         fields = TaskSerializer.Meta.fields + ('comments', 'attachments')
+        expandable_fields = {
+            **TaskSerializer.Meta.expandable_fields,
+            'comments': (CommentSerializer, {'many': True, 'read_only': True}),
+            'attachments': (TaskAttachmentSerializer, {'many': True, 'read_only': True}),
+        }
+
+
+class ArchivedCommentSerializer(CommentSerializer):
+    """Read-only serializer for comments of archived tasks"""
+
+    class Meta(CommentSerializer.Meta):
+        model = ArchivedComment
+        read_only_fields = CommentSerializer.Meta.fields
+
+
+class ArchivedAttachmentSerializer(TaskAttachmentSerializer):
+    """Read-only serializer for attachments of archived tasks"""
+
+    class Meta(TaskAttachmentSerializer.Meta):
+        model = ArchivedAttachment
+        read_only_fields = TaskAttachmentSerializer.Meta.fields
+
+
+class ArchivedTaskListSerializer(TaskListSerializer):
+    """Read-only serializer for archived task lists (?archived=true)"""
+
+    class Meta(TaskListSerializer.Meta):
+        model = ArchivedTask
+        fields = TaskListSerializer.Meta.fields + ('archived_at',)
+        read_only_fields = fields
+
+
+class ArchivedTaskDetailSerializer(TaskSerializer):
+    """Read-only serializer for an archived task with its comments and attachments"""
+
+    class Meta(TaskSerializer.Meta):
+        model = ArchivedTask
+        fields = TaskSerializer.Meta.fields + ('archived_at', 'comments', 'attachments')
+        read_only_fields = fields
+        expandable_fields = {
+            **TaskSerializer.Meta.expandable_fields,
+            'comments': (ArchivedCommentSerializer, {'many': True, 'read_only': True}),
+            'attachments': (ArchivedAttachmentSerializer, {'many': True, 'read_only': True}),
+        }
+
+
+class ActivitySerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    """Serializer for activity log events (read only)"""
+    project = serializers.IntegerField(source='project_id', read_only=True)
+    task = serializers.IntegerField(source='task_id', read_only=True)
+
+    class Meta:
+        model = Activity
+        fields = (
+            'id', 'project', 'task', 'model', 'object_id', 'verb', 'actor', 'actor_detail', 'changes', 'created_at'
+        )
+        read_only_fields = fields
+        expandable_fields = {
+            'actor_detail': (UserSerializer, {'source': 'actor', 'read_only': True}),
+        }
+
+
+class TaskBulkItemSerializer(serializers.ModelSerializer):
+    """
+    Validates one item of a bulk task request. Related ids are plain integers
+    here; tasks.bulk resolves them for all items at once.
+    """
+    id = serializers.IntegerField(required=False)
+    project = serializers.IntegerField()
+    assignees = serializers.ListField(child=serializers.IntegerField(), required=False)
+    tags = serializers.ListField(child=serializers.IntegerField(), required=False)
+
+    class Meta:
+        model = Task
+        fields = (
+            'id', 'title', 'description', 'project', 'status', 'priority',
+            'due_date', 'assignees', 'tags'
+        )
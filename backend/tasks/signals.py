@@ -0,0 +1,351 @@
+from django.db import transaction
+from django.db.models import F, Q, QuerySet
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
+from django.dispatch import receiver
+from django.utils import timezone
+from projects.models import Project
+from users.models import User
+from .counters import adjust_task_count
+from .activity import activity, diff, record_activity, remember_state, snapshot
+from .models import Task, TaskAttachment, AttachmentUpload, Comment, Tag, ArchivedTask, ArchivedAttachment
+from .stats import bump_project_version
+from .sync import record_change, record_changes
+from .uploads import forget_upload, release_blob, release_file
+
+
+def deleted_with(origin, *models):
+    """Whether a cascade delete started from an instance or queryset of ``models``"""
+    if isinstance(origin, QuerySet):
+        return issubclass(origin.model, models)
+    return isinstance(origin, models)
+
+
+def deleted_in_bulk(origin):
+    """
+    Whether tasks are deleted by a queryset; tasks.bulk.delete_tasks() then
+    counts, logs and records them once for the batch, not row by row
+    """
+    return isinstance(origin, QuerySet) and issubclass(origin.model, Task)
+
+
+@receiver(post_save, sender=Task)
+def update_project_on_task_save(sender, instance, created, **kwargs):
+    """Count a new task, or move it between projects' counters, and invalidate stats"""
+    loaded_project_id = getattr(instance, '_loaded_project_id', None)
+    if created:
+        adjust_task_count(instance.project_id, 1)
+    elif loaded_project_id is not None and loaded_project_id != instance.project_id:
+        adjust_task_count(loaded_project_id, -1)
+        adjust_task_count(instance.project_id, 1)
+        bump_project_version(loaded_project_id)
+        # Members of the old project only see the task go away
+        record_change('task', instance.pk, loaded_project_id, deleted=True)
+    bump_project_version(instance.project_id)
+    instance._loaded_project_id = instance.project_id
+
+
+@receiver(post_delete, sender=Task)
+def update_project_on_task_delete(sender, instance, origin=None, **kwargs):
+    if deleted_in_bulk(origin):
+        return
+    bump_project_version(instance.project_id)
+    if deleted_with(origin, Project):
+        # The project row is going away too; no counter to maintain
+        return
+    adjust_task_count(instance.project_id, -1)
+
+
+@receiver(post_save, sender=Project)
+def invalidate_stats_on_project_rename(sender, instance, created, **kwargs):
+    # Cached task statistics show project titles
+    if not created and getattr(instance, '_loaded_title', None) != instance.title:
+        bump_project_version(instance.pk)
+    instance._loaded_title = instance.title
+
+
+# Comments, attachments, assignees and tags are part of a task's representation,
+# so changing them also touches the task's updated_at (its ETag validator).
+
+@receiver(post_save, sender=Comment)
+def update_comments_count_on_save(sender, instance, created, **kwargs):
+    changes = {'comments_count': F('comments_count') + 1} if created else {}
+    Task.objects.filter(pk=instance.task_id).update(updated_at=timezone.now(), **changes)
+
+
+@receiver(post_delete, sender=Comment)
+def update_comments_count_on_delete(sender, instance, origin=None, **kwargs):
+    if deleted_with(origin, Task, Project):
+        return
+    Task.objects.filter(pk=instance.task_id).update(
+        comments_count=F('comments_count') - 1, updated_at=timezone.now()
+    )
+
+
+@receiver(post_save, sender=TaskAttachment)
+def update_attachments_count_on_save(sender, instance, created, **kwargs):
+    changes = {'attachments_count': F('attachments_count') + 1} if created else {}
+    Task.objects.filter(pk=instance.task_id).update(updated_at=timezone.now(), **changes)
+
+
+@receiver(post_delete, sender=TaskAttachment)
+def update_attachments_count_on_delete(sender, instance, origin=None, **kwargs):
+    if deleted_with(origin, Task, Project):
+        return
+    Task.objects.filter(pk=instance.task_id).update(
+        attachments_count=F('attachments_count') - 1, updated_at=timezone.now()
+    )
+
+
+@receiver(post_delete, sender=TaskAttachment)
+@receiver(post_delete, sender=ArchivedAttachment)
+def release_attachment_blob(sender, instance, **kwargs):
+    if instance.blob_id is not None:
+        release_blob(instance.blob_id)
+    else:
+        # Attachments from before blobs own their file; archiving and restoring copy the row first
+        transaction.on_commit(lambda: release_file(instance.file))
+
+
+@receiver(post_delete, sender=AttachmentUpload)
+def remove_partial_upload(sender, instance, **kwargs):
+    transaction.on_commit(lambda: forget_upload(instance))
+
+
+@receiver(m2m_changed, sender=Task.assignees.through)
+@receiver(m2m_changed, sender=Task.tags.through)
+def touch_task_on_relation_change(sender, instance, action, reverse, model, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        Task.objects.filter(pk=instance.pk).update(updated_at=timezone.now())
+    elif pk_set:
+        Task.objects.filter(pk__in=pk_set).update(updated_at=timezone.now())
+
+
+# Tags and users are embedded too (tags_detail, assignees_detail, author_detail,
+# owner_detail...), so changing one touches everything that embeds it.
+
+@receiver(post_save, sender=Tag)
+@receiver(pre_delete, sender=Tag)
+def touch_tasks_on_tag_change(sender, instance, created=False, **kwargs):
+    # Before a delete, while the tag's through rows are still there
+    if created:
+        return
+    now = timezone.now()
+    Task.objects.filter(tags=instance).update(updated_at=now)
+    ArchivedTask.objects.filter(tags=instance).update(updated_at=now)
+
+
+@receiver(post_save, sender=User)
+def touch_embedding_objects_on_user_change(sender, instance, created, **kwargs):
+    values = instance.embedded_values()
+    # Logins only save last_login
+    if created or values == getattr(instance, '_loaded_embedded', None):
+        return
+    instance._loaded_embedded = values
+    now = timezone.now()
+    Task.objects.filter(
+        Q(assignees=instance) | Q(created_by=instance) | Q(comments__author=instance)
+        | Q(attachments__uploaded_by=instance)
+    ).update(updated_at=now)
+    Comment.objects.filter(author=instance).update(updated_at=now)
+    # Tasks are validated with their project's updated_at too
+    Project.objects.filter(Q(owner=instance) | Q(members=instance)).update(updated_at=now)
+
+
+# Change log for /api/sync/ (see tasks.sync). Task, comment and tag writes are
+# logged here; bulk task writes (including queryset deletes) are logged by
+# tasks.bulk and task counts by tasks.counters.
+
+@receiver(post_save, sender=Task)
+def log_task_save(sender, instance, **kwargs):
+    # Moves are logged by update_project_on_task_save, which runs first
+    record_change('task', instance.pk, instance.project_id)
+
+
+@receiver(post_delete, sender=Task)
+def log_task_delete(sender, instance, origin=None, **kwargs):
+    if not deleted_with(origin, Project) and not deleted_in_bulk(origin):
+        record_change('task', instance.pk, instance.project_id, deleted=True)
+
+
+@receiver(post_save, sender=Project)
+def log_project_save(sender, instance, **kwargs):
+    record_change('project', instance.pk, instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+def log_comment_save(sender, instance, **kwargs):
+    # The task's updated_at was touched too
+    project_id = instance.task.project_id
+    record_changes([('comment', instance.pk, project_id, False), ('task', instance.task_id, project_id, False)])
+
+
+@receiver(post_delete, sender=Comment)
+def log_comment_delete(sender, instance, origin=None, **kwargs):
+    if deleted_with(origin, Task, Project):
+        return
+    project_id = instance.task.project_id
+    record_changes([('comment', instance.pk, project_id, True), ('task', instance.task_id, project_id, False)])
+
+
+@receiver(post_save, sender=Tag)
+def log_tag_save(sender, instance, **kwargs):
+    record_change('tag', instance.pk)
+
+
+@receiver(post_delete, sender=Tag)
+def log_tag_delete(sender, instance, **kwargs):
+    record_change('tag', instance.pk, deleted=True)
+
+
+@receiver(m2m_changed, sender=Task.assignees.through)
+@receiver(m2m_changed, sender=Task.tags.through)
+def log_task_relation_change(sender, instance, action, reverse, model, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        record_change('task', instance.pk, instance.project_id)
+    elif pk_set:
+        record_changes([
+            ('task', task_id, project_id, False)
+            for task_id, project_id in Task.objects.filter(pk__in=pk_set).values_list('id', 'project_id')
+        ])
+
+
+@receiver(m2m_changed, sender=Project.members.through)
+def log_membership_change(sender, instance, action, reverse, model, pk_set, **kwargs):
+    """Joining a project makes the next sync send the whole project (see tasks.sync)"""
+    if action == 'pre_clear':
+        # The removed rows are unknown after the clear
+        related = instance.projects if reverse else instance.members
+        instance._cleared_member_pks = set(related.values_list('id', flat=True))
+        return
+    if action == 'post_clear':
+        pk_set = getattr(instance, '_cleared_member_pks', None)
+    elif action not in ('post_add', 'post_remove'):
+        return
+    if not pk_set:
+        return
+    left = action != 'post_add'
+    if reverse:
+        record_changes([('member', instance.pk, project_id, left) for project_id in pk_set])
+    else:
+        record_changes([('member', user_id, instance.pk, left) for user_id in pk_set])
+
+
+# Activity log (see tasks.activity). Cascades record nothing below the object
+# whose deletion is recorded; bulk task writes are recorded by tasks.bulk,
+# archival and restores by tasks.archive.
+
+@receiver(post_save, sender=Task)
+def log_task_activity(sender, instance, created, **kwargs):
+    if created:
+        changes = snapshot(instance)
+        remember_state(instance)
+    else:
+        changes = diff(instance)
+        if not changes:
+            return
+    record_activity([
+        activity(instance.project_id, 'task', instance.pk, 'created' if created else 'updated', changes,
+                 task_id=instance.pk)
+    ])
+
+
+@receiver(post_delete, sender=Task)
+def log_task_delete_activity(sender, instance, origin=None, **kwargs):
+    if deleted_with(origin, Project) or deleted_in_bulk(origin):
+        return
+    record_activity([
+        activity(instance.project_id, 'task', instance.pk, 'deleted', {'title': [instance.title, None]},
+                 task_id=instance.pk)
+    ])
+
+
+@receiver(m2m_changed, sender=Task.assignees.through)
+@receiver(m2m_changed, sender=Task.tags.through)
+def log_task_relation_activity(sender, instance, action, reverse, model, pk_set, **kwargs):
+    field = 'assignees' if sender is Task.assignees.through else 'tags'
+    if action == 'pre_clear':
+        # The removed rows are unknown after the clear
+        accessor = Task._meta.get_field(field).remote_field.get_accessor_name() if reverse else field
+        instance._cleared_activity_pks = set(getattr(instance, accessor).values_list('id', flat=True))
+        return
+    if action == 'post_clear':
+        pk_set = getattr(instance, '_cleared_activity_pks', None)
+    elif action not in ('post_add', 'post_remove'):
+        return
+    if not pk_set:
+        return
+    key = 'added' if action == 'post_add' else 'removed'
+    if reverse:
+        change = {key: [instance.pk]}
+        events = [
+            activity(project_id, 'task', task_id, 'updated', {field: change}, task_id=task_id)
+            for task_id, project_id in Task.objects.filter(pk__in=pk_set).values_list('id', 'project_id')
+        ]
+    else:
+        change = {key: sorted(pk_set)}
+        events = [activity(instance.project_id, 'task', instance.pk, 'updated', {field: change}, task_id=instance.pk)]
+    record_activity(events)
+
+
+@receiver(post_save, sender=Comment)
+def log_comment_activity(sender, instance, created, **kwargs):
+    if created:
+        changes = {}
+        remember_state(instance)
+    else:
+        changes = diff(instance)
+        if not changes:
+            return
+    record_activity([
+        activity(instance.task.project_id, 'comment', instance.pk, 'created' if created else 'updated', changes,
+                 task_id=instance.task_id)
+    ])
+
+
+@receiver(post_delete, sender=Comment)
+def log_comment_delete_activity(sender, instance, origin=None, **kwargs):
+    if deleted_with(origin, Task, Project):
+        return
+    record_activity([
+        activity(instance.task.project_id, 'comment', instance.pk, 'deleted', task_id=instance.task_id)
+    ])
+
+
+@receiver(post_save, sender=TaskAttachment)
+def log_attachment_activity(sender, instance, created, **kwargs):
+    if created:
+        record_activity([
+            activity(instance.task.project_id, 'attachment', instance.pk, 'created',
+                     {'name': [None, instance.name or instance.file.name]}, task_id=instance.task_id)
+        ])
+
+
+@receiver(post_delete, sender=TaskAttachment)
+def log_attachment_delete_activity(sender, instance, origin=None, **kwargs):
+    if deleted_with(origin, Task, Project):
+        return
+    record_activity([
+        activity(instance.task.project_id, 'attachment', instance.pk, 'deleted',
+                 {'name': [instance.name or instance.file.name, None]}, task_id=instance.task_id)
+    ])
+
+
+@receiver(m2m_changed, sender=Project.members.through)
+def log_membership_activity(sender, instance, action, reverse, model, pk_set, **kwargs):
+    # The pks removed by a clear were saved by log_membership_change, which runs first
+    if action == 'post_clear':
+        pk_set = getattr(instance, '_cleared_member_pks', None)
+    elif action not in ('post_add', 'post_remove'):
+        return
+    if not pk_set:
+        return
+    verb = 'added' if action == 'post_add' else 'removed'
+    if reverse:
+        events = [activity(project_id, 'member', instance.pk, verb) for project_id in pk_set]
+    else:
+        events = [activity(instance.pk, 'member', user_id, verb) for user_id in sorted(pk_set)]
+    record_activity(events)
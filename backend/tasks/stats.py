@@ -0,0 +1,93 @@
+"""
+Per-user task statistics for the dashboard.
+
+Statistics are computed with one grouped aggregate query and cached per user.
+The cache key includes a version for each project the user can see, and every
+task write bumps its project's version (see ``tasks.signals``), so a user's
+cached statistics are invalidated by changes to their tasks, project renames
+and membership changes without any database work on the write path.
+
+``overdue`` depends on the time it was computed, so it can lag by up to
+``TASK_STATS_CACHE_TIMEOUT`` seconds as due dates pass.
+"""
+import hashlib
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+from projects.membership import visible_project_ids
+from .models import Task
+
+PROJECT_VERSION_KEY = 'project_tasks_version:{}'
+USER_STATS_KEY = 'task_stats:{}:{}'
+
+
+def bump_project_version(project_id):
+    """Invalidate cached statistics of every user who can see the project"""
+    key = PROJECT_VERSION_KEY.format(project_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Unknown or evicted: start from a value no earlier version can have had
+        cache.set(key, time.time_ns(), None)
+
+
+def get_project_versions(project_ids):
+    keys = {PROJECT_VERSION_KEY.format(project_id): project_id for project_id in project_ids}
+    versions = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return sorted((keys[key], version) for key, version in versions.items())
+
+
+def compute_task_stats(project_ids):
+    """Aggregate task counts for the given projects in a single grouped query"""
+    rows = (
+        Task.objects.filter(project_id__in=project_ids)
+        .order_by()
+        .values('project_id', 'project__title', 'status', 'priority')
+        .annotate(
+            count=Count('id'),
+            overdue=Count('id', filter=Q(due_date__lt=timezone.now()) & ~Q(status__in=Task.CLOSED_STATUSES)),
+        )
+    )
+    stats = {
+        'project_count': len(project_ids),
+        'total': 0,
+        'overdue': 0,
+        'by_status': {choice: 0 for choice, _ in Task.STATUS_CHOICES},
+        'by_priority': {choice: 0 for choice, _ in Task.PRIORITY_CHOICES},
+        'projects': {},
+    }
+    for row in rows:
+        stats['total'] += row['count']
+        stats['overdue'] += row['overdue']
+        stats['by_status'][row['status']] += row['count']
+        stats['by_priority'][row['priority']] += row['count']
+        project = stats['projects'].setdefault(row['project_id'], {
+            'id': row['project_id'],
+            'title': row['project__title'],
+            'total': 0,
+            'overdue': 0,
+            'by_status': {choice: 0 for choice, _ in Task.STATUS_CHOICES},
+        })
+        project['total'] += row['count']
+        project['overdue'] += row['overdue']
+        project['by_status'][row['status']] += row['count']
+    stats['projects'] = sorted(stats['projects'].values(), key=lambda project: project['id'])
+    return stats
+
+
+def get_task_stats(user):
+    """Return (possibly cached) task statistics over the projects the user can see"""
+    project_ids = sorted(visible_project_ids(user))
+    fingerprint = hashlib.md5(repr(get_project_versions(project_ids)).encode()).hexdigest()
+    key = USER_STATS_KEY.format(user.pk, fingerprint)
+    stats = cache.get(key)
+    if stats is None:
+        stats = compute_task_stats(project_ids)
+        cache.set(key, stats, settings.TASK_STATS_CACHE_TIMEOUT)
+    return stats
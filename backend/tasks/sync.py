@@ -0,0 +1,150 @@
+"""
+Delta sync for clients (``/api/sync/?since=<token>``).
+
+Every create, update and delete of a task, project, comment or tag appends a
+row to the ``Change`` log (see ``tasks.signals`` and ``tasks.bulk``). A sync
+token is the id of the last change a client has seen, so a sync is one range
+scan over the log from that id, restricted to the projects the user can see:
+the changed objects are collapsed to their latest state, upserts are loaded
+in one query per model and deletes come back as tombstones (ids).
+
+Projects the user can no longer see (deleted, or membership removed) are not
+tombstoned; every response lists ``visible_projects`` and clients drop
+everything outside it. Joining (or leaving) a project is logged as a ``member`` change,
+and the next sync after joining includes the whole project.
+
+Change ids are taken when a change is inserted but only become visible when
+its transaction commits, so an older id can appear after a newer one was
+already read. Tokens therefore never pass a change logged less than
+``SYNC_SETTLE_SECONDS`` ago: newer changes are sent, and sent again by the
+next sync along with any older ones that committed late.
+
+Clients first fetch a token (``/api/sync/`` without ``since``), then load the
+regular list endpoints, then sync from that token; upserts are idempotent so
+overlapping changes are harmless. ``prune_changes`` trims old log rows; a
+token older than the log gets a ``410`` and the client reloads.
+"""
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, Min, Q
+from django.utils import timezone
+from projects.membership import visible_project_ids
+from projects.models import Project
+from projects.serializers import ProjectListRowSerializer
+from .events import get_broadcaster
+from .models import Change, Task, Tag, Comment
+from .serializers import TaskListRowSerializer, TagRowSerializer, CommentSerializer
+
+DEFAULT_SYNC_LIMIT = 500
+MAX_SYNC_LIMIT = 5000
+
+SYNCED_MODELS = ('task', 'project', 'comment', 'tag')
+
+
+def record_changes(changes):
+    """
+    Append ``(model, object_id, project_id, deleted)`` tuples to the change log;
+    once committed they are also pushed to live event streams (see tasks.events)
+    """
+    rows = Change.objects.bulk_create([
+        Change(model=model, object_id=object_id, project_id=project_id, deleted=deleted)
+        for model, object_id, project_id, deleted in changes
+    ])
+    transaction.on_commit(lambda: get_broadcaster().committed(rows))
+
+
+def record_change(model, object_id, project_id=None, deleted=False):
+    record_changes([(model, object_id, project_id, deleted)])
+
+
+def prune_changes(days):
+    """Delete change log rows older than ``days``; clients with older tokens must reload"""
+    cutoff = timezone.now() - timedelta(days=days)
+    deleted, _ = Change.objects.filter(created_at__lt=cutoff).delete()
+    return deleted
+
+
+def current_token():
+    """The newest settled token: every change up to it has committed (or rolled back)"""
+    cutoff = timezone.now() - timedelta(seconds=settings.SYNC_SETTLE_SECONDS)
+    return Change.objects.filter(created_at__lt=cutoff).order_by('-id').values_list('id', flat=True).first() or 0
+
+
+def latest_change_id():
+    return Change.objects.aggregate(last=Max('id'))['last'] or 0
+
+
+def is_expired(since):
+    """Whether changes after ``since`` may have been pruned from the log"""
+    first = Change.objects.aggregate(first=Min('id'))['first']
+    return first is not None and since + 1 < first
+
+
+def get_changes(user, since, limit=DEFAULT_SYNC_LIMIT, context=None):
+    """Return the objects changed and deleted after ``since`` that the user can see"""
+    visible = visible_project_ids(user)
+    # Read both bounds first so a change logged during the sync is not skipped
+    settled = current_token()
+    ceiling = latest_change_id()
+    changes = list(
+        Change.objects.filter(id__gt=since, id__lte=ceiling)
+        .filter(Q(project_id__in=visible) | Q(project_id__isnull=True))
+        .values_list('id', 'model', 'object_id', 'project_id', 'deleted')[:limit + 1]
+    )
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+
+    # Later changes of the same object replace earlier ones
+    latest = {}
+    joined = set()
+    for _, model, object_id, project_id, deleted in changes:
+        if model == 'member':
+            if object_id == user.pk and not deleted:
+                joined.add(project_id)
+            continue
+        latest[model, object_id] = deleted
+    upserts = {model: set() for model in SYNCED_MODELS}
+    deleted = {model: set() for model in SYNCED_MODELS}
+    for (model, object_id), is_deleted in latest.items():
+        (deleted if is_deleted else upserts)[model].add(object_id)
+    upserts['project'] |= joined
+
+    def load(row_serializer, queryset):
+        rows = list(queryset.values(*row_serializer.columns))
+        return row_serializer.serialize(rows)
+
+    tasks = load(
+        TaskListRowSerializer(context=context),
+        Task.objects.filter(Q(id__in=upserts['task']) | Q(project_id__in=joined), project_id__in=visible),
+    )
+    projects = load(
+        ProjectListRowSerializer(context=context),
+        Project.objects.filter(id__in=upserts['project'] & visible),
+    )
+    tags = load(TagRowSerializer(context=context), Tag.objects.filter(id__in=upserts['tag']))
+    comments = CommentSerializer(
+        Comment.objects.filter(
+            Q(id__in=upserts['comment']) | Q(task__project_id__in=joined), task__project_id__in=visible
+        ).select_related('author'),
+        many=True, context=context
+    ).data
+
+    # Objects changed and then deleted without a visible tombstone (e.g. with their task)
+    for model, items in (('task', tasks), ('project', projects), ('tag', tags), ('comment', comments)):
+        deleted[model] |= upserts[model] - {item['id'] for item in items}
+
+    # Changes after the settled token are read again next time, in case older ones commit late
+    token = max(since, min(changes[-1][0] if has_more else ceiling, settled))
+    return {
+        'token': str(token),
+        # A page that ends in unsettled changes is picked up again once they settle
+        'has_more': has_more and token > since,
+        'visible_projects': sorted(visible),
+        'tasks': tasks,
+        'projects': projects,
+        'comments': comments,
+        'tags': tags,
+        'deleted': {f'{model}s': sorted(ids) for model, ids in deleted.items()},
+    }
+
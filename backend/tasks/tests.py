@@ -1,13 +1,43 @@
-from django.test import TestCase
+import asyncio
+import csv
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from unittest import mock
+from asgiref.sync import async_to_sync, sync_to_async
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.test import AsyncClient, TestCase, TransactionTestCase, override_settings
 from django.contrib.auth import get_user_model
 from rest_framework.test import APIClient
 from rest_framework import status
 from datetime import datetime, timedelta
+from io import StringIO
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+from projects.membership import visible_project_ids
+from jobs.models import Job
+from jobs.queue import claim_jobs, run_job
 from projects.models import Project
-from .models import Task, Tag, Comment
+from task_manager.asyncviews import read_urlconf
+from .activity import buffered_activity
+from .events import ChangeLogBroadcaster, LocalBroadcaster, get_broadcaster
+from . import archive, downloads, export, imports, purge, uploads
+from .models import (
+    Task, Tag, TaskAttachment, AttachmentUpload, Blob, Comment, Change,
+    ArchivedTask, ArchivedComment, ArchivedAttachment, Activity
+)
 
 User = get_user_model()
 
+ASYNC_READ_URLCONF = read_urlconf(use_async=True)
+
 
 class TaskModelTest(TestCase):
     """Test cases for Task model"""
@@ -119,6 +149,23 @@ class TaskAPITest(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data['results']), 2)
 
+    def test_task_list_is_scoped_to_visible_projects(self):
+        """Test the task list only contains tasks of the user's projects"""
+        other_user = User.objects.create_user(
+            email='other@example.com',
+            username='otheruser',
+            password='testpass123'
+        )
+        other_project = Project.objects.create(title='Other Project', owner=other_user)
+        Task.objects.create(title='Mine', project=self.project)
+        Task.objects.create(title='Not mine', project=other_project)
+        response = self.client.get('/api/tasks/')
+        self.assertEqual([task['title'] for task in response.data['results']], ['Mine'])
+
+        other_project.members.add(self.user)
+        response = self.client.get('/api/tasks/')
+        self.assertEqual(response.data['count'], 2)
+
     def test_task_filtering_by_status(self):
         """Test filtering tasks by status"""
         Task.objects.create(
@@ -138,6 +185,55 @@ class TaskAPITest(TestCase):
         self.assertEqual(len(response.data['results']), 1)
         self.assertEqual(response.data['results'][0]['status'], 'done')
 
+    def test_task_filtering_open(self):
+        """Test filtering tasks to open (not done or cancelled) ones"""
+        for task_status in ('todo', 'review', 'done', 'cancelled'):
+            Task.objects.create(
+                title=f'{task_status} Task',
+                project=self.project,
+                status=task_status,
+                created_by=self.user
+            )
+        response = self.client.get(f'/api/tasks/?project={self.project.id}&open=true&ordering=due_date')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            sorted(task['status'] for task in response.data['results']),
+            ['review', 'todo']
+        )
+
+    def test_task_ordering_by_priority(self):
+        """Test ?ordering=priority sorts by importance, closed tasks last"""
+        for title, priority, task_status in [
+            ('Low', 'low', 'todo'), ('Urgent', 'urgent', 'todo'), ('Done urgent', 'urgent', 'done'),
+            ('Medium', 'medium', 'todo'), ('High', 'high', 'in_progress'),
+        ]:
+            Task.objects.create(title=title, project=self.project, priority=priority, status=task_status)
+        response = self.client.get(f'/api/tasks/?project={self.project.id}&ordering=-priority')
+        self.assertEqual(
+            [task['title'] for task in response.data['results']],
+            ['Urgent', 'High', 'Medium', 'Low', 'Done urgent']
+        )
+        response = self.client.get(f'/api/tasks/?project={self.project.id}&ordering=priority')
+        self.assertEqual(response.data['results'][-1]['title'], 'Urgent')
+
+    def test_priority_rank_follows_updates(self):
+        """Test the rank is kept in sync by save(), update_fields and bulk updates"""
+        task = Task.objects.create(title='Task', project=self.project, priority='low')
+        self.assertEqual(task.priority_rank, 3)
+        task.priority = 'urgent'
+        task.save(update_fields=['priority'])
+        task.refresh_from_db()
+        self.assertEqual(task.priority_rank, 0)
+        self.client.patch('/api/tasks/bulk/', [{'id': task.id, 'status': 'done'}], format='json')
+        task.refresh_from_db()
+        self.assertEqual(task.priority_rank, 4)
+
+    def test_explain_task_queries_command(self):
+        """Test the explain command prints a plan for every filter combination"""
+        out = StringIO()
+        call_command('explain_task_queries', stdout=out)
+        self.assertIn('Open tasks of a project by due date', out.getvalue())
+
     def test_task_update(self):
         """Test updating a task"""
         task = Task.objects.create(
@@ -213,3 +309,1659 @@ class CommentAPITest(TestCase):
         response = self.client.get(f'/api/tasks/comments/?task={self.task.id}')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data['results']), 2)
+
+
+class TaskQueryBudgetTest(TestCase):
+    """Test cases for the fixed per-action query budget of TaskViewSet"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='test@example.com',
+            username='testuser',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.project = Project.objects.create(
+            title='Test Project',
+            owner=self.user
+        )
+        # Visible projects are cached per user; the budgets below are for a warm cache
+        visible_project_ids(self.user)
+        self.tag = Tag.objects.create(name='Bug')
+
+    def create_tasks(self, count):
+        for i in range(count):
+            task = Task.objects.create(
+                title=f'Task {i}',
+                project=self.project,
+                created_by=self.user
+            )
+            task.assignees.add(self.user)
+            task.tags.add(self.tag)
+
+    def test_list_query_count_is_constant(self):
+        """Test listing tasks costs the same number of queries for any page size"""
+        self.create_tasks(3)
+        with self.assertNumQueries(5):
+            response = self.client.get(f'/api/tasks/?project={self.project.id}')
+        self.assertEqual(len(response.data['results']), 3)
+
+        self.create_tasks(17)
+        with self.assertNumQueries(5):
+            response = self.client.get(f'/api/tasks/?project={self.project.id}')
+        self.assertEqual(len(response.data['results']), 20)
+        self.assertEqual(response.data['results'][0]['project_title'], 'Test Project')
+        self.assertEqual(len(response.data['results'][0]['assignees_detail']), 1)
+
+    def test_retrieve_query_count_is_constant(self):
+        """Test retrieving a task does not issue a query per comment or attachment"""
+        self.create_tasks(1)
+        task = Task.objects.get()
+        for i in range(5):
+            Comment.objects.create(content=f'Comment {i}', task=task, author=self.user)
+        with self.assertNumQueries(7):
+            response = self.client.get(f'/api/tasks/{task.id}/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['comments_count'], 5)
+        self.assertEqual(len(response.data['comments']), 5)
+        self.assertEqual(response.data['comments'][0]['author_detail']['email'], 'test@example.com')
+
+
+class TaskCursorPaginationTest(TestCase):
+    """Test cases for opt-in keyset pagination of tasks and comments"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='test@example.com',
+            username='testuser',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.project = Project.objects.create(
+            title='Test Project',
+            owner=self.user
+        )
+        # Visible projects are cached per user; the budgets below are for a warm cache
+        visible_project_ids(self.user)
+        for i in range(25):
+            Task.objects.create(
+                title=f'Task {i}',
+                project=self.project,
+                created_by=self.user
+            )
+
+    def test_page_number_is_default(self):
+        """Test tasks are paginated by page number unless cursor mode is requested"""
+        response = self.client.get(f'/api/tasks/?project={self.project.id}')
+        self.assertEqual(response.data['count'], 25)
+        self.assertIn('page=2', response.data['next'])
+
+    def test_cursor_pages_cover_all_tasks(self):
+        """Test following cursor links visits every task once without a COUNT"""
+        with self.assertNumQueries(3):
+            response = self.client.get(f'/api/tasks/?project={self.project.id}&pagination=cursor')
+        self.assertNotIn('count', response.data)
+        self.assertIn('cursor=', response.data['next'])
+        ids = [task['id'] for task in response.data['results']]
+
+        response = self.client.get(response.data['next'])
+        ids += [task['id'] for task in response.data['results']]
+        self.assertIsNone(response.data['next'])
+        self.assertEqual(sorted(ids), sorted(Task.objects.values_list('id', flat=True)))
+
+    def test_comment_cursor_pagination(self):
+        """Test comments support cursor mode in creation order"""
+        task = Task.objects.first()
+        for i in range(3):
+            Comment.objects.create(content=f'Comment {i}', task=task, author=self.user)
+        response = self.client.get(f'/api/tasks/comments/?task={task.id}&pagination=cursor')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [comment['content'] for comment in response.data['results']],
+            ['Comment 0', 'Comment 1', 'Comment 2']
+        )
+
+
+class TaskSearchTest(TestCase):
+    """Test cases for full-text task search"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='test@example.com',
+            username='testuser',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.project = Project.objects.create(
+            title='Test Project',
+            owner=self.user
+        )
+        self.deploy_task = Task.objects.create(
+            title='Deploy the deploy server',
+            description='Production rollout',
+            project=self.project,
+            created_by=self.user
+        )
+        self.other_task = Task.objects.create(
+            title='Write release notes',
+            description='Mention we deploy on Friday, after the review meeting with the team',
+            project=self.project,
+            created_by=self.user
+        )
+        Task.objects.create(
+            title='Unrelated',
+            project=self.project,
+            created_by=self.user
+        )
+
+    def search(self, query):
+        response = self.client.get(f'/api/tasks/?project={self.project.id}&search={query}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [task['id'] for task in response.data['results']]
+
+    def test_search_is_relevance_ranked(self):
+        """Test search returns matches ranked by relevance"""
+        self.assertEqual(self.search('deploy'), [self.deploy_task.id, self.other_task.id])
+
+    def test_search_matches_prefixes(self):
+        """Test search matches word prefixes while the user is typing"""
+        self.assertEqual(self.search('relea'), [self.other_task.id])
+
+    def test_search_index_follows_updates_and_deletes(self):
+        """Test the search index is kept in sync on task save and delete"""
+        self.deploy_task.title = 'Renamed'
+        self.deploy_task.description = ''
+        self.deploy_task.save()
+        self.assertEqual(self.search('rollout'), [])
+        self.assertEqual(self.search('renamed'), [self.deploy_task.id])
+        self.other_task.delete()
+        self.assertEqual(self.search('deploy'), [])
+
+    def test_search_ignores_query_syntax(self):
+        """Test search terms are never parsed as full-text query syntax"""
+        self.assertEqual(self.search('"deploy* -('), [self.deploy_task.id, self.other_task.id])
+
+    @override_settings(TASK_SEARCH_BACKEND='tasks.search.IcontainsSearchBackend')
+    def test_icontains_fallback(self):
+        """Test the substring fallback backend still finds matches"""
+        self.assertEqual(
+            sorted(self.search('deploy')),
+            sorted([self.deploy_task.id, self.other_task.id])
+        )
+
+
+class CounterTest(TestCase):
+    """Test cases for the denormalized comment, attachment and task counters"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='test@example.com',
+            username='testuser',
+            password='testpass123'
+        )
+        self.project = Project.objects.create(
+            title='Test Project',
+            owner=self.user
+        )
+        self.task = Task.objects.create(
+            title='Test Task',
+            project=self.project,
+            created_by=self.user
+        )
+
+    def test_comment_and_attachment_counts(self):
+        """Test task counters follow comment and attachment creation and deletion"""
+        comment = Comment.objects.create(content='Comment', task=self.task, author=self.user)
+        TaskAttachment.objects.create(task=self.task, file='task_attachments/a.txt', uploaded_by=self.user)
+        self.task.refresh_from_db()
+        self.assertEqual((self.task.comments_count, self.task.attachments_count), (1, 1))
+
+        comment.delete()
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.comments_count, 0)
+
+    def test_project_task_count(self):
+        """Test project task_count follows task creation, moves and deletion"""
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.task_count, 1)
+
+        other_project = Project.objects.create(title='Other Project', owner=self.user)
+        task = Task.objects.get(pk=self.task.pk)
+        task.project = other_project
+        task.save()
+        self.project.refresh_from_db()
+        other_project.refresh_from_db()
+        self.assertEqual((self.project.task_count, other_project.task_count), (0, 1))
+
+        task.delete()
+        other_project.refresh_from_db()
+        self.assertEqual(other_project.task_count, 0)
+
+    def test_recount_command_repairs_drift(self):
+        """Test the recount command fixes counters that drifted"""
+        Comment.objects.create(content='Comment', task=self.task, author=self.user)
+        Task.objects.filter(pk=self.task.pk).update(comments_count=7)
+        Project.objects.filter(pk=self.project.pk).update(task_count=0)
+
+        out = StringIO()
+        call_command('recount', stdout=out)
+        self.task.refresh_from_db()
+        self.project.refresh_from_db()
+        self.assertEqual(self.task.comments_count, 1)
+        self.assertEqual(self.project.task_count, 1)
+        self.assertIn('task.comments_count: 1 row(s) repaired', out.getvalue())
+
+
+class TaskStatsTest(TestCase):
+    """Test cases for the dashboard statistics endpoint"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='test@example.com',
+            username='testuser',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.project = Project.objects.create(
+            title='Test Project',
+            owner=self.user
+        )
+        yesterday = timezone.now() - timedelta(days=1)
+        Task.objects.create(title='Late', project=self.project, due_date=yesterday, created_by=self.user)
+        Task.objects.create(title='Late but done', project=self.project, status='done',
+                            due_date=yesterday, created_by=self.user)
+        Task.objects.create(title='Urgent', project=self.project, priority='urgent', created_by=self.user)
+        other_user = User.objects.create_user(
+            email='other@example.com',
+            username='otheruser',
+            password='testpass123'
+        )
+        other_project = Project.objects.create(title='Other Project', owner=other_user)
+        Task.objects.create(title='Not mine', project=other_project, created_by=other_user)
+
+    def test_stats(self):
+        """Test stats count only the user's tasks, grouped in a single aggregate query"""
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/tasks/stats/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['project_count'], 1)
+        self.assertEqual(response.data['total'], 3)
+        self.assertEqual(response.data['overdue'], 1)
+        self.assertEqual(response.data['by_status']['todo'], 2)
+        self.assertEqual(response.data['by_status']['in_progress'], 0)
+        self.assertEqual(response.data['by_priority']['urgent'], 1)
+        self.assertEqual(response.data['projects'][0]['title'], 'Test Project')
+        self.assertEqual(response.data['projects'][0]['total'], 3)
+
+    def test_stats_are_cached_until_tasks_change(self):
+        """Test stats are served from cache and invalidated by task writes"""
+        self.client.get('/api/tasks/stats/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/tasks/stats/')
+        self.assertEqual(response.data['total'], 3)
+
+        Task.objects.create(title='New', project=self.project, created_by=self.user)
+        response = self.client.get('/api/tasks/stats/')
+        self.assertEqual(response.data['total'], 4)
+
+        self.client.patch(f'/api/projects/{self.project.id}/', {'title': 'Renamed'})
+        response = self.client.get('/api/tasks/stats/')
+        self.assertEqual(response.data['projects'][0]['title'], 'Renamed')
+
+
+class TaskBulkAPITest(TestCase):
+    """Test cases for the bulk task endpoint"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='test@example.com',
+            username='testuser',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.project = Project.objects.create(
+            title='Test Project',
+            owner=self.user
+        )
+        self.tag = Tag.objects.create(name='Bug')
+
+    def test_bulk_create(self):
+        """Test creating many tasks with relations in a fixed number of queries"""
+        items = [
+            {'title': f'Task {i}', 'project': self.project.id, 'assignees': [self.user.id], 'tags': [self.tag.id]}
+            for i in range(30)
+        ]
+        with self.assertNumQueries(14):
+            response = self.client.post('/api/tasks/bulk/', items, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([task['title'] for task in response.data['results']], [f'Task {i}' for i in range(30)])
+        self.assertEqual(Task.assignees.through.objects.count(), 30)
+        self.assertEqual(Task.objects.filter(created_by=self.user).count(), 30)
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.task_count, 30)
+
+    def test_bulk_create_reports_errors_per_item(self):
+        """Test an invalid item rejects the whole batch with per-item errors"""
+        other_user = User.objects.create_user(
+            email='other@example.com',
+            username='otheruser',
+            password='testpass123'
+        )
+        private_project = Project.objects.create(title='Private', owner=other_user)
+        items = [
+            {'title': 'Good', 'project': self.project.id},
+            {'title': 'Bad tag', 'project': self.project.id, 'tags': [9999]},
+            {'title': 'Not my project', 'project': private_project.id},
+            {'project': self.project.id},
+        ]
+        response = self.client.post('/api/tasks/bulk/', items, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        errors = response.data['errors']
+        self.assertEqual(errors[0], {})
+        self.assertIn('tags', errors[1])
+        self.assertIn('project', errors[2])
+        self.assertIn('title', errors[3])
+        self.assertEqual(Task.objects.count(), 0)
+
+    def test_bulk_update_and_delete(self):
+        """Test updating and deleting many tasks"""
+        tasks = [Task.objects.create(title=f'Task {i}', project=self.project) for i in range(3)]
+        items = [{'id': task.id, 'status': 'done', 'tags': [self.tag.id]} for task in tasks]
+        response = self.client.patch('/api/tasks/bulk/', items, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Task.objects.filter(status='done').count(), 3)
+        self.assertEqual(self.tag.tasks.count(), 3)
+
+        response = self.client.delete('/api/tasks/bulk/', {'ids': [tasks[0].id, tasks[1].id]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(Task.objects.values_list('id', flat=True)), [tasks[2].id])
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.task_count, 1)
+
+    def test_bulk_delete_query_count_is_flat(self):
+        """Test deleting more tasks does not cost more queries, and each is still counted and logged"""
+        tasks = [Task.objects.create(title=f'Task {i}', project=self.project) for i in range(22)]
+        for task in tasks:
+            Comment.objects.create(task=task, author=self.user, content='Note')
+        query_counts = []
+        for ids in ([tasks[0].id, tasks[1].id], [task.id for task in tasks[2:]]):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.delete('/api/tasks/bulk/', {'ids': ids}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            query_counts.append(len(queries))
+        # The first request also fills the visibility cache
+        self.assertLessEqual(query_counts[1], query_counts[0])
+        self.assertFalse(Task.objects.exists())
+        self.assertFalse(Comment.objects.exists())
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.task_count, 0)
+        self.assertEqual(Change.objects.filter(model='task', deleted=True).count(), 22)
+
+
+class SparseFieldsetTest(TestCase):
+    """Test cases for ?fields= and ?expand= on task endpoints"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='test@example.com',
+            username='testuser',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.project = Project.objects.create(
+            title='Test Project',
+            owner=self.user
+        )
+        # Visible projects are cached per user; the budgets below are for a warm cache
+        visible_project_ids(self.user)
+        task = Task.objects.create(title='Test Task', project=self.project, created_by=self.user)
+        task.assignees.add(self.user)
+
+    def test_fields_limit_output_and_queries(self):
+        """Test sparse fieldsets skip unrequested nested data and its prefetches"""
+        with self.assertNumQueries(3):
+            response = self.client.get(f'/api/tasks/?project={self.project.id}&fields=id,title')
+        self.assertEqual(response.data['results'], [{'id': response.data['results'][0]['id'], 'title': 'Test Task'}])
+
+    def test_expand_adds_nested_fields(self):
+        """Test opt-in expansion of nested serializers on the list endpoint"""
+        response = self.client.get(
+            f'/api/tasks/?project={self.project.id}&fields=id,assignees_detail&expand=project_detail'
+        )
+        task = response.data['results'][0]
+        self.assertEqual(set(task), {'id', 'assignees_detail', 'project_detail'})
+        self.assertEqual(task['project_detail']['owner_detail']['email'], 'test@example.com')
+        self.assertEqual(task['assignees_detail'][0]['email'], 'test@example.com')
+
+    def test_fields_do_not_restrict_writes(self):
+        """Test ?fields= is ignored when creating a task"""
+        response = self.client.post(
+            '/api/tasks/?fields=id',
+            {'title': 'New Task', 'project': self.project.id}
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['title'], 'New Task')
+
+
+class FastListSerializationTest(TestCase):
+    """Test cases for the .values()-based list serializers"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='test@example.com',
+            username='testuser',
+            password='testpass123',
+            avatar='avatars/test.png'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.project = Project.objects.create(
+            title='Test Project',
+            owner=self.user
+        )
+        member = User.objects.create_user(
+            email='member@example.com',
+            username='member',
+            password='testpass123'
+        )
+        self.project.members.add(member)
+        tags = [Tag.objects.create(name='Bug'), Tag.objects.create(name='Feature', color='#00ff00')]
+        for i in range(5):
+            task = Task.objects.create(
+                title=f'Task {i}',
+                description='Description' if i % 2 else None,
+                project=self.project,
+                due_date=timezone.now() + timedelta(days=i) if i % 2 else None,
+                created_by=self.user if i % 2 else None
+            )
+            task.assignees.set([self.user, member][:i % 3])
+            task.tags.set(tags[:i % 3])
+
+    def assertSameOutput(self, url):
+        fast = self.client.get(url)
+        with override_settings(FAST_LIST_SERIALIZATION=False):
+            regular = self.client.get(url)
+        self.assertEqual(fast.status_code, status.HTTP_200_OK)
+        self.assertEqual(fast.content, regular.content)
+
+    def test_task_list_output_is_identical(self):
+        """Test the fast task list renders exactly the same JSON"""
+        self.assertSameOutput(f'/api/tasks/?project={self.project.id}')
+        self.assertSameOutput(f'/api/tasks/?project={self.project.id}&expand=project_detail,created_by_detail')
+        self.assertSameOutput(f'/api/tasks/?project={self.project.id}&fields=id,tags_detail&pagination=cursor')
+
+    def test_project_and_user_list_output_is_identical(self):
+        """Test the fast project and user lists render exactly the same JSON"""
+        self.assertSameOutput('/api/projects/')
+        self.assertSameOutput('/api/projects/?expand=members_detail')
+        self.assertSameOutput('/api/users/')
+
+
+class ConditionalGetTest(TestCase):
+    """Test cases for ETag / Last-Modified support on task and comment endpoints"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='test@example.com',
+            username='testuser',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.project = Project.objects.create(
+            title='Test Project',
+            owner=self.user
+        )
+        self.task = Task.objects.create(title='Test Task', project=self.project, created_by=self.user)
+
+    def test_task_detail_not_modified(self):
+        """Test a matching ETag gets a 304 from a single query"""
+        url = f'/api/tasks/{self.task.id}/'
+        response = self.client.get(url)
+        self.assertIn('Last-Modified', response)
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_task_detail_etag_follows_changes(self):
+        """Test the ETag changes with the task and with its comments and assignees"""
+        url = f'/api/tasks/{self.task.id}/'
+        etags = [self.client.get(url)['ETag']]
+        Comment.objects.create(content='Comment', task=self.task, author=self.user)
+        etags.append(self.client.get(url)['ETag'])
+        self.task.assignees.add(self.user)
+        etags.append(self.client.get(url)['ETag'])
+        self.client.patch(url, {'status': 'done'})
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etags[-1])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etags.append(response['ETag'])
+        self.assertEqual(len(set(etags)), 4)
+
+    def test_etags_follow_embedded_tags_and_users(self):
+        """Test renaming an embedded tag or user changes the ETags of what embeds it"""
+        tag = Tag.objects.create(name='old')
+        self.task.tags.add(tag)
+        comment = Comment.objects.create(content='Comment', task=self.task, author=self.user)
+        task_url = f'/api/tasks/{self.task.id}/'
+        comment_url = f'/api/tasks/comments/{comment.id}/?task={self.task.id}'
+        project_url = f'/api/projects/{self.project.id}/'
+
+        etag = self.client.get(task_url)['ETag']
+        self.client.patch(f'/api/tasks/tags/{tag.id}/', {'name': 'new'})
+        response = self.client.get(task_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['tags_detail'][0]['name'], 'new')
+
+        etags = {url: self.client.get(url)['ETag'] for url in (task_url, comment_url, project_url)}
+        # Saving what no representation shows touches nothing
+        user = User.objects.get(pk=self.user.pk)
+        user.last_login = timezone.now()
+        user.save(update_fields=['last_login'])
+        for url, etag in etags.items():
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+        user.first_name = 'Renamed'
+        user.save()
+        for url, etag in etags.items():
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+    def test_etag_follows_embedded_task_count(self):
+        """Test a task's ETag changes when its embedded project's task count does"""
+        url = f'/api/tasks/{self.task.id}/?expand=project_detail'
+        response = self.client.get(url)
+        self.assertEqual(response.data['project_detail']['task_count'], 1)
+        Task.objects.create(title='Second Task', project=self.project)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['project_detail']['task_count'], 2)
+
+    def test_task_list_etag(self):
+        """Test list ETags depend on the collection and on the query string"""
+        url = f'/api/tasks/?project={self.project.id}'
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertNotEqual(self.client.get(url + '&status=done')['ETag'], etag)
+
+        Task.objects.create(title='Second Task', project=self.project)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 2)
+
+    def test_non_member_gets_no_304(self):
+        """Test a matching ETag does not bypass the permission check"""
+        url = f'/api/tasks/{self.task.id}/'
+        etag = self.client.get(url)['ETag']
+        other = User.objects.create_user(email='other@example.com', username='other', password='testpass123')
+        self.client.force_authenticate(user=other)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_comment_etag(self):
+        """Test comments support conditional GETs"""
+        comment = Comment.objects.create(content='Comment', task=self.task, author=self.user)
+        url = f'/api/tasks/comments/{comment.id}/?task={self.task.id}'
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.client.patch(url, {'content': 'Edited'})
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class ProjectBoardTest(TestCase):
+    """Test cases for the project kanban board endpoint"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='test@example.com',
+            username='testuser',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.project = Project.objects.create(
+            title='Test Project',
+            owner=self.user
+        )
+        for i in range(5):
+            Task.objects.create(title=f'Todo {i}', project=self.project)
+        for i in range(2):
+            Task.objects.create(title=f'Done {i}', project=self.project, status='done')
+        other_project = Project.objects.create(title='Other Project', owner=self.user)
+        Task.objects.create(title='Elsewhere', project=other_project)
+        visible_project_ids(self.user)
+
+    def test_board_columns(self):
+        """Test each column has its full count and at most ?limit= tasks, in one board query"""
+        # The permission check, then the board
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/api/projects/{self.project.id}/board/?limit=3&fields=id,title')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        columns = {column['status']: column for column in response.data['columns']}
+        self.assertEqual([column['status'] for column in response.data['columns']],
+                         [choice for choice, _ in Task.STATUS_CHOICES])
+        self.assertEqual(columns['todo']['count'], 5)
+        self.assertEqual([task['title'] for task in columns['todo']['tasks']], ['Todo 4', 'Todo 3', 'Todo 2'])
+        self.assertEqual(columns['done']['count'], 2)
+        self.assertEqual(len(columns['done']['tasks']), 2)
+        self.assertEqual(columns['review'], {'status': 'review', 'label': 'In Review', 'count': 0, 'tasks': []})
+
+    def test_board_renders_list_fields(self):
+        """Test board tasks are rendered like task list items"""
+        response = self.client.get(f'/api/projects/{self.project.id}/board/')
+        task = response.data['columns'][0]['tasks'][0]
+        list_item = self.client.get(f'/api/tasks/{task["id"]}/').data
+        self.assertEqual(task['project_title'], 'Test Project')
+        self.assertEqual(task['assignees_detail'], [])
+        self.assertEqual(task['updated_at'], list_item['updated_at'])
+
+    def test_board_requires_membership(self):
+        """Test non-members get a 404"""
+        other_user = User.objects.create_user(email='other@example.com', username='other', password='testpass123')
+        self.client.force_authenticate(user=other_user)
+        response = self.client.get(f'/api/projects/{self.project.id}/board/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ProjectExportTest(TestCase):
+    """Test cases for the streaming project export"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='test@example.com',
+            username='testuser',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.project = Project.objects.create(
+            title='Test Project',
+            owner=self.user
+        )
+        self.tag = Tag.objects.create(name='backend')
+        self.tasks = [Task.objects.create(title=f'Task {i}', project=self.project) for i in range(5)]
+        self.tasks[3].assignees.add(self.user)
+        self.tasks[3].tags.add(self.tag)
+        Task.objects.create(title='Elsewhere', project=Project.objects.create(title='Other', owner=self.user))
+        visible_project_ids(self.user)
+
+    def get_export(self, export_format):
+        response = self.client.get(f'/api/projects/{self.project.id}/export/?format={export_format}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_export_ndjson_in_chunks(self):
+        """Test NDJSON export streams every task with assignees and tags loaded per chunk"""
+        with mock.patch.object(export, 'EXPORT_CHUNK_SIZE', 2), self.assertNumQueries(2 + 3 * 2):
+            response, content = self.get_export('ndjson')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        items = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual([item['id'] for item in items], [task.id for task in self.tasks])
+        self.assertEqual(items[3]['assignees'], [self.user.id])
+        self.assertEqual(items[3]['assignee_emails'], ['test@example.com'])
+        self.assertEqual((items[3]['tags'], items[3]['tag_names']), ([self.tag.id], ['backend']))
+        self.assertEqual(items[0]['assignees'], [])
+
+    async def test_export_under_asgi(self):
+        """Test ASGI exports come from an async iterator, chunk by chunk, instead of being built whole"""
+        url = f'/api/projects/{self.project.id}/export/?format=ndjson'
+        headers = {'Authorization': f'Bearer {AccessToken.for_user(self.user)}'}
+        with mock.patch.object(export, 'EXPORT_CHUNK_SIZE', 2):
+            response = await AsyncClient().get(url, headers=headers)
+            self.assertTrue(response.is_async)
+            chunks = [chunk async for chunk in response.streaming_content]
+        self.assertEqual([chunk.count(b'\n') for chunk in chunks], [2, 2, 1])
+
+    def test_export_csv(self):
+        """Test CSV export has a header row and joins lists with semicolons"""
+        response, content = self.get_export('csv')
+        self.assertIn(f'project-{self.project.id}-tasks.csv', response['Content-Disposition'])
+        rows = list(csv.DictReader(content.splitlines()))
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[3]['tags'], str(self.tag.id))
+        self.assertEqual(rows[3]['assignee_emails'], 'test@example.com')
+        self.assertEqual(rows[0]['due_date'], '')
+
+        self.assertEqual(
+            self.client.get(f'/api/projects/{self.project.id}/export/?format=xml').status_code,
+            status.HTTP_400_BAD_REQUEST
+        )
+        other = User.objects.create_user(email='other@example.com', username='other', password='testpass123')
+        self.client.force_authenticate(user=other)
+        self.assertEqual(
+            self.client.get(f'/api/projects/{self.project.id}/export/').status_code, status.HTTP_404_NOT_FOUND
+        )
+
+
+class ProjectImportTest(TestCase):
+    """Test cases for chunked task imports"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='test@example.com',
+            username='testuser',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.project = Project.objects.create(
+            title='Test Project',
+            owner=self.user
+        )
+        self.tag = Tag.objects.create(name='backend')
+
+    def test_import_ndjson_reports_row_errors(self):
+        """Test valid rows are imported chunk by chunk and invalid ones reported by line"""
+        lines = [
+            {'title': 'First', 'assignee_emails': ['test@example.com'], 'tag_names': ['backend', 'new']},
+            {'title': 'Second', 'priority': 'high'},
+            'not json',
+            {'title': 'Third', 'assignee_emails': ['nobody@example.com']},
+            {'title': 'Fourth', 'status': 'bogus'},
+            {'description': 'No title'},
+            {'title': 'Fifth', 'tags': [self.tag.id]},
+        ]
+        body = '\n'.join(line if isinstance(line, str) else json.dumps(line) for line in lines)
+        with mock.patch.object(imports, 'IMPORT_CHUNK_SIZE', 3):
+            response = self.client.generic(
+                'POST', f'/api/projects/{self.project.id}/import/', body, content_type='application/x-ndjson'
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data['imported'], response.data['failed']), (3, 4))
+        self.assertEqual([error['line'] for error in response.data['errors']], [3, 4, 5, 6])
+        self.assertIn('assignee_emails', response.data['errors'][1]['errors'])
+        self.assertIn('status', response.data['errors'][2]['errors'])
+
+        first = Task.objects.get(title='First')
+        self.assertEqual(list(first.assignees.all()), [self.user])
+        self.assertEqual(sorted(first.tags.values_list('name', flat=True)), ['backend', 'new'])
+        self.assertEqual(Task.objects.get(title='Fifth').tags.get(), self.tag)
+        self.assertEqual(first.created_by, self.user)
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.task_count, 3)
+
+    def test_import_ndjson_rejects_malformed_lists(self):
+        """Test list fields of the wrong shape are row errors and rejected rows create no tags"""
+        lines = [
+            {'title': 'Number', 'assignee_emails': 5},
+            {'title': 'Objects', 'tag_names': [{'a': 1}]},
+            {'title': 'Booleans', 'tags': [True]},
+            {'title': 'Rejected', 'status': 'bogus', 'tag_names': ['orphan']},
+            {'title': 'Kept', 'tag_names': ['kept']},
+        ]
+        body = '\n'.join(json.dumps(line) for line in lines)
+        response = self.client.generic(
+            'POST', f'/api/projects/{self.project.id}/import/', body, content_type='application/x-ndjson'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data['imported'], response.data['failed']), (1, 4))
+        errors = {error['line']: error['errors'] for error in response.data['errors']}
+        self.assertIn('assignee_emails', errors[1])
+        self.assertIn('tag_names', errors[2])
+        self.assertIn('tags', errors[3])
+        self.assertIn('status', errors[4])
+        self.assertFalse(Tag.objects.filter(name='orphan').exists())
+        self.assertEqual(Task.objects.get(title='Kept').tags.get().name, 'kept')
+
+    def test_import_command_round_trips_export(self):
+        """Test a CSV export imports into another project through import_tasks"""
+        source = Project.objects.create(title='Source', owner=self.user)
+        task = Task.objects.create(title='Exported, "quoted"', description='Line 1\nLine 2', project=source)
+        task.assignees.add(self.user)
+        task.tags.add(self.tag)
+        Task.objects.create(title='Plain', project=source, status='done')
+        content = b''.join(
+            chunk.encode() for chunk in export.stream_export(source.id, 'csv')
+        )
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'tasks.csv')
+        with open(path, 'wb') as file:
+            file.write(content)
+
+        output = StringIO()
+        call_command('import_tasks', path, project=self.project.id, user='test@example.com', stdout=output)
+        self.assertIn('2 task(s) imported, 0 failed', output.getvalue())
+        imported = Task.objects.get(project=self.project, title='Exported, "quoted"')
+        self.assertEqual(imported.description, 'Line 1\nLine 2')
+        self.assertEqual(list(imported.tags.all()), [self.tag])
+        self.assertEqual(list(imported.assignees.all()), [self.user])
+        self.assertEqual(Task.objects.get(project=self.project, title='Plain').status, 'done')
+
+        response = self.client.generic(
+            'POST', f'/api/projects/{self.project.id}/import/?format=csv', 'name\nx', content_type='text/csv'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TaskArchiveTest(TestCase):
+    """Test cases for archiving closed tasks and restoring them"""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='test@example.com',
+            username='testuser',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.project = Project.objects.create(
+            title='Test Project',
+            owner=self.user
+        )
+        self.tag = Tag.objects.create(name='backend')
+        self.old = timezone.now() - timedelta(days=settings.TASK_ARCHIVE_AFTER_DAYS + 1)
+
+        self.done = Task.objects.create(title='Old done task', project=self.project, status='done', created_by=self.user)
+        self.done.assignees.add(self.user)
+        self.done.tags.add(self.tag)
+        self.comment = Comment.objects.create(task=self.done, author=self.user, content='Shipped')
+        self.attachment = uploads.store_attachment(
+            self.done, self.user, 'notes.txt', hashlib.sha256(b'notes').hexdigest(), 5, SimpleUploadedFile('n', b'notes')
+        )
+        self.cancelled = Task.objects.create(title='Old cancelled task', project=self.project, status='cancelled')
+        self.open = Task.objects.create(title='Old open task', project=self.project)
+        self.recent = Task.objects.create(title='Recent done task', project=self.project, status='done')
+        Task.objects.filter(status__in=Task.CLOSED_STATUSES).exclude(pk=self.recent.pk).update(closed_at=self.old)
+        Task.objects.filter(pk=self.done.pk).update(created_at=self.old)
+
+    def test_archive_and_restore(self):
+        """Test closed tasks move to the archive with their relations and come back unchanged"""
+        self.assertEqual(archive.archive_tasks(batch_size=1), 2)
+        self.assertEqual(set(Task.objects.values_list('title', flat=True)), {'Old open task', 'Recent done task'})
+        archived = ArchivedTask.objects.get(pk=self.done.pk)
+        self.assertEqual((archived.comments_count, archived.attachments_count), (1, 1))
+        self.assertEqual(list(archived.assignees.all()), [self.user])
+        self.assertEqual(ArchivedComment.objects.get().pk, self.comment.pk)
+        self.assertEqual(ArchivedAttachment.objects.get().blob.ref_count, 1)
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.task_count, 2)
+        self.assertTrue(Change.objects.filter(model='task', object_id=self.done.pk, deleted=True).exists())
+
+        response = self.client.get('/api/tasks/', {'archived': 'true', 'status': 'done'})
+        self.assertEqual([task['id'] for task in response.data['results']], [self.done.pk])
+        self.assertIn('archived_at', response.data['results'][0])
+        response = self.client.get(f'/api/tasks/{self.done.pk}/', {'archived': 'true'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['comments'][0]['content'], 'Shipped')
+        self.assertEqual(response.data['attachments'][0]['file_name'], 'notes.txt')
+        self.assertEqual(self.client.get(f'/api/tasks/{self.done.pk}/').status_code, status.HTTP_404_NOT_FOUND)
+
+        other = User.objects.create_user(email='other@example.com', username='other', password='testpass123')
+        self.client.force_authenticate(user=other)
+        self.assertEqual(self.client.get('/api/tasks/', {'archived': 'true'}).data['count'], 0)
+        self.assertEqual(self.client.post(f'/api/tasks/{self.done.pk}/restore/').status_code, 404)
+
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post(f'/api/tasks/{self.done.pk}/restore/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data['id'], response.data['tags']), (self.done.pk, [self.tag.pk]))
+        restored = Task.objects.get(pk=self.done.pk)
+        self.assertEqual(restored.created_at, self.old)
+        self.assertGreater(restored.updated_at, self.old)
+        self.assertGreater(restored.closed_at, self.old)
+        self.assertEqual(restored.comments.get().pk, self.comment.pk)
+        self.assertEqual(restored.attachments.get().blob.ref_count, 1)
+        self.assertFalse(ArchivedTask.objects.filter(pk=self.done.pk).exists())
+        self.assertFalse(ArchivedAttachment.objects.exists())
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.task_count, 3)
+        self.assertEqual(self.client.post(f'/api/tasks/{self.done.pk}/restore/').status_code, 404)
+
+    def test_archive_age_counts_from_closing(self):
+        """Test touching a closed task keeps its archive age while reopening it starts over"""
+        Comment.objects.create(task=self.cancelled, author=self.user, content='Late note')
+        self.client.patch(f'/api/tasks/{self.done.pk}/', {'status': 'todo'})
+        self.assertIsNone(Task.objects.get(pk=self.done.pk).closed_at)
+        self.client.patch(f'/api/tasks/{self.done.pk}/', {'status': 'done'})
+        self.assertGreater(Task.objects.get(pk=self.done.pk).closed_at, self.old)
+        self.assertEqual(archive.archive_tasks(), 1)
+        self.assertEqual(list(ArchivedTask.objects.values_list('id', flat=True)), [self.cancelled.pk])
+
+    def test_archive_and_restore_keep_files_from_before_blobs(self):
+        """Test moving an attachment without a blob between the tables keeps its file"""
+        path = TaskAttachment.objects.create(task=self.done, file=SimpleUploadedFile('old.txt', b'old')).file.path
+        with self.captureOnCommitCallbacks(execute=True):
+            archive.archive_tasks()
+        self.assertTrue(os.path.exists(path))
+        with self.captureOnCommitCallbacks(execute=True):
+            archive.restore_tasks([self.done.pk])
+        self.assertTrue(os.path.exists(path))
+        with self.captureOnCommitCallbacks(execute=True):
+            Task.objects.get(pk=self.done.pk).delete()
+        self.assertFalse(os.path.exists(path))
+
+    def test_archive_command(self):
+        """Test archive_tasks counts with --dry-run and releases blobs when an archived project goes"""
+        output = StringIO()
+        call_command('archive_tasks', dry_run=True, stdout=output)
+        self.assertIn('2 task(s) would be archived', output.getvalue())
+        self.assertEqual(ArchivedTask.objects.count(), 0)
+        call_command('archive_tasks', batch_size=1, stdout=output)
+        self.assertIn('2 task(s) archived\n', output.getvalue())
+
+        response = self.client.get('/api/tasks/', {'archived': 'true', 'search': 'cancelled'})
+        self.assertEqual([task['id'] for task in response.data['results']], [self.cancelled.pk])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.delete()
+        self.assertFalse(ArchivedTask.objects.exists())
+        self.assertFalse(Blob.objects.exists())
+
+
+class ProjectPurgeTest(TestCase):
+    """Test cases for deleting projects in background batches"""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(
+            MEDIA_ROOT=media_root, PROJECT_PURGE_BATCH_SIZE=2, PROJECT_PURGE_BATCHES_PER_JOB=2
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='test@example.com',
+            username='testuser',
+            password='testpass123'
+        )
+        self.member = User.objects.create_user(email='member@example.com', username='member', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        self.project = Project.objects.create(title='Big Project', owner=self.user)
+        self.project.members.add(self.member)
+        self.other = Project.objects.create(title='Other Project', owner=self.user)
+        self.kept = Task.objects.create(title='Kept', project=self.other)
+
+        tasks = [Task.objects.create(title=f'Task {i}', project=self.project, status='done') for i in range(5)]
+        Comment.objects.create(task=tasks[0], author=self.member, content='Note')
+        tasks[0].tags.add(Tag.objects.create(name='backend'))
+        attachment = uploads.store_attachment(
+            tasks[1], self.user, 'a.txt', hashlib.sha256(b'data').hexdigest(), 4, SimpleUploadedFile('a', b'data')
+        )
+        self.path = attachment.blob.file.path
+        # Attachments from before blobs own their file, including once archived
+        self.legacy_paths = [
+            TaskAttachment.objects.create(task=task, file=SimpleUploadedFile('old.txt', b'old')).file.path
+            for task in (tasks[2], tasks[4])
+        ]
+        Task.objects.filter(pk=tasks[4].pk).update(closed_at=timezone.now() - timedelta(days=365))
+        archive.archive_tasks()
+
+    def test_delete_hides_project_then_purges_in_batches(self):
+        """Test a deleted project disappears at once and its tasks, files and archive go in batches"""
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(f'/api/projects/{self.project.id}/')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(
+            (response.data['task_count'], response.data['tasks_remaining'], response.data['archived_tasks_remaining']),
+            (4, 4, 1)
+        )
+        self.assertEqual([project['id'] for project in self.client.get('/api/projects/').data['results']],
+                         [self.other.id])
+        self.assertEqual([task['id'] for task in self.client.get('/api/tasks/').data['results']], [self.kept.id])
+        self.client.force_authenticate(user=self.member)
+        self.assertEqual(self.client.get('/api/tasks/').data['count'], 0)
+        self.assertEqual(self.client.get(f'/api/projects/{self.project.id}/deletion/').status_code, 404)
+
+        # Two batches of two tasks per job, then a continuation job
+        self.client.force_authenticate(user=self.user)
+        logged = Change.objects.count()
+        with self.captureOnCommitCallbacks(execute=True):
+            run_job(claim_jobs('worker', 1)[0])
+        progress = self.client.get(f'/api/projects/{self.project.id}/deletion/').data
+        self.assertEqual((progress['tasks_remaining'], progress['archived_tasks_remaining']), (0, 1))
+        self.assertFalse(Blob.objects.exists())
+        self.assertFalse(os.path.exists(self.path))
+        self.assertEqual([os.path.exists(path) for path in self.legacy_paths], [False, True])
+        self.assertEqual(Change.objects.count(), logged)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            run_job(claim_jobs('worker', 1)[0])
+        self.assertFalse(Project.objects.filter(pk=self.project.pk).exists())
+        self.assertFalse(ArchivedTask.objects.exists())
+        self.assertFalse(os.path.exists(self.legacy_paths[1]))
+        self.assertEqual(list(Task.objects.all()), [self.kept])
+        self.assertFalse(Job.objects.exists())
+        self.assertEqual(self.client.get(f'/api/projects/{self.project.id}/deletion/').status_code, 404)
+
+    def test_purge_projects_command(self):
+        """Test purge_projects finishes deletions whose jobs were lost"""
+        purge.delete_project(self.project)
+        Job.objects.all().delete()
+        output = StringIO()
+        call_command('purge_projects', stdout=output)
+        self.assertIn(f'Project {self.project.id}: 2 tasks purged', output.getvalue())
+        self.assertIn('1 project(s) purged', output.getvalue())
+        self.assertEqual(list(Project.objects.all()), [self.other])
+
+
+class ActivityLogTest(TestCase):
+    """Test cases for the activity log and its buffered writes"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='test@example.com',
+            username='testuser',
+            password='testpass123'
+        )
+        self.member = User.objects.create_user(email='member@example.com', username='member', password='testpass123')
+        self.outsider = User.objects.create_user(email='out@example.com', username='out', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        self.project = Project.objects.create(title='Test Project', owner=self.user)
+        self.url = f'/api/projects/{self.project.id}/activity/'
+
+    def events(self, **filters):
+        return list(
+            Activity.objects.filter(project_id=self.project.id, **filters)
+            .order_by('id').values_list('model', 'verb', 'changes')
+        )
+
+    def test_api_writes_are_logged(self):
+        """Test task, comment and member writes are logged with their diffs and actor"""
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                '/api/tasks/', {'title': 'Task', 'project': self.project.id, 'priority': 'high'}, format='json'
+            )
+        task_id = response.data['id']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f'/api/tasks/{task_id}/', {'status': 'in_progress'}, format='json')
+            self.client.post(f'/api/projects/{self.project.id}/add_member/', {'user_id': self.member.id})
+            self.client.post('/api/tasks/comments/', {'task': task_id, 'content': 'Note'})
+        self.assertEqual(self.events(), [
+            ('task', 'created', {'title': [None, 'Task'], 'status': [None, 'todo'], 'priority': [None, 'high'],
+                                 'project': [None, self.project.id]}),
+            ('task', 'updated', {'status': ['todo', 'in_progress']}),
+            ('member', 'added', {}),
+            ('comment', 'created', {}),
+        ])
+        self.assertEqual(set(Activity.objects.values_list('actor_id', flat=True)), {self.user.id})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f'/api/tasks/{task_id}/')
+        # The task's comment goes with it unlogged
+        self.assertEqual(self.events()[-1], ('task', 'deleted', {'title': ['Task', None]}))
+        self.assertEqual(len(self.events()), 5)
+
+    def test_buffer_merges_updates_into_one_insert(self):
+        """Test successive changes of an object become one event, written with one insert"""
+        task = Task.objects.create(title='Task', project=self.project)
+        tag = Tag.objects.create(name='backend')
+        task = Task.objects.get(pk=task.pk)
+        with buffered_activity(self.user) as buffer:
+            with self.captureOnCommitCallbacks(execute=True):
+                task.status = 'done'
+                task.save()
+                task.title = 'Renamed'
+                task.save()
+                task.assignees.add(self.member)
+                task.tags.add(tag)
+                task.tags.remove(tag)
+            self.assertEqual(len(buffer.events), 1)
+            with self.assertNumQueries(1):
+                buffer.flush()
+        event = Activity.objects.get(verb='updated')
+        self.assertEqual(event.actor, self.user)
+        self.assertEqual(event.changes, {
+            'status': ['todo', 'done'], 'title': ['Task', 'Renamed'], 'assignees': {'added': [self.member.id]},
+        })
+
+    def test_bulk_writes_and_archival_are_logged(self):
+        """Test bulk creates and updates, archival and restores are logged"""
+        tag = Tag.objects.create(name='backend')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/tasks/bulk/', [
+                {'title': 'A', 'project': self.project.id, 'tags': [tag.id]},
+                {'title': 'B', 'project': self.project.id},
+            ], format='json')
+        ids = [item['id'] for item in response.data['results']]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch('/api/tasks/bulk/', [
+                {'id': ids[0], 'status': 'done', 'tags': [], 'assignees': [self.user.id]},
+                {'id': ids[1], 'title': 'B'},
+            ], format='json')
+        self.assertEqual(self.events(verb='created', task_id=ids[0])[0][2]['tags'], {'added': [tag.id]})
+        self.assertEqual(self.events(verb='updated'), [
+            ('task', 'updated', {
+                'status': ['todo', 'done'], 'tags': {'removed': [tag.id]}, 'assignees': {'added': [self.user.id]},
+            }),
+        ])
+
+        Task.objects.filter(pk=ids[0]).update(closed_at=timezone.now() - timedelta(days=365))
+        with self.captureOnCommitCallbacks(execute=True):
+            archive.archive_tasks()
+        with self.captureOnCommitCallbacks(execute=True):
+            archive.restore_tasks([ids[0]])
+        self.assertEqual(
+            [verb for _, verb, _ in self.events(task_id=ids[0])], ['created', 'updated', 'archived', 'restored']
+        )
+
+    def test_activity_endpoint(self):
+        """Test the activity log is paginated newest first, filtered by task and hidden from outsiders"""
+        task = Task.objects.create(title='Task', project=self.project)
+        now = timezone.now()
+        Activity.objects.bulk_create([
+            Activity(project_id=self.project.id, task_id=task.id if i % 2 else None, model='task', object_id=task.id,
+                     verb='updated', actor=self.user, created_at=now - timedelta(minutes=i))
+            for i in range(25)
+        ])
+        response = self.client.get(self.url, {'expand': 'actor_detail'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 25)
+        self.assertEqual(len(response.data['results']), 20)
+        self.assertEqual(response.data['results'][0]['actor_detail']['email'], self.user.email)
+        times = [event['created_at'] for event in response.data['results']]
+        self.assertEqual(times, sorted(times, reverse=True))
+        self.assertEqual(self.client.get(self.url, {'task': task.id}).data['count'], 12)
+        self.assertEqual(self.client.get(self.url, {'task': 'x'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(self.client.get(self.url, {'pagination': 'cursor'}).data['results']), 20)
+        response = self.client.get(self.url, {'pagination': 'cursor', 'ordering': 'title'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([event['created_at'] for event in response.data['results']], times)
+
+        self.client.force_authenticate(user=self.outsider)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ActivityRequestTest(TransactionTestCase):
+    """Requests commit for real, so their events go through the middleware's buffer"""
+
+    def test_request_changes_are_merged(self):
+        """Test a request changing fields and assignees writes one merged event with one insert"""
+        client = APIClient()
+        user = User.objects.create_user(email='test@example.com', username='testuser', password='testpass123')
+        client.force_authenticate(user=user)
+        project = Project.objects.create(title='Test Project', owner=user)
+        task = Task.objects.create(title='Task', project=project)
+        Activity.objects.all().delete()
+
+        with mock.patch.object(Activity.objects, 'bulk_create', wraps=Activity.objects.bulk_create) as bulk_create:
+            response = client.patch(
+                f'/api/tasks/{task.id}/', {'status': 'done', 'assignees': [user.id]}, format='json'
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        bulk_create.assert_called_once()
+        event = Activity.objects.get()
+        self.assertEqual((event.verb, event.actor_id), ('updated', user.id))
+        self.assertEqual(event.changes, {'status': ['todo', 'done'], 'assignees': {'added': [user.id]}})
+
+
+@override_settings(SYNC_SETTLE_SECONDS=0)
+class SyncAPITest(TestCase):
+    """Test cases for the delta sync endpoint"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='test@example.com',
+            username='testuser',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.project = Project.objects.create(
+            title='Test Project',
+            owner=self.user
+        )
+        self.task = Task.objects.create(title='Old Task', project=self.project)
+        self.token = self.client.get('/api/sync/').data['token']
+
+    def sync(self, token=None):
+        response = self.client.get(f'/api/sync/?since={token or self.token}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_sync_returns_changes_and_tombstones(self):
+        """Test only objects changed since the token come back, deletes as ids"""
+        self.assertEqual(self.sync()['tasks'], [])
+        new_task = Task.objects.create(title='New Task', project=self.project)
+        comment = Comment.objects.create(content='Comment', task=new_task, author=self.user)
+        tag = Tag.objects.create(name='Bug')
+        deleted_id = self.task.id
+        self.task.delete()
+
+        data = self.sync()
+        self.assertEqual([task['title'] for task in data['tasks']], ['New Task'])
+        self.assertEqual([item['id'] for item in data['comments']], [comment.id])
+        self.assertEqual([item['name'] for item in data['tags']], ['Bug'])
+        self.assertEqual(data['projects'][0]['task_count'], 1)
+        self.assertEqual(data['deleted']['tasks'], [deleted_id])
+        self.assertEqual(data['visible_projects'], [self.project.id])
+
+        data = self.sync(data['token'])
+        self.assertEqual((data['tasks'], data['projects'], data['deleted']['tasks']), ([], [], []))
+        tag_id = tag.id
+        tag.delete()
+        self.assertEqual(self.sync(data['token'])['deleted']['tags'], [tag_id])
+
+    def test_sync_is_scoped_to_visible_projects(self):
+        """Test other projects' changes are left out until the user joins"""
+        other_user = User.objects.create_user(email='other@example.com', username='other', password='testpass123')
+        other_project = Project.objects.create(title='Other Project', owner=other_user)
+        Task.objects.create(title='Hidden', project=other_project)
+        data = self.sync()
+        self.assertEqual(data['tasks'], [])
+
+        other_project.members.add(self.user)
+        data = self.sync(data['token'])
+        self.assertEqual([task['title'] for task in data['tasks']], ['Hidden'])
+        self.assertEqual([project['id'] for project in data['projects']], [other_project.id])
+
+    def test_task_move_is_a_tombstone_for_the_old_project(self):
+        """Test members who cannot see a task's new project get a tombstone"""
+        other_user = User.objects.create_user(email='other@example.com', username='other', password='testpass123')
+        other_project = Project.objects.create(title='Other Project', owner=other_user)
+        self.task.project = other_project
+        self.task.save()
+        self.assertEqual(self.sync()['deleted']['tasks'], [self.task.id])
+
+    @override_settings(SYNC_SETTLE_SECONDS=60)
+    def test_change_committed_late_is_not_skipped(self):
+        """Test a change whose id is older than an already synced one still reaches the client"""
+        # Transaction A logs its change first but has not committed yet...
+        Task.objects.create(title='A', project=self.project)
+        in_flight = list(Change.objects.filter(id__gt=self.token))
+        Change.objects.filter(id__gt=self.token).delete()
+        # ...while transaction B logs a newer change and commits
+        Task.objects.create(title='B', project=self.project)
+        data = self.sync()
+        self.assertEqual([task['title'] for task in data['tasks']], ['B'])
+        self.assertEqual(data['token'], self.token)
+
+        # A commits after the sync; the next one still has it, and B again
+        Change.objects.bulk_create(in_flight)
+        data = self.sync(data['token'])
+        self.assertEqual({task['title'] for task in data['tasks']}, {'A', 'B'})
+
+        # Once settled, the token moves past both
+        with mock.patch('tasks.sync.timezone.now', return_value=timezone.now() + timedelta(seconds=61)):
+            data = self.sync(data['token'])
+        self.assertEqual(data['token'], str(Change.objects.latest('id').id))
+        self.assertEqual(self.sync(data['token'])['tasks'], [])
+
+    def test_sync_limit_and_expired_token(self):
+        """Test large deltas are paged and pruned tokens get a 410"""
+        for i in range(3):
+            Task.objects.create(title=f'Task {i}', project=self.project)
+        data = self.client.get(f'/api/sync/?since={self.token}&limit=2').data
+        self.assertTrue(data['has_more'])
+        data = self.sync(data['token'])
+        self.assertFalse(data['has_more'])
+
+        call_command('prune_changes', days=0, stdout=StringIO())
+        Task.objects.create(title='After prune', project=self.project)
+        response = self.client.get(f'/api/sync/?since={self.token}')
+        self.assertEqual(response.status_code, status.HTTP_410_GONE)
+
+
+class TaskEventsTest(TestCase):
+    """Test cases for the real-time event broadcaster and stream"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='test@example.com',
+            username='testuser',
+            password='testpass123'
+        )
+        self.project = Project.objects.create(
+            title='Test Project',
+            owner=self.user
+        )
+
+    async def test_broadcaster_fans_out_by_project_and_membership(self):
+        """Test events reach only subscribers of the project, and joins widen the subscription"""
+        broadcaster = LocalBroadcaster()
+        mine = broadcaster.subscribe(1, {10})
+        other = broadcaster.subscribe(2, {20})
+        broadcaster.publish([
+            Change(id=1, model='task', object_id=5, project_id=10),
+            Change(id=2, model='tag', object_id=1),
+            Change(id=3, model='member', object_id=2, project_id=10),
+            Change(id=4, model='comment', object_id=7, project_id=10),
+        ])
+        await asyncio.sleep(0)
+        self.assertEqual([(await mine.get())['token'] for _ in range(2)], ['1', '4'])
+        self.assertEqual([(await other.get())['model'] for _ in range(2)], ['member', 'comment'])
+        broadcaster.unsubscribe(mine)
+        broadcaster.unsubscribe(other)
+        self.assertEqual(broadcaster.subscription_count, 0)
+
+    @override_settings(EVENTS_QUEUE_SIZE=2)
+    async def test_slow_consumer_overflows(self):
+        """Test a full queue marks the subscription overflowed instead of growing"""
+        broadcaster = LocalBroadcaster()
+        subscription = broadcaster.subscribe(1, {10})
+        broadcaster.publish([Change(id=i, model='task', object_id=i, project_id=10) for i in range(5)])
+        await asyncio.sleep(0)
+        self.assertTrue(subscription.overflowed)
+        self.assertEqual(subscription.queue.qsize(), 2)
+
+    @override_settings(SYNC_SETTLE_SECONDS=60, EVENTS_POLL_INTERVAL=0.01)
+    async def test_change_log_broadcaster_publishes_late_commits(self):
+        """Test a change committed after a newer one was polled is still published, once"""
+        broadcaster = ChangeLogBroadcaster()
+        subscription = broadcaster.subscribe(self.user.pk, {self.project.id})
+        # The id of a change whose transaction has not committed yet
+        in_flight = await Change.objects.acreate(model='task', object_id=1, project_id=self.project.id)
+        await in_flight.adelete()
+        await Change.objects.acreate(model='task', object_id=2, project_id=self.project.id)
+        self.assertEqual((await asyncio.wait_for(subscription.get(), 5))['id'], 2)
+
+        await Change.objects.abulk_create([in_flight])
+        self.assertEqual((await asyncio.wait_for(subscription.get(), 5))['id'], 1)
+        await asyncio.sleep(0.05)
+        self.assertTrue(subscription.queue.empty())
+        broadcaster.unsubscribe(subscription)
+        await asyncio.wait_for(broadcaster.poller, 5)
+
+    async def test_event_stream(self):
+        """Test the stream authenticates, starts with a ready event and carries committed changes"""
+        client = AsyncClient()
+        response = await client.get('/api/events/')
+        self.assertEqual(response.status_code, 401)
+
+        token = str(AccessToken.for_user(self.user))
+        response = await client.get(f'/api/events/?access_token={token}')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = aiter(response.streaming_content)
+        self.assertIn(b'event: ready', await anext(stream))
+        get_broadcaster().committed([Change(id=99, model='task', object_id=1, project_id=self.project.id)])
+        self.assertIn(b'id: 99\nevent: change', await anext(stream))
+        await stream.aclose()
+
+    def test_events_load_test_command(self):
+        """Test the load test opens, feeds and closes every stream"""
+        out = StringIO()
+        call_command('events_load_test', connections=20, events=3, stdout=out)
+        self.assertIn('20 idle streams open', out.getvalue())
+        self.assertIn('60 events delivered', out.getvalue())
+        self.assertIn('0 subscriptions left open', out.getvalue())
+
+
+class AsyncReadViewsTest(TestCase):
+    """Test cases for the async task, comment and project read views (ASYNC_READ_VIEWS)"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='test@example.com',
+            username='testuser',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.project = Project.objects.create(
+            title='Test Project',
+            owner=self.user
+        )
+        tag = Tag.objects.create(name='Bug')
+        for i in range(3):
+            task = Task.objects.create(title=f'Task {i}', project=self.project, created_by=self.user)
+            task.assignees.add(self.user)
+            task.tags.add(tag)
+        self.task = task
+        Comment.objects.create(content='Comment', task=self.task, author=self.user)
+        self.headers = {'Authorization': f'Bearer {AccessToken.for_user(self.user)}'}
+
+    def async_get(self, url, **headers):
+        with override_settings(ROOT_URLCONF=ASYNC_READ_URLCONF):
+            response = async_to_sync(AsyncClient().get)(url, headers={**self.headers, **headers})
+            # resolver_match is resolved lazily, against the current URLconf
+            response.served_async = asyncio.iscoroutinefunction(response.resolver_match.func)
+        return response
+
+    def assertSameOutput(self, url):
+        response = self.async_get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.served_async)
+        self.assertEqual(response.content, self.client.get(url).content)
+
+    def test_async_reads_match_sync_reads(self):
+        """Test the async list and detail views render exactly what the viewsets render"""
+        self.assertSameOutput(f'/api/tasks/?project={self.project.id}')
+        self.assertSameOutput('/api/tasks/?expand=project_detail&ordering=-priority&page_size=2')
+        self.assertSameOutput('/api/tasks/?fields=id,title,project_title&search=task')
+        self.assertSameOutput(f'/api/tasks/{self.task.id}/')
+        self.assertSameOutput(f'/api/tasks/comments/?task={self.task.id}&expand=author_detail')
+        self.assertSameOutput('/api/projects/?expand=members_detail')
+        with override_settings(FAST_LIST_SERIALIZATION=False):
+            self.assertSameOutput('/api/tasks/?assignee={}'.format(self.user.id))
+
+    def test_async_conditional_get(self):
+        """Test the async views answer a matching ETag with a 304"""
+        for url in ['/api/tasks/', f'/api/tasks/{self.task.id}/', '/api/projects/']:
+            etag = self.async_get(url)['ETag']
+            self.assertEqual(etag, self.client.get(url)['ETag'])
+            self.assertEqual(self.async_get(url, **{'If-None-Match': etag}).status_code, 304)
+
+    def test_async_errors_and_fallbacks(self):
+        """Test authentication, permission and pagination errors, and the sync fallbacks"""
+        self.headers = {}
+        self.assertEqual(self.async_get('/api/tasks/').status_code, status.HTTP_401_UNAUTHORIZED)
+        self.headers = {'Authorization': 'Bearer invalid'}
+        self.assertEqual(self.async_get('/api/tasks/').status_code, status.HTTP_401_UNAUTHORIZED)
+
+        other = User.objects.create_user(email='other@example.com', username='other', password='testpass123')
+        self.headers = {'Authorization': f'Bearer {AccessToken.for_user(other)}'}
+        self.assertEqual(self.async_get(f'/api/tasks/{self.task.id}/').status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(self.async_get('/api/tasks/').data['count'], 0)
+        self.assertEqual(self.async_get('/api/tasks/999999/').status_code, status.HTTP_404_NOT_FOUND)
+
+        self.headers = {'Authorization': f'Bearer {AccessToken.for_user(self.user)}'}
+        self.assertEqual(self.async_get('/api/tasks/?page=9').status_code, status.HTTP_404_NOT_FOUND)
+        cursor_page = self.async_get('/api/tasks/?pagination=cursor')
+        self.assertEqual(len(cursor_page.data['results']), 3)
+        self.assertNotIn('count', cursor_page.data)
+
+        with override_settings(ROOT_URLCONF=ASYNC_READ_URLCONF):
+            response = async_to_sync(AsyncClient().post)(
+                '/api/tasks/', {'title': 'New Task', 'project': self.project.id},
+                content_type='application/json', headers=self.headers
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+
+class AsyncReadBenchmarkTest(TransactionTestCase):
+    """The benchmark commits its data, for the WSGI worker threads to read it"""
+
+    def test_benchmark_command(self):
+        """Test the benchmark drives both handlers and cleans up"""
+        out = StringIO()
+        call_command('benchmark_async_reads', requests=8, concurrency=4, workers=2, tasks=5, stdout=out)
+        self.assertIn('wsgi (2 sync workers)', out.getvalue())
+        self.assertIn('asgi (async views)', out.getvalue())
+        self.assertFalse(Task.objects.exists())
+        self.assertFalse(Change.objects.exists())
+
+
+class AttachmentUploadTest(TestCase):
+    """Test cases for chunked, resumable uploads, content-addressed attachment blobs and downloads"""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(
+            MEDIA_ROOT=media_root, ATTACHMENT_UPLOAD_DIR=os.path.join(media_root, 'partial'),
+            ATTACHMENT_CHUNK_MAX_BYTES=1000
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='test@example.com',
+            username='testuser',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.project = Project.objects.create(
+            title='Test Project',
+            owner=self.user
+        )
+        self.task = Task.objects.create(title='Test Task', project=self.project, created_by=self.user)
+        self.content = os.urandom(2500)
+
+    def start(self, **data):
+        response = self.client.post('/api/tasks/attachments/uploads/', {
+            'task': self.task.id, 'file_name': 'report.bin', 'size': len(self.content), **data
+        })
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return f"/api/tasks/attachments/uploads/{response.data['id']}/"
+
+    def send(self, url, offset, data):
+        return self.client.generic(
+            'PATCH', url, data, content_type='application/offset+octet-stream', HTTP_UPLOAD_OFFSET=str(offset)
+        )
+
+    def test_chunked_upload_resumes(self):
+        """Test chunks append at the offset, resume after a lost hash and complete into an attachment"""
+        url = self.start(sha256=hashlib.sha256(self.content).hexdigest())
+        self.assertEqual(self.send(url, 0, self.content[:1000]).data['offset'], 1000)
+
+        response = self.send(url, 0, self.content[:1000])
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response['Upload-Offset'], '1000')
+        self.assertEqual(self.send(url, 1000, self.content[1000:2100]).status_code, 413)
+
+        # Another worker (or a restart) rebuilds the running hash from the partial file
+        uploads._running_hashes.clear()
+        self.assertEqual(self.client.get(url).data['offset'], 1000)
+        self.send(url, 1000, self.content[1000:2000])
+        response = self.send(url, 2000, self.content[2000:])
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['file_name'], 'report.bin')
+
+        attachment = TaskAttachment.objects.get(pk=response.data['id'])
+        with attachment.file.open('rb') as file:
+            self.assertEqual(file.read(), self.content)
+        self.assertEqual(attachment.blob.sha256, hashlib.sha256(self.content).hexdigest())
+        self.assertFalse(AttachmentUpload.objects.exists())
+        self.assertEqual(os.listdir(settings.ATTACHMENT_UPLOAD_DIR), [])
+
+    def test_duplicates_share_one_blob(self):
+        """Test identical files are stored once and the blob goes with its last attachment"""
+        response = self.client.post('/api/tasks/attachments/', {
+            'task': self.task.id, 'file': SimpleUploadedFile('first.bin', self.content)
+        }, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        other_task = Task.objects.create(title='Other Task', project=self.project)
+        self.task = other_task
+        url = self.start()
+        for offset in range(0, len(self.content), 1000):
+            response = self.send(url, offset, self.content[offset:offset + 1000])
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        blob = Blob.objects.get()
+        self.assertEqual(blob.ref_count, 2)
+        self.assertEqual(set(TaskAttachment.objects.values_list('file', flat=True)), {blob.file.name})
+        path = blob.file.path
+
+        with self.captureOnCommitCallbacks(execute=True):
+            other_task.delete()
+        self.assertEqual(Blob.objects.get().ref_count, 1)
+        self.assertTrue(os.path.exists(path))
+        with self.captureOnCommitCallbacks(execute=True):
+            TaskAttachment.objects.get().delete()
+        self.assertFalse(Blob.objects.exists())
+        self.assertFalse(os.path.exists(path))
+
+    def test_checksum_mismatch_and_access(self):
+        """Test a wrong digest discards the upload, and uploads are limited to project members"""
+        url = self.start(sha256='0' * 64)
+        for offset in range(0, len(self.content), 1000):
+            response = self.send(url, offset, self.content[offset:offset + 1000])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertFalse(Blob.objects.exists())
+
+        url = self.start()
+        other = User.objects.create_user(email='other@example.com', username='other', password='testpass123')
+        self.client.force_authenticate(user=other)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+        call_command('prune_uploads', hours=0, stdout=StringIO())
+        self.assertFalse(AttachmentUpload.objects.exists())
+        response = self.client.post('/api/tasks/attachments/uploads/', {
+            'task': self.task.id, 'file_name': 'report.bin', 'size': 10
+        })
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def create_attachment(self):
+        response = self.client.post('/api/tasks/attachments/', {
+            'task': self.task.id, 'file': SimpleUploadedFile('report.pdf', self.content)
+        }, format='multipart')
+        return f"/api/tasks/attachments/{response.data['id']}/download/"
+
+    def test_download_ranges_and_validators(self):
+        """Test downloads stream the file or a range, and answer If-None-Match from the blob digest"""
+        url = self.create_attachment()
+        response = self.client.get(url, HTTP_ACCEPT='application/octet-stream')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+        self.assertEqual(response['Content-Length'], str(len(self.content)))
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="report.pdf"')
+        etag = response['ETag']
+        self.assertEqual(etag, f'"{hashlib.sha256(self.content).hexdigest()}"')
+
+        response = self.client.get(url, HTTP_RANGE='bytes=100-199')
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(b''.join(response.streaming_content), self.content[100:200])
+        self.assertEqual(response['Content-Range'], f'bytes 100-199/{len(self.content)}')
+        response = self.client.get(url, HTTP_RANGE='bytes=-500', HTTP_IF_RANGE=etag)
+        self.assertEqual(b''.join(response.streaming_content), self.content[-500:])
+        response = self.client.get(url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response.close()
+        response = self.client.get(url, HTTP_RANGE=f'bytes={len(self.content)}-')
+        self.assertEqual(response.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(self.content)}')
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+
+        other = User.objects.create_user(email='other@example.com', username='other', password='testpass123')
+        self.client.force_authenticate(user=other)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+
+    async def test_download_under_asgi(self):
+        """Test ASGI downloads are sent block by block from an async iterator, not read whole"""
+        url = await sync_to_async(self.create_attachment)()
+        headers = {'Authorization': f'Bearer {AccessToken.for_user(self.user)}'}
+        with mock.patch.object(downloads, 'BLOCK_SIZE', 1000):
+            response = await AsyncClient().get(url, headers=headers)
+            self.assertTrue(response.is_async)
+            chunks = [chunk async for chunk in response.streaming_content]
+        self.assertEqual([len(chunk) for chunk in chunks], [1000, 1000, 500])
+        self.assertEqual(b''.join(chunks), self.content)
+
+        response = await AsyncClient().get(url, headers={**headers, 'Range': 'bytes=100-199'})
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(b''.join([chunk async for chunk in response.streaming_content]), self.content[100:200])
+
+    def test_download_offload(self):
+        """Test downloads are handed to the front proxy when configured"""
+        url = self.create_attachment()
+        blob = Blob.objects.get()
+        with self.settings(ATTACHMENT_SENDFILE='x-accel-redirect'):
+            response = self.client.get(url, HTTP_RANGE='bytes=0-9')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{blob.file.name}')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="report.pdf"')
+        with self.settings(ATTACHMENT_SENDFILE='x-sendfile'):
+            response = self.client.get(url)
+        self.assertEqual(response['X-Sendfile'], blob.file.path)
@@ -0,0 +1,232 @@
+"""
+Content-addressed attachment storage and resumable, chunked uploads.
+
+Attachment files are stored once per content, as ``Blob`` rows named by their
+SHA-256 digest. ``acquire_blob()`` reuses the blob of an existing digest (the
+new copy is dropped) or stores a new one, and counts the reference;
+``release_blob()`` drops a reference when an attachment is deleted and
+deletes the blob and its file with the last one.
+
+Large files are uploaded in chunks (``/api/tasks/attachments/uploads/``):
+
+1. ``POST`` with ``task``, ``file_name``, ``size`` (and optionally ``sha256``)
+   opens an ``AttachmentUpload``.
+2. ``PATCH`` with an ``Upload-Offset`` header and the raw bytes appends a
+   chunk. The chunk is streamed to a partial file under
+   ``ATTACHMENT_UPLOAD_DIR`` and fed to a running SHA-256 as it is written.
+3. ``GET`` returns the offset to resume from after an interruption; a chunk
+   at any other offset gets a ``409`` with the expected offset.
+4. The chunk that completes the file turns the upload into an attachment.
+
+The running hash is kept in memory per process. When a chunk arrives at
+another worker, or after a restart, the hash is rebuilt from the partial file
+once and then continues incrementally.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from django.conf import settings
+from django.core.files import File
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from .models import AttachmentUpload, Blob, TaskAttachment, ArchivedAttachment
+
+READ_SIZE = 64 * 1024
+
+# Running hashes of recent uploads: upload id -> (offset, hash)
+MAX_RUNNING_HASHES = 256
+_running_hashes = OrderedDict()
+_running_hashes_lock = threading.Lock()
+
+
+class UploadError(Exception):
+    """A chunk or upload the client must fix; ``status`` is the HTTP status to answer with"""
+
+    def __init__(self, message, status=400, offset=None):
+        super().__init__(message)
+        self.status = status
+        self.offset = offset
+
+
+class PartialFile(File):
+    """A finished partial file; file system storage moves it into place instead of copying it"""
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def partial_path(upload):
+    return Path(settings.ATTACHMENT_UPLOAD_DIR) / str(upload.pk)
+
+
+def hash_file(file):
+    """Return the SHA-256 hex digest and size of a file object or uploaded file, read in chunks"""
+    digest = hashlib.sha256()
+    size = 0
+    chunks = file.chunks(READ_SIZE) if hasattr(file, 'chunks') else iter(lambda: file.read(READ_SIZE), b'')
+    for chunk in chunks:
+        digest.update(chunk)
+        size += len(chunk)
+    return digest.hexdigest(), size
+
+
+def delete_unreferenced_blobs(queryset):
+    """Delete the blobs of ``queryset`` that have no references left and, once committed, their files"""
+    for blob in queryset.filter(ref_count=0):
+        blob.delete()
+        transaction.on_commit(lambda storage=blob.file.storage, name=blob.file.name: storage.delete(name))
+
+
+def acquire_blob(sha256, size, content):
+    """
+    Return the blob with this digest, storing ``content`` if there is none yet,
+    with one more reference counted
+    """
+    while True:
+        # A blob released to zero concurrently is not revived: no row is updated and a new one is stored
+        if Blob.objects.filter(sha256=sha256, ref_count__gt=0).update(ref_count=F('ref_count') + 1):
+            return Blob.objects.get(sha256=sha256)
+        delete_unreferenced_blobs(Blob.objects.filter(sha256=sha256))
+        blob = Blob(sha256=sha256, size=size, ref_count=1)
+        blob.file.save(sha256, content, save=False)
+        try:
+            with transaction.atomic():
+                blob.save()
+            return blob
+        except IntegrityError:
+            # Stored concurrently by another upload
+            blob.file.delete(save=False)
+
+
+def release_blob(blob_id):
+    """Drop one reference to a blob; the last one deletes it"""
+    Blob.objects.filter(pk=blob_id).update(ref_count=F('ref_count') - 1)
+    delete_unreferenced_blobs(Blob.objects.filter(pk=blob_id))
+
+
+def release_file(file):
+    """
+    Delete the file of an attachment from before blobs, unless another row
+    (its archived or restored copy) still points at it
+    """
+    name = file.name
+    if name and not (
+        TaskAttachment.objects.filter(file=name).exists()
+        or ArchivedAttachment.objects.filter(file=name).exists()
+    ):
+        file.storage.delete(name)
+
+
+def store_attachment(task, uploaded_by, name, sha256, size, content):
+    """Create an attachment for ``content`` through the blob of its digest"""
+    blob = acquire_blob(sha256, size, content)
+    return TaskAttachment.objects.create(
+        task=task, file=blob.file.name, blob=blob, name=name, uploaded_by=uploaded_by
+    )
+
+
+def start_upload(uploaded_by, task, file_name, size, sha256=''):
+    """Open a chunked upload of ``size`` bytes for the task"""
+    if size <= 0:
+        raise UploadError('size must be positive')
+    if size > settings.ATTACHMENT_MAX_BYTES:
+        raise UploadError(f'Attachments are limited to {settings.ATTACHMENT_MAX_BYTES} bytes', status=413)
+    upload = AttachmentUpload.objects.create(
+        task=task, uploaded_by=uploaded_by, file_name=file_name, size=size, sha256=sha256.lower()
+    )
+    Path(settings.ATTACHMENT_UPLOAD_DIR).mkdir(parents=True, exist_ok=True)
+    partial_path(upload).touch()
+    return upload
+
+
+def get_running_hash(upload):
+    """The SHA-256 of the upload's first ``offset`` bytes, rebuilt from the partial file if needed"""
+    with _running_hashes_lock:
+        offset, digest = _running_hashes.pop(upload.pk, (None, None))
+    if offset == upload.offset:
+        return digest
+    digest = hashlib.sha256()
+    remaining = upload.offset
+    with open(partial_path(upload), 'rb') as partial:
+        while remaining:
+            data = partial.read(min(READ_SIZE, remaining))
+            if not data:
+                raise UploadError('The partial upload is missing data; start a new upload', status=410)
+            digest.update(data)
+            remaining -= len(data)
+    return digest
+
+
+def remember_running_hash(upload, digest):
+    """Keep the hash of the upload's first ``offset`` bytes for its next chunk"""
+    with _running_hashes_lock:
+        _running_hashes[upload.pk] = (upload.offset, digest)
+        while len(_running_hashes) > MAX_RUNNING_HASHES:
+            _running_hashes.popitem(last=False)
+
+
+def forget_upload(upload):
+    """Drop the running hash and partial file of a finished or abandoned upload"""
+    with _running_hashes_lock:
+        _running_hashes.pop(upload.pk, None)
+    partial_path(upload).unlink(missing_ok=True)
+
+
+def append_chunk(upload_id, offset, length, stream):
+    """
+    Stream ``length`` bytes at ``offset`` of the upload to its partial file.
+    Return the updated upload, or the new attachment when the chunk completed it.
+    """
+    with transaction.atomic():
+        # Serializes chunks of the same upload (row lock on databases that have them)
+        upload = AttachmentUpload.objects.select_for_update().get(pk=upload_id)
+        if offset != upload.offset:
+            raise UploadError('Chunk does not start at the upload offset', status=409, offset=upload.offset)
+        if length > settings.ATTACHMENT_CHUNK_MAX_BYTES:
+            raise UploadError(f'Chunks are limited to {settings.ATTACHMENT_CHUNK_MAX_BYTES} bytes', status=413)
+        if offset + length > upload.size:
+            raise UploadError('Chunk goes past the announced size')
+        if not partial_path(upload).exists():
+            raise UploadError('The partial upload is gone; start a new upload', status=410)
+
+        digest = get_running_hash(upload)
+        written = 0
+        with open(partial_path(upload), 'r+b') as partial:
+            # Bytes past the offset are left over from an interrupted chunk
+            partial.seek(offset)
+            partial.truncate()
+            while written < length:
+                data = stream.read(min(READ_SIZE, length - written))
+                if not data:
+                    break
+                partial.write(data)
+                digest.update(data)
+                written += len(data)
+        if written < length:
+            # The client went away; what arrived was hashed past the stored offset
+            raise UploadError('Chunk ended before Content-Length bytes', offset=upload.offset)
+
+        upload.offset += written
+        if upload.offset < upload.size:
+            upload.save(update_fields=['offset', 'updated_at'])
+            remember_running_hash(upload, digest)
+            return upload
+        sha256 = digest.hexdigest()
+        if not upload.sha256 or upload.sha256 == sha256:
+            return complete_upload(upload, sha256)
+
+    # Outside the transaction, so the corrupt upload stays deleted
+    upload.delete()
+    raise UploadError('The uploaded data does not match the announced sha256; start a new upload')
+
+
+def complete_upload(upload, sha256):
+    """Turn a fully received upload into an attachment"""
+    with open(partial_path(upload), 'rb') as partial:
+        attachment = store_attachment(
+            upload.task, upload.uploaded_by, upload.file_name, sha256, upload.size, PartialFile(partial)
+        )
+    # New content was moved into its blob; a duplicate's partial file is removed with the upload
+    upload.delete()
+    return attachment
@@ -1,5 +1,6 @@
-from django.urls import path, include
+from django.urls import path, re_path, include
 from rest_framework.routers import DefaultRouter
+from task_manager.asyncviews import async_read_view
 from .views import TaskViewSet, TagViewSet, TaskAttachmentViewSet, CommentViewSet
 
 app_name = 'tasks'
@@ -13,3 +14,12 @@ router.register(r'', TaskViewSet, basename='task')
 urlpatterns = [
     path('', include(router.urls)),
 ]
+
+# The router's list and detail routes of the hot reads as async views (ASYNC_READ_VIEWS)
+list_actions = {'get': 'list', 'post': 'create'}
+detail_actions = {'get': 'retrieve', 'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'}
+async_urlpatterns = [
+    path('comments/', async_read_view(CommentViewSet, list_actions, basename='comment', detail=False)),
+    path('', async_read_view(TaskViewSet, list_actions, basename='task', detail=False)),
+    re_path(r'^(?P<pk>[0-9]+)/$', async_read_view(TaskViewSet, detail_actions, basename='task', detail=True)),
+]
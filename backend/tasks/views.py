@@ -2,17 +2,55 @@ from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.views import APIView
+from rest_framework.exceptions import AuthenticationFailed, PermissionDenied
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
 from django.db import models
-from .models import Task, Tag, TaskAttachment, Comment
+from django.db.models import Max, Prefetch, Sum
+from .models import Task, Tag, TaskAttachment, AttachmentUpload, Comment, ArchivedTask, ArchivedComment, ArchivedAttachment
 from .serializers import (
     TaskSerializer, TaskListSerializer, TaskDetailSerializer,
-    TagSerializer, TaskAttachmentSerializer, CommentSerializer
+    TagSerializer, TaskAttachmentSerializer, AttachmentUploadSerializer, CommentSerializer,
+    TaskListRowSerializer, ArchivedTaskListSerializer, ArchivedTaskDetailSerializer
 )
+from .filters import filter_tasks, TaskOrderingFilter, TaskSearchFilter
+from .search import get_search_backend
+from .archive import restore_tasks
+from .stats import get_task_stats
+from .events import get_broadcaster, event_stream
+from .sync import get_changes, current_token, is_expired, DEFAULT_SYNC_LIMIT, MAX_SYNC_LIMIT
+from .downloads import serve_attachment
+from .uploads import UploadError, append_chunk, hash_file, start_upload, store_attachment
+from .bulk import bulk_create_tasks, bulk_update_tasks, bulk_delete_tasks, BulkValidationError
 from .permissions import IsTaskProjectMember, IsCommentAuthor, IsAttachmentTaskProjectMember
+from projects.membership import avisible_project_ids, VisibleProjectsMixin
 from projects.permissions import IsProjectMember
+from task_manager.asyncviews import AsyncReadMixin
+from task_manager.conditional import ConditionalGetMixin
+from task_manager.fieldsets import SparseFieldsetsMixin
+from task_manager.negotiation import IgnoreClientContentNegotiation
+from task_manager.fastserializers import FastListMixin
+from task_manager.pagination import KeysetPagination
 
+UUID_PATTERN = '[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}'
 
-class TagViewSet(viewsets.ModelViewSet):
+
+def scope_to_visible_tasks(view, queryset):
+    """
+    Limit a comment/attachment list to tasks of projects the user can see; other
+    actions load the task along with the object for the permission check
+    """
+    if view.action == 'list':
+        return queryset.filter(task__project_id__in=view.get_visible_project_ids())
+    return queryset.select_related('task')
+
+
+class TagViewSet(SparseFieldsetsMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing tags.
     """
@@ -25,7 +63,10 @@ class TagViewSet(viewsets.ModelViewSet):
     ordering = ['name']
 
 
-class TaskViewSet(viewsets.ModelViewSet):
+class TaskViewSet(
+    VisibleProjectsMixin, AsyncReadMixin, ConditionalGetMixin, FastListMixin, SparseFieldsetsMixin,
+    viewsets.ModelViewSet
+):
     """
     ViewSet for managing tasks.
     
@@ -35,16 +76,45 @@ class TaskViewSet(viewsets.ModelViewSet):
     update: Update task
     partial_update: Partially update task
     destroy: Delete task
+    stats: Get task statistics for the dashboard
+    bulk: Create, update or delete many tasks in one request
+    restore: Move an archived task back to the task list
+
+    With ?archived=true, list and retrieve read archived tasks (see tasks.archive).
     """
     queryset = Task.objects.all()
     permission_classes = [IsAuthenticated, IsTaskProjectMember]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ['title', 'description']
-    ordering_fields = ['created_at', 'updated_at', 'due_date', 'priority', 'status']
-    ordering = ['-created_at']
+    pagination_class = KeysetPagination
+    row_serializer_class = TaskListRowSerializer
+    filter_backends = [TaskOrderingFilter, TaskSearchFilter]
+    # priority sorts on priority_rank (see TaskOrderingFilter)
+    ordering_fields = ['created_at', 'updated_at', 'due_date', 'priority', 'priority_rank', 'status']
+    ordering = ['-created_at', 'id']
+    # project_detail embeds task_count, which moves without touching the project
+    detail_validator_fields = ('updated_at', 'project__updated_at', 'project__task_count')
+    list_validator_aggregates = {
+        **ConditionalGetMixin.list_validator_aggregates,
+        'project_updated_at': Max('project__updated_at'),
+        'project_task_count': Sum('project__task_count'),
+    }
+
+    def is_archived_request(self):
+        # .GET: async_read_view asks supports_async() before wrapping the request
+        return self.request.GET.get('archived', '').lower() in ('1', 'true')
+
+    def reads_archive(self):
+        return self.action in ['list', 'retrieve'] and self.is_archived_request()
+
+    def supports_async(self):
+        return super().supports_async() and not self.is_archived_request()
+
+    def get_row_serializer(self):
+        return None if self.reads_archive() else super().get_row_serializer()
 
     def get_serializer_class(self):
-        if self.action == 'list':
+        if self.reads_archive():
+            return ArchivedTaskListSerializer if self.action == 'list' else ArchivedTaskDetailSerializer
+        if self.action in ['list', 'bulk']:
             return TaskListSerializer
         elif self.action == 'retrieve':
             return TaskDetailSerializer
@@ -54,28 +124,66 @@ class TaskViewSet(viewsets.ModelViewSet):
         """
         Return tasks filtered by project and user permissions
         """
-        queryset = Task.objects.all()
-        project_id = self.request.query_params.get('project', None)
-        
-        if project_id:
-            queryset = queryset.filter(project_id=project_id)
-        
-        # Filter by status if provided
-        status_filter = self.request.query_params.get('status', None)
-        if status_filter:
-            queryset = queryset.filter(status=status_filter)
-        
-        # Filter by assignee if provided
-        assignee_id = self.request.query_params.get('assignee', None)
-        if assignee_id:
-            queryset = queryset.filter(assignees__id=assignee_id)
-        
-        # Filter by priority if provided
-        priority = self.request.query_params.get('priority', None)
-        if priority:
-            queryset = queryset.filter(priority=priority)
-        
-        return queryset.distinct()
+        if self.reads_archive():
+            queryset = ArchivedTask.objects.filter(project_id__in=self.get_visible_project_ids())
+            return filter_tasks(self.apply_fetch_plan(queryset), self.request.query_params)
+        queryset = self.apply_fetch_plan(Task.objects.all())
+        if self.action == 'list':
+            queryset = queryset.filter(project_id__in=self.get_visible_project_ids())
+        return filter_tasks(queryset, self.request.query_params)
+
+    def get_conditional_queryset(self):
+        model = ArchivedTask if self.reads_archive() else Task
+        return model.objects.filter(project_id__in=self.get_visible_project_ids())
+
+    async def aprepare(self, request):
+        await super().aprepare(request)
+        if request.query_params.get(TaskSearchFilter.search_param):
+            # Picking the backend may probe the database once per process
+            await sync_to_async(get_search_backend)()
+
+    def apply_fetch_plan(self, queryset):
+        """
+        Load everything the action's serializer walks up front, so the number
+        of queries per request is fixed and does not grow with page size:
+
+        list:     COUNT, tasks + project, assignees, tags           (4 queries)
+        retrieve: task + project/owner/creator, assignees, tags,
+                  comments + authors, attachments + uploaders       (5 queries)
+
+        Relations whose fields are left out with ?fields= are not loaded.
+        Both actions first run one ETag validator query (see ConditionalGetMixin),
+        which is all a 304 costs.
+        """
+        if self.action in ['list', 'bulk', 'retrieve']:
+            archived = queryset.model is ArchivedTask
+            wants = self.wants_field
+            if wants('project_detail'):
+                queryset = queryset.select_related('project__owner')
+            elif wants('project_title'):
+                queryset = queryset.select_related('project')
+            if wants('created_by_detail'):
+                queryset = queryset.select_related('created_by')
+            if wants('assignees_detail'):
+                queryset = queryset.prefetch_related('assignees')
+            if wants('tags_detail'):
+                queryset = queryset.prefetch_related('tags')
+            if wants('comments'):
+                queryset = queryset.prefetch_related(
+                    Prefetch(
+                        'comments',
+                        queryset=(ArchivedComment if archived else Comment).objects.select_related('author')
+                    )
+                )
+            if wants('attachments'):
+                queryset = queryset.prefetch_related(
+                    Prefetch(
+                        'attachments',
+                        queryset=(ArchivedAttachment if archived else TaskAttachment).objects.select_related('uploaded_by')
+                    )
+                )
+            return queryset
+        return queryset.select_related('project__owner', 'created_by')
 
     def perform_create(self, serializer):
         """
@@ -83,18 +191,82 @@ class TaskViewSet(viewsets.ModelViewSet):
         """
         serializer.save(created_by=self.request.user)
 
+    @action(detail=False, methods=['get'])
+    def stats(self, request):
+        """
+        Task counts per status, priority and project, plus overdue tasks,
+        across all projects the user owns or is a member of
+        """
+        return Response(get_task_stats(request.user))
+
+    @action(detail=False, methods=['post', 'patch', 'delete'])
+    def bulk(self, request):
+        """
+        Batch endpoint; all items are validated together and written in one transaction.
+
+        POST: create tasks from a list of task objects
+        PATCH: partially update tasks from a list of objects with an "id"
+        DELETE: delete tasks, given {"ids": [...]}
+        """
+        if request.method == 'DELETE':
+            payload = request.data.get('ids') if isinstance(request.data, dict) else None
+        else:
+            payload = request.data
+            if not isinstance(payload, list):
+                return Response({'error': 'Expected a list of tasks'}, status=status.HTTP_400_BAD_REQUEST)
+        if isinstance(payload, list) and len(payload) > settings.TASK_BULK_MAX_ITEMS:
+            return Response(
+                {'error': f'At most {settings.TASK_BULK_MAX_ITEMS} items per request'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            if request.method == 'POST':
+                tasks = bulk_create_tasks(request.user, payload)
+            elif request.method == 'PATCH':
+                tasks = bulk_update_tasks(request.user, payload)
+            else:
+                deleted = bulk_delete_tasks(request.user, payload)
+                return Response({'deleted': deleted}, status=status.HTTP_200_OK)
+        except BulkValidationError as e:
+            return Response({'errors': e.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Re-read with the list fetch plan so serializing the batch costs a fixed number of queries
+        by_id = self.apply_fetch_plan(Task.objects.filter(id__in=[task.pk for task in tasks])).in_bulk()
+        serializer = TaskListSerializer([by_id[task.pk] for task in tasks], many=True)
+        return Response(
+            {'results': serializer.data},
+            status=status.HTTP_201_CREATED if request.method == 'POST' else status.HTTP_200_OK
+        )
+
+    @action(detail=True, methods=['post'])
+    def restore(self, request, pk=None):
+        """
+        Move an archived task, with its comments and attachments, back to the task list
+        """
+        if not pk.isdigit() or not ArchivedTask.objects.filter(
+            pk=pk, project_id__in=self.get_visible_project_ids()
+        ).exists():
+            raise Http404
+        restored = restore_tasks([int(pk)])
+        if not restored:
+            # Restored concurrently
+            raise Http404
+        task = self.apply_fetch_plan(Task.objects.all()).get(pk=restored[0].pk)
+        return Response(TaskSerializer(task).data)
+
     def get_permissions(self):
         """
         Override get_permissions to check project membership on object level
         """
-        if self.action in ['list', 'create']:
+        if self.action in ['list', 'create', 'stats', 'bulk']:
             permission_classes = [IsAuthenticated]
         else:
             permission_classes = [IsAuthenticated, IsTaskProjectMember]
         return [permission() for permission in permission_classes]
 
 
-class TaskAttachmentViewSet(viewsets.ModelViewSet):
+class TaskAttachmentViewSet(VisibleProjectsMixin, SparseFieldsetsMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing task attachments.
     """
@@ -106,25 +278,107 @@ class TaskAttachmentViewSet(viewsets.ModelViewSet):
         """
         Return attachments for a specific task
         """
+        if self.action == 'download':
+            return TaskAttachment.objects.select_related('task', 'blob')
         task_id = self.request.query_params.get('task', None)
         if task_id:
-            return TaskAttachment.objects.filter(task_id=task_id)
+            queryset = scope_to_visible_tasks(self, TaskAttachment.objects.filter(task_id=task_id))
+            if self.wants_field('uploaded_by_detail'):
+                queryset = queryset.select_related('uploaded_by')
+            return queryset
         return TaskAttachment.objects.none()
 
+    def check_task_access(self, task):
+        if task.project_id not in self.get_visible_project_ids():
+            raise PermissionDenied("You are not a member of this task's project")
+
     def perform_create(self, serializer):
         """
-        Set the uploaded_by field to the current user
+        Store the file through the blob of its content (see tasks.uploads)
+        and set the uploaded_by field to the current user
+        """
+        task = serializer.validated_data['task']
+        self.check_task_access(task)
+        file = serializer.validated_data['file']
+        sha256, size = hash_file(file)
+        file.seek(0)
+        serializer.instance = store_attachment(task, self.request.user, file.name, sha256, size, file)
+
+    @action(detail=False, methods=['post'], url_path='uploads')
+    def start_upload(self, request):
+        """
+        Open a resumable, chunked upload (see tasks.uploads)
+        from task, file_name, size and an optional sha256
         """
-        serializer.save(uploaded_by=self.request.user)
+        serializer = AttachmentUploadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        self.check_task_access(data['task'])
+        try:
+            upload = start_upload(request.user, **data)
+        except UploadError as e:
+            return self.upload_error(e)
+        return Response(AttachmentUploadSerializer(upload).data, status=status.HTTP_201_CREATED)
 
+    @action(detail=False, methods=['get', 'patch', 'delete'], url_path=f'uploads/(?P<upload_id>{UUID_PATTERN})')
+    def upload(self, request, upload_id=None):
+        """
+        GET: the upload, with the offset to resume from
+        PATCH: append the raw request body at the Upload-Offset header; the
+               chunk that completes the file returns the new attachment (201)
+        DELETE: abandon the upload
+        """
+        upload = get_object_or_404(AttachmentUpload.objects.select_related('task'), pk=upload_id,
+                                   uploaded_by=request.user)
+        self.check_task_access(upload.task)
+        if request.method == 'GET':
+            return Response(AttachmentUploadSerializer(upload).data)
+        if request.method == 'DELETE':
+            upload.delete()
+            return Response(status=status.HTTP_204_NO_CONTENT)
 
-class CommentViewSet(viewsets.ModelViewSet):
+        try:
+            offset = int(request.headers['Upload-Offset'])
+            length = int(request.headers.get('Content-Length') or 0)
+        except (KeyError, ValueError):
+            return Response(
+                {'error': 'An integer Upload-Offset header is required'}, status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            result = append_chunk(upload.pk, offset, length, request.stream)
+        except UploadError as e:
+            return self.upload_error(e)
+        if isinstance(result, TaskAttachment):
+            return Response(self.get_serializer(result).data, status=status.HTTP_201_CREATED)
+        return Response(AttachmentUploadSerializer(result).data)
+
+    @action(detail=True, methods=['get'], content_negotiation_class=IgnoreClientContentNegotiation)
+    def download(self, request, pk=None):
+        """
+        Download the file; supports Range, If-Range and If-None-Match (see tasks.downloads)
+        """
+        return serve_attachment(request._request, self.get_object())
+
+    def upload_error(self, error):
+        response = Response({'error': str(error)}, status=error.status)
+        if error.offset is not None:
+            response.data['offset'] = error.offset
+            response['Upload-Offset'] = str(error.offset)
+        return response
+
+
+class CommentViewSet(
+    VisibleProjectsMixin, AsyncReadMixin, ConditionalGetMixin, SparseFieldsetsMixin, viewsets.ModelViewSet
+):
     """
     ViewSet for managing task comments.
     """
     queryset = Comment.objects.all()
     serializer_class = CommentSerializer
     permission_classes = [IsAuthenticated, IsCommentAuthor]
+    pagination_class = KeysetPagination
+    ordering = ['created_at', 'id']
+    async_actions = ('list',)
 
     def get_queryset(self):
         """
@@ -132,12 +386,90 @@ class CommentViewSet(viewsets.ModelViewSet):
         """
         task_id = self.request.query_params.get('task', None)
         if task_id:
-            return Comment.objects.filter(task_id=task_id)
+            queryset = scope_to_visible_tasks(self, Comment.objects.filter(task_id=task_id))
+            if self.wants_field('author_detail'):
+                queryset = queryset.select_related('author')
+            return queryset
         return Comment.objects.none()
 
+    def get_conditional_queryset(self):
+        return self.get_queryset().filter(task__project_id__in=self.get_visible_project_ids())
+
     def perform_create(self, serializer):
         """
         Set the author field to the current user
         """
         serializer.save(author=self.request.user)
 
+
+class SyncView(APIView):
+    """
+    Delta sync (see tasks.sync).
+
+    GET /api/sync/: the current sync token
+    GET /api/sync/?since=<token>[&limit=N]: tasks, projects, comments and tags
+    created, updated or deleted after the token, and the token to use next
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        since = request.query_params.get('since')
+        if since is None:
+            return Response({'token': str(current_token())})
+        try:
+            since = int(since)
+            limit = int(request.query_params.get('limit', DEFAULT_SYNC_LIMIT))
+        except ValueError:
+            return Response({'error': 'since and limit must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+        if since < 0:
+            return Response({'error': 'since must not be negative'}, status=status.HTTP_400_BAD_REQUEST)
+        if is_expired(since):
+            return Response(
+                {'error': 'Sync token expired; reload and start from a new token', 'reset': True},
+                status=status.HTTP_410_GONE
+            )
+        limit = min(max(limit, 1), MAX_SYNC_LIMIT)
+        return Response(get_changes(request.user, since, limit, context={'request': request}))
+
+
+def authenticate_event_stream(request):
+    """
+    JWT from the Authorization header, or from ?access_token= since browsers'
+    EventSource cannot set headers
+    """
+    authentication = JWTAuthentication()
+    raw_token = request.GET.get('access_token')
+    if raw_token is None:
+        result = authentication.authenticate(request)
+        return result[0] if result else None
+    return authentication.get_user(authentication.get_validated_token(raw_token))
+
+
+async def task_events(request):
+    """
+    Server-sent events for the tasks, comments and memberships of the user's
+    projects (see tasks.events). Needs an ASGI server.
+    """
+    if request.method != 'GET':
+        return JsonResponse({'detail': f'Method "{request.method}" not allowed.'}, status=405)
+    if not isinstance(request, ASGIRequest):
+        # Under WSGI an endless stream would hold a worker thread forever
+        return JsonResponse({'detail': 'Event streams need an ASGI server.'}, status=501)
+    try:
+        user = await sync_to_async(authenticate_event_stream)(request)
+    except AuthenticationFailed as e:
+        return JsonResponse({'detail': str(e.detail)}, status=401)
+    if user is None:
+        return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+
+    project_ids = await avisible_project_ids(user)
+    token = await sync_to_async(current_token)()
+    broadcaster = get_broadcaster()
+    subscription = broadcaster.subscribe(user.pk, project_ids)
+    response = StreamingHttpResponse(
+        event_stream(broadcaster, subscription, str(token)), content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,31 @@
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand
+from task_manager.renditions import generate_renditions
+from users.models import AVATAR_RENDITIONS, User
+
+
+class Command(BaseCommand):
+    help = 'Generate the missing thumbnails (renditions) of existing avatars'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Regenerate renditions that already exist')
+        parser.add_argument('--workers', type=int, default=4, help='Avatars rendered in parallel (default: 4)')
+
+    def handle(self, *args, **options):
+        storage = User._meta.get_field('avatar').storage
+        names = User.objects.exclude(avatar='').exclude(avatar=None).values_list('avatar', flat=True)
+
+        def backfill(name):
+            try:
+                return len(generate_renditions(name, AVATAR_RENDITIONS, storage, force=options['force'])), None
+            except Exception as e:
+                return 0, f'{name}: {e}'
+
+        written = failed = 0
+        with ThreadPoolExecutor(options['workers']) as executor:
+            for count, error in executor.map(backfill, names.iterator()):
+                written += count
+                if error:
+                    failed += 1
+                    self.stderr.write(error)
+        self.stdout.write(self.style.SUCCESS(f'{written} rendition(s) written, {failed} avatar(s) failed'))
@@ -1,6 +1,9 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 
+# Square avatar thumbnails served to clients (see task_manager.renditions): label -> pixels
+AVATAR_RENDITIONS = {'small': 64, 'large': 256}
+
 
 class User(AbstractUser):
     """Custom User model extending Django's AbstractUser"""
@@ -13,9 +16,28 @@ class User(AbstractUser):
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username']
 
+    # Rendered wherever a user is embedded in another object (UserSerializer)
+    EMBEDDED_FIELDS = ('username', 'email', 'first_name', 'last_name', 'bio', 'avatar')
+
     class Meta:
         db_table = 'users'
         ordering = ['-created_at']
 
     def __str__(self):
         return self.email
+
+    def embedded_values(self):
+        return tuple(
+            getattr(self, name).name if name == 'avatar' else getattr(self, name) for name in self.EMBEDDED_FIELDS
+        )
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the loaded avatar so a new one gets renditions (see users.signals)
+        if 'avatar' in field_names:
+            instance._loaded_avatar = instance.avatar.name
+        # ... and changes to what other objects embed (see tasks.signals)
+        if all(name in field_names for name in cls.EMBEDDED_FIELDS):
+            instance._loaded_embedded = instance.embedded_values()
+        return instance
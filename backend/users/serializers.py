@@ -1,6 +1,15 @@
 from rest_framework import serializers
 from django.contrib.auth.password_validation import validate_password
-from .models import User
+from .models import AVATAR_RENDITIONS, User
+from task_manager.fieldsets import DynamicFieldsMixin
+from task_manager.fastserializers import RowSerializer
+from task_manager.renditions import rendition_urls
+
+avatar_storage = User._meta.get_field('avatar').storage
+
+
+def avatar_rendition_urls(name, request=None):
+    return rendition_urls(name, AVATAR_RENDITIONS, avatar_storage, request)
 
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
@@ -35,17 +44,48 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         return user
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for user details"""
+    avatar_renditions = serializers.SerializerMethodField()
+
     class Meta:
         model = User
-        fields = ('id', 'username', 'email', 'first_name', 'last_name', 'bio', 'avatar', 'date_joined')
+        fields = (
+            'id', 'username', 'email', 'first_name', 'last_name', 'bio', 'avatar', 'avatar_renditions',
+            'date_joined'
+        )
         read_only_fields = ('id', 'date_joined')
 
+    def get_avatar_renditions(self, obj):
+        return avatar_rendition_urls(obj.avatar.name, self.context.get('request'))
+
 
-class UserProfileSerializer(serializers.ModelSerializer):
+class UserRowSerializer(RowSerializer):
+    """Read-only fast path for UserSerializer (see task_manager.fastserializers)"""
+    serializer_class = UserSerializer
+    value_fields = {
+        'id': 'id', 'username': 'username', 'email': 'email',
+        'first_name': 'first_name', 'last_name': 'last_name', 'bio': 'bio',
+    }
+    datetime_fields = {'date_joined': 'date_joined'}
+    file_fields = {'avatar': ('avatar', avatar_storage)}
+    computed_fields = {'avatar_renditions': ('avatar', 'get_avatar_renditions')}
+
+    def get_avatar_renditions(self, name):
+        return avatar_rendition_urls(name, self.context.get('request'))
+
+
+class UserProfileSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for user profile with additional details"""
+    avatar_renditions = serializers.SerializerMethodField()
+
     class Meta:
         model = User
-        fields = ('id', 'username', 'email', 'first_name', 'last_name', 'bio', 'avatar', 'date_joined', 'last_login')
+        fields = (
+            'id', 'username', 'email', 'first_name', 'last_name', 'bio', 'avatar', 'avatar_renditions',
+            'date_joined', 'last_login'
+        )
         read_only_fields = ('id', 'date_joined', 'last_login')
+
+    def get_avatar_renditions(self, obj):
+        return avatar_rendition_urls(obj.avatar.name, self.context.get('request'))
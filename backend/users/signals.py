@@ -0,0 +1,27 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from task_manager.renditions import delete_renditions, submit_renditions
+from .models import AVATAR_RENDITIONS, User
+
+
+@receiver(post_save, sender=User)
+def generate_avatar_renditions(sender, instance, **kwargs):
+    """Render a new avatar's thumbnails in the background once it is committed"""
+    loaded_avatar = getattr(instance, '_loaded_avatar', '') or ''
+    avatar = instance.avatar.name or ''
+    if avatar == loaded_avatar:
+        return
+    storage = instance.avatar.storage
+    if avatar:
+        transaction.on_commit(lambda: submit_renditions(avatar, AVATAR_RENDITIONS, storage))
+    if loaded_avatar:
+        transaction.on_commit(lambda: delete_renditions(loaded_avatar, AVATAR_RENDITIONS, storage))
+    instance._loaded_avatar = avatar
+
+
+@receiver(post_delete, sender=User)
+def delete_avatar_renditions(sender, instance, **kwargs):
+    if instance.avatar.name:
+        name, storage = instance.avatar.name, instance.avatar.storage
+        transaction.on_commit(lambda: delete_renditions(name, AVATAR_RENDITIONS, storage))
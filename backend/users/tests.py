@@ -1,8 +1,16 @@
-from django.test import TestCase
+import io
+import shutil
+import tempfile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
+from PIL import Image
 from rest_framework.test import APIClient
 from rest_framework import status
-from .models import User
+from task_manager.renditions import rendition_name
+from .models import AVATAR_RENDITIONS, User
+from .serializers import UserSerializer
 
 User = get_user_model()
 
@@ -80,3 +88,83 @@ class UserAPITest(TestCase):
         response = self.client.get('/api/users/profile/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['email'], 'test@example.com')
+
+    def test_user_list_sparse_fields(self):
+        """Test listing users with a sparse fieldset"""
+        user = User.objects.create_user(
+            email='test@example.com',
+            username='testuser',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=user)
+        response = self.client.get('/api/users/?fields=id,email')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'], [{'id': user.id, 'email': 'test@example.com'}])
+
+
+class AvatarRenditionTest(TestCase):
+    """Test cases for avatar thumbnails"""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root, IMAGE_RENDITION_FORMAT='webp')
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='test@example.com',
+            username='testuser',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=User.objects.get(pk=self.user.pk))
+
+    def upload_avatar(self, size=(400, 300)):
+        image = io.BytesIO()
+        Image.new('RGBA', size, (200, 30, 30, 128)).save(image, 'PNG')
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.patch('/api/users/profile/', {
+                'avatar': SimpleUploadedFile('me.png', image.getvalue(), content_type='image/png')
+            }, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # Wait for the background renditions (and deletions) instead of racing them
+        for callback in callbacks:
+            result = callback()
+            if hasattr(result, 'result'):
+                result.result()
+        return response
+
+    def test_avatar_renditions(self):
+        """Test a new avatar gets square thumbnails, exposed by the serializers"""
+        response = self.upload_avatar()
+        avatar = User.objects.get(pk=self.user.pk).avatar
+        for label, size in AVATAR_RENDITIONS.items():
+            name = rendition_name(avatar.name, size)
+            self.assertEqual(response.data['avatar_renditions'][label], f'http://testserver/media/{name}')
+            with avatar.storage.open(name) as file, Image.open(file) as image:
+                self.assertEqual((image.format, image.size), ('WEBP', (size, size)))
+
+        response = self.client.get('/api/users/')
+        self.assertEqual(response.data['results'][0]['avatar_renditions'], self.client.get(
+            '/api/users/profile/'
+        ).data['avatar_renditions'])
+        self.assertEqual(
+            response.data['results'],
+            UserSerializer(User.objects.all(), many=True, context={'request': response.wsgi_request}).data
+        )
+
+        # Replacing the avatar drops the old thumbnails
+        old_names = [rendition_name(avatar.name, size) for size in AVATAR_RENDITIONS.values()]
+        self.upload_avatar(size=(100, 500))
+        self.assertFalse(any(avatar.storage.exists(name) for name in old_names))
+
+    def test_backfill_command(self):
+        """Test the backfill renders missing thumbnails of existing avatars"""
+        self.upload_avatar()
+        avatar = User.objects.get(pk=self.user.pk).avatar
+        avatar.storage.delete(rendition_name(avatar.name, AVATAR_RENDITIONS['small']))
+        output = io.StringIO()
+        call_command('backfill_avatar_renditions', stdout=output)
+        self.assertIn('1 rendition(s) written, 0 avatar(s) failed', output.getvalue())
+        self.assertTrue(avatar.storage.exists(rendition_name(avatar.name, AVATAR_RENDITIONS['small'])))
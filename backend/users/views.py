@@ -5,7 +5,9 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
 from .models import User
-from .serializers import UserRegistrationSerializer, UserSerializer, UserProfileSerializer
+from .serializers import UserRegistrationSerializer, UserSerializer, UserProfileSerializer, UserRowSerializer
+from task_manager.fieldsets import SparseFieldsetsMixin
+from task_manager.fastserializers import FastListMixin
 
 
 class UserRegistrationView(generics.CreateAPIView):
@@ -18,7 +20,7 @@ class UserRegistrationView(generics.CreateAPIView):
     serializer_class = UserRegistrationSerializer
 
 
-class UserProfileView(generics.RetrieveUpdateAPIView):
+class UserProfileView(SparseFieldsetsMixin, generics.RetrieveUpdateAPIView):
     """
     View for retrieving and updating user profile.
     Users can only view/edit their own profile.
@@ -30,10 +32,11 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
         return self.request.user
 
 
-class UserListView(generics.ListAPIView):
+class UserListView(FastListMixin, SparseFieldsetsMixin, generics.ListAPIView):
     """
     View for listing users (for selecting assignees, etc.)
     """
     queryset = User.objects.all()
     serializer_class = UserSerializer
+    row_serializer_class = UserRowSerializer
     permission_classes = (IsAuthenticated,)
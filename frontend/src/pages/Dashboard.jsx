@@ -20,19 +20,21 @@ const Dashboard = () => {
 
   const fetchDashboardData = async () => {
     try {
-      const [projectsRes, tasksRes] = await Promise.all([
+      const [projectsRes, tasksRes, statsRes] = await Promise.all([
         projectsAPI.list(),
         tasksAPI.list(),
+        tasksAPI.stats(),
       ]);
 
       const projects = projectsRes.data.results || projectsRes.data;
       const tasks = tasksRes.data.results || tasksRes.data;
+      const taskStats = statsRes.data;
 
       setStats({
-        projects: projects.length,
-        tasks: tasks.length,
-        tasksTodo: tasks.filter(t => t.status === 'todo').length,
-        tasksInProgress: tasks.filter(t => t.status === 'in_progress').length,
+        projects: taskStats.project_count,
+        tasks: taskStats.total,
+        tasksTodo: taskStats.by_status.todo,
+        tasksInProgress: taskStats.by_status.in_progress,
       });
 
       setRecentProjects(projects.slice(0, 5));
@@ -73,8 +73,18 @@ export const projectsAPI = {
   get: (id) => api.get(`/projects/${id}/`),
   update: (id, data) => api.patch(`/projects/${id}/`, data),
   delete: (id) => api.delete(`/projects/${id}/`),
+  deletion: (id) => api.get(`/projects/${id}/deletion/`),
   addMember: (id, userId) => api.post(`/projects/${id}/add_member/`, { user_id: userId }),
   removeMember: (id, userId) => api.post(`/projects/${id}/remove_member/`, { user_id: userId }),
+  board: (id, params = {}) => api.get(`/projects/${id}/board/`, { params }),
+  export: (id, format = 'csv') =>
+    api.get(`/projects/${id}/export/`, { params: { format }, responseType: 'blob' }),
+  importTasks: (id, file, format = 'csv') =>
+    api.post(`/projects/${id}/import/`, file, {
+      params: { format },
+      headers: { 'Content-Type': format === 'csv' ? 'text/csv' : 'application/x-ndjson' },
+    }),
+  activity: (id, params = {}) => api.get(`/projects/${id}/activity/`, { params }),
 };
 
 // Tasks API
@@ -84,6 +94,9 @@ export const tasksAPI = {
   get: (id) => api.get(`/tasks/${id}/`),
   update: (id, data) => api.patch(`/tasks/${id}/`, data),
   delete: (id) => api.delete(`/tasks/${id}/`),
+  stats: () => api.get('/tasks/stats/'),
+  // Archived tasks are listed with tasksAPI.list({ archived: true })
+  restore: (id) => api.post(`/tasks/${id}/restore/`),
 };
 
 // Tags API
@@ -100,4 +113,24 @@ export const commentsAPI = {
   delete: (id) => api.delete(`/tasks/comments/${id}/`),
 };
 
+// Attachments API; large files go through resumable chunked uploads
+export const attachmentsAPI = {
+  list: (taskId) => api.get('/tasks/attachments/', { params: { task: taskId } }),
+  delete: (id) => api.delete(`/tasks/attachments/${id}/`),
+  download: (id) => api.get(`/tasks/attachments/${id}/download/`, { responseType: 'blob' }),
+  startUpload: (data) => api.post('/tasks/attachments/uploads/', data),
+  getUpload: (uploadId) => api.get(`/tasks/attachments/uploads/${uploadId}/`),
+  sendChunk: (uploadId, offset, chunk) =>
+    api.patch(`/tasks/attachments/uploads/${uploadId}/`, chunk, {
+      headers: { 'Content-Type': 'application/offset+octet-stream', 'Upload-Offset': offset },
+    }),
+  cancelUpload: (uploadId) => api.delete(`/tasks/attachments/uploads/${uploadId}/`),
+};
+
+// Sync API
+export const syncAPI = {
+  token: () => api.get('/sync/'),
+  changes: (since, params = {}) => api.get('/sync/', { params: { since, ...params } }),
+};
+
 export default api;